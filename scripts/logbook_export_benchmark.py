@@ -0,0 +1,121 @@
+"""
+Benchmark the logged hours XLSX export on a synthetic dataset
+
+Creates logged hours of 100 users on 500 services inside a transaction which
+is rolled back at the end, so the script can be pointed at any database. The
+export runs for growing numbers of entries and reports the time taken and the
+peak of memory allocated by Python. The peak grows with the number of cells
+in the pivot sheets (services and users times months), not with the number
+of entries:
+
+    venv/bin/python scripts/logbook_export_benchmark.py
+"""
+
+import datetime as dt
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+from pathlib import Path
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import speckenv  # noqa: E402
+
+
+speckenv.read_speckenv(filename=BASE_DIR / os.environ.get("DOTENV", ".env"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "workbench.settings")
+
+import django  # noqa: E402
+
+
+django.setup()
+
+from django.db import transaction  # noqa: E402
+
+from workbench import factories  # noqa: E402
+from workbench.accounts.models import User  # noqa: E402
+from workbench.logbook.models import LoggedHours  # noqa: E402
+from workbench.tools.xlsx import WorkbenchXLSXDocument  # noqa: E402
+
+
+USERS = 100
+SERVICES = 500
+STEPS = [10_000, 50_000, 100_000]
+
+
+def create_logged_hours(count, users, services, rnd):
+    start = dt.date.today() - dt.timedelta(days=365)
+    LoggedHours.objects.bulk_create(
+        (
+            LoggedHours(
+                service=rnd.choice(services),
+                created_by=(user := rnd.choice(users)),
+                rendered_by=user,
+                rendered_on=start + dt.timedelta(days=rnd.randrange(365)),
+                hours=Decimal(rnd.randrange(1, 40)) / 4,
+                description="Work on something",
+            )
+            for _i in range(count)
+        ),
+        batch_size=5000,
+    )
+
+
+def export(queryset):
+    xlsx = WorkbenchXLSXDocument()
+    xlsx.logged_hours(queryset)
+    with io.BytesIO() as buf:
+        xlsx.workbook.save(buf)
+        return buf.tell()
+
+
+def main():
+    rnd = random.Random(42)
+
+    with transaction.atomic():
+        # Avoid clashes with existing users
+        factories.UserFactory.reset_sequence(User.objects.count() + 1000)
+        users = factories.UserFactory.create_batch(USERS)
+        projects = factories.ProjectFactory.create_batch(SERVICES // 10)
+        services = [
+            factories.ServiceFactory.create(
+                project=projects[i % len(projects)],
+                effort_type="Consulting",
+                effort_rate=rnd.choice([None, 160, 180]),
+            )
+            for i in range(SERVICES)
+        ]
+
+        created = 0
+        for step in STEPS:
+            create_logged_hours(step - created, users, services, rnd)
+            created = step
+
+            queryset = LoggedHours.objects.filter(service__in=services)
+            start = time.perf_counter()
+            size = export(queryset)
+            elapsed = time.perf_counter() - start
+
+            # Tracing slows down the export considerably, measure separately
+            tracemalloc.start()
+            export(queryset)
+            _current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(
+                f"logged_hours export, {step} entries:"
+                f" {elapsed:.2f}s, peak {peak / 1024 / 1024:.1f} MiB,"
+                f" file {size / 1024 / 1024:.1f} MiB"
+            )
+
+        transaction.set_rollback(True)
+
+
+if __name__ == "__main__":
+    main()
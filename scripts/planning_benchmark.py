@@ -0,0 +1,133 @@
+"""
+Benchmark the team planning report on a synthetic dataset
+
+Creates 200 users with planned work, absences and logged hours spread over
+104 weeks inside a transaction which is rolled back at the end, so the
+script can be pointed at any database:
+
+    venv/bin/python scripts/planning_benchmark.py
+
+Compare implementations by running the script in a worktree of the other
+revision against a database migrated to that revision, e.g.:
+
+    git worktree add /tmp/before <rev>
+    cp scripts/planning_benchmark.py /tmp/before/scripts/
+    (cd /tmp/before && $OLDPWD/venv/bin/python scripts/planning_benchmark.py)
+"""
+
+import datetime as dt
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+from itertools import islice
+from pathlib import Path
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import speckenv  # noqa: E402
+
+
+speckenv.read_speckenv(filename=BASE_DIR / os.environ.get("DOTENV", ".env"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "workbench.settings")
+
+import django  # noqa: E402
+
+
+django.setup()
+
+from django.db import transaction  # noqa: E402
+
+from workbench import factories  # noqa: E402
+from workbench.awt.models import Absence  # noqa: E402
+from workbench.invoices.utils import recurring  # noqa: E402
+from workbench.logbook.models import LoggedHours  # noqa: E402
+from workbench.planning import reporting  # noqa: E402
+from workbench.planning.models import PlannedWork  # noqa: E402
+from workbench.tools.validation import monday  # noqa: E402
+
+
+USERS = 200
+WEEKS = 104
+ROUNDS = 5
+
+
+def create_dataset(weeks):
+    rnd = random.Random(42)
+    team = factories.TeamFactory.create()
+    users = factories.UserFactory.create_batch(USERS)
+    team.members.set(users)
+    projects = factories.ProjectFactory.create_batch(50)
+    services = [factories.ServiceFactory.create(project=p) for p in projects]
+
+    planned_work, absences, logged_hours = [], [], []
+    for user in users:
+        factories.EmploymentFactory.create(user=user, date_from=weeks[0])
+        for _i in range(10):
+            start = rnd.randrange(len(weeks) - 12)
+            project = rnd.choice(projects)
+            planned_work.append(
+                PlannedWork(
+                    project=project,
+                    user=user,
+                    created_by=user,
+                    title="Planned work",
+                    planned_hours=Decimal(rnd.randrange(10, 400)),
+                    weeks=weeks[start : start + rnd.randrange(1, 12)],
+                    is_provisional=rnd.random() < 0.2,
+                )
+            )
+        for _i in range(4):
+            starts_on = rnd.choice(weeks)
+            absences.append(
+                Absence(
+                    user=user,
+                    starts_on=starts_on,
+                    ends_on=starts_on + dt.timedelta(days=rnd.randrange(1, 12)),
+                    days=Decimal(rnd.randrange(1, 10)),
+                    description="Absence",
+                    reason=Absence.VACATION,
+                )
+            )
+        for week in weeks[: WEEKS // 2]:
+            logged_hours.append(
+                LoggedHours(
+                    service=rnd.choice(services),
+                    created_by=user,
+                    rendered_by=user,
+                    rendered_on=week,
+                    hours=Decimal(rnd.randrange(1, 40)),
+                    description="Work",
+                )
+            )
+
+    PlannedWork.objects.bulk_create(planned_work)
+    Absence.objects.bulk_create(absences)
+    LoggedHours.objects.bulk_create(logged_hours)
+    return team
+
+
+def main():
+    weeks = list(islice(recurring(monday(), "weekly"), WEEKS))
+    date_range = [weeks[0], weeks[-1] + dt.timedelta(days=6)]
+
+    with transaction.atomic():
+        team = create_dataset(weeks)
+        timings = []
+        for _i in range(ROUNDS):
+            start = time.perf_counter()
+            reporting.team_planning(team, date_range)
+            timings.append(time.perf_counter() - start)
+        transaction.set_rollback(True)
+
+    print(
+        f"team_planning, {USERS} users × {WEEKS} weeks:"
+        f" best {min(timings):.3f}s, mean {sum(timings) / len(timings):.3f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
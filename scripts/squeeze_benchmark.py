@@ -0,0 +1,107 @@
+"""
+Compare the monthly squeeze reports with one squeeze run per month
+
+Runs ``manage.py squeeze --range`` once per month in a subprocess (the way
+``scripts/monthly_squeeze.py`` used to work) and ``manage.py squeeze
+--monthly`` with freshly computed and with stored logged hours of closed
+months, each in a temporary directory. Reports the time taken and checks
+that all runs produce workbooks with the same rows. Rows with the same sort
+key (e.g. projects with equal gross margins) may be ordered differently.
+
+Uses the configured database and does not modify anything except for the
+stored monthly logged hours:
+
+    venv/bin/python scripts/squeeze_benchmark.py --since 2023 --workers 4
+"""
+
+import argparse
+import datetime as dt
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def months(since, until):
+    day = since
+    while day <= until:
+        end = (day + dt.timedelta(days=31)).replace(day=1) - dt.timedelta(days=1)
+        yield day, end
+        day = end + dt.timedelta(days=1)
+
+
+def squeeze(cwd, *args):
+    subprocess.run(
+        [sys.executable, BASE_DIR / "manage.py", "squeeze", *args],
+        cwd=cwd,
+        check=True,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def rows(path):
+    workbook = load_workbook(path, read_only=True)
+    return [
+        sorted(repr(row) for row in sheet.iter_rows(values_only=True))
+        for sheet in workbook.worksheets
+    ]
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    fn()
+    print(f"{label}: {time.perf_counter() - start:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--since", type=int, default=dt.date.today().year - 1)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    since = dt.date(args.since, 1, 1)
+    until = dt.date.today().replace(day=1) - dt.timedelta(days=1)
+    date_range = f"{since:%Y%m%d}-{until:%Y%m%d}"
+    monthly = ["--monthly", "--range", date_range, "--workers", str(args.workers)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dirs = {name: Path(tmp) / name for name in ["serial", "cold", "warm"]}
+        for path in dirs.values():
+            path.mkdir()
+
+        timed(
+            "serial, one process per month",
+            lambda: [
+                squeeze(dirs["serial"], "--range", f"{start:%Y%m%d}-{end:%Y%m%d}")
+                for start, end in months(since, until)
+            ],
+        )
+        timed(
+            f"monthly, {args.workers} workers, recomputed store",
+            lambda: squeeze(dirs["cold"], *monthly, "--refresh"),
+        )
+        timed(
+            f"monthly, {args.workers} workers, stored months",
+            lambda: squeeze(dirs["warm"], *monthly),
+        )
+
+        names = sorted(path.name for path in dirs["serial"].iterdir())
+        different = [
+            (name, other)
+            for name in names
+            for other in ["cold", "warm"]
+            if rows(dirs["serial"] / name) != rows(dirs[other] / name)
+        ]
+        for name, other in different:
+            print(f"{name} differs ({other})")
+        print(f"{len(names)} months compared, {len(different)} differences")
+
+
+if __name__ == "__main__":
+    main()
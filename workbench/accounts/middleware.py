@@ -1,15 +1,84 @@
+import re
+
 from django.conf import settings
 from django.contrib import messages
-from django.db import connections
+from django.db import connections, transaction
 from django.http import HttpResponseRedirect
 from django.urls import reverse
 from django.utils.translation import activate, gettext as _
 
 
+#: Statements writing rows, the only statements audit triggers fire for
+DML = re.compile(r"^\s*(?:INSERT|UPDATE|DELETE|MERGE|TRUNCATE)\b", re.IGNORECASE)
+
+
+class AuditUserName:
+    """
+    Execute wrapper attributing writes to a user in the audit log
+
+    The audit trigger reads ``application_name``. Instead of setting it on
+    every request the name is set with ``set_config(..., true)`` (which is
+    ``SET LOCAL``) right before the first write of a transaction, so
+    read-only requests need no additional query and no setting survives the
+    transaction on persistent or pooled connections. Views run in one
+    transaction per request (``ATOMIC_REQUESTS``), so the name is set at
+    most once per request. Writes in autocommit mode, e.g. in management
+    commands, are wrapped in a transaction for the setting to take effect.
+
+    A no-op ``on_commit`` callback marks transactions where the name has
+    already been set. Django discards it when the transaction or the
+    savepoint it was registered in is rolled back, exactly like PostgreSQL
+    reverts the setting.
+    """
+
+    def __init__(self):
+        self.name = None
+        self.applied = (None, None)
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.name is None or not DML.match(sql):
+            return execute(sql, params, many, context)
+
+        connection = context["connection"]
+        if connection.in_atomic_block:
+            self.apply(connection)
+            return execute(sql, params, many, context)
+        with transaction.atomic(using=connection.alias):
+            self.apply(connection)
+            return execute(sql, params, many, context)
+
+    def apply(self, connection):
+        name, marker = self.applied
+        if name == self.name and any(
+            marker in callback for callback in connection.run_on_commit
+        ):
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('application_name', %s, true)", [self.name]
+            )
+
+        def marker():
+            pass
+
+        self.applied = (self.name, marker)
+        transaction.on_commit(marker, using=connection.alias)
+
+
 def set_user_name(username):
-    connections["default"].cursor().execute(
-        "SET SESSION application_name TO %s", [username]
-    )
+    """
+    Attribute writes on the current thread's connection to ``username``
+    """
+    connection = connections["default"]
+    for wrapper in connection.execute_wrappers:
+        if isinstance(wrapper, AuditUserName):
+            break
+    else:
+        wrapper = AuditUserName()
+        # Outermost, and not removed by the execute_wrapper() context manager
+        connection.execute_wrappers.insert(0, wrapper)
+    wrapper.name = username
 
 
 def user_middleware(get_response):
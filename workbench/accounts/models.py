@@ -109,6 +109,20 @@ class UserManager(BaseUserManager):
         return self.filter(is_active=True)
 
 
+def take_a_break_message(*, hours, break_seconds):
+    msg = _(
+        "You should take (and log!) a break of at least %(minutes)s minutes"
+        " when working more than %(hours)s hours."
+    )
+    if hours >= 9 and break_seconds < 3600:
+        return msg % {"minutes": 60, "hours": 9}
+    if hours >= 7 and break_seconds < 1800:
+        return msg % {"minutes": 30, "hours": 7}
+    if hours >= 5.5 and break_seconds < 900:
+        return msg % {"minutes": 15, "hours": 5.5}
+    return None
+
+
 @model_urls
 @total_ordering
 class User(Model, AbstractBaseUser):
@@ -348,29 +362,16 @@ select max(created_at) from sq
             ),
             Z1,
         )
-        msg = _(
-            "You should take (and log!) a break of at least %(minutes)s minutes"
-            " when working more than %(hours)s hours."
-        )
-
-        if hours + add >= 9 and break_seconds < 3600:
-            msg = msg % {"minutes": 60, "hours": 9}
-        elif hours + add >= 7 and break_seconds < 1800:
-            msg = msg % {"minutes": 30, "hours": 7}
-        elif hours + add >= 5.5 and break_seconds < 900:
-            msg = msg % {"minutes": 15, "hours": 5.5}
-        else:
-            msg = None
-
+        msg = take_a_break_message(hours=hours + add, break_seconds=break_seconds)
         if msg and request:
             messages.warning(request, msg)
         return msg
 
-    def unlogged_timestamps_warning(self, *, request):
+    def unlogged_timestamps_warning(self, *, request=None):
         m = monday()
         t = dt.date.today()
         if m == t:
-            return
+            return None
 
         unlogged = self.timestamp_set.filter(
             Q(
@@ -382,13 +383,14 @@ select max(created_at) from sq
             & Q(logged_hours__isnull=True, logged_break__isnull=True)
         ).count()
 
-        if unlogged > 2 * (1 + (t - m).days):  # about two per day
-            messages.warning(
-                request,
-                _(
-                    "You have {} unlogged timestamps from this week only. You should probably go and check them."
-                ).format(unlogged),
-            )
+        if unlogged <= 2 * (1 + (t - m).days):  # about two per day
+            return None
+        msg = _(
+            "You have {} unlogged timestamps from this week only. You should probably go and check them."
+        ).format(unlogged)
+        if request:
+            messages.warning(request, msg)
+        return msg
 
 
 @model_urls
@@ -1,13 +1,17 @@
 import datetime as dt
 
-from django.test import RequestFactory, TestCase
-from django.test.utils import override_settings
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
+from django.utils.translation import deactivate
 
 from workbench import factories
 from workbench.accounts.features import FEATURES, F
 from workbench.accounts.forms import TeamForm, TeamSearchForm
+from workbench.accounts.middleware import set_user_name
 from workbench.accounts.models import UnknownFeature, User
+from workbench.audit.models import LoggedAction
 from workbench.projects.models import Project
 from workbench.tools.testing import messages
 
@@ -243,3 +247,101 @@ class AccountsTest(TestCase):
 
         user.refresh_from_db()
         self.assertEqual(user._features, [FEATURES.BOOKKEEPING])
+
+    def test_audit_user_name(self):
+        """Writes are attributed to users without a query per request"""
+        self.addCleanup(deactivate)
+        user = factories.UserFactory.create()
+        self.client.force_login(user)
+
+        def set_config_queries(context):
+            return [q for q in context.captured_queries if "set_config" in q["sql"]]
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get("/accounts/update/")
+        self.assertEqual(set_config_queries(context), [])
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                "/accounts/update/",
+                {
+                    "_full_name": "Full Name",
+                    "_short_name": "FN",
+                    "language": "en",
+                    "planning_hours_per_day": 6,
+                },
+            )
+        self.assertEqual(len(set_config_queries(context)), 1)
+        self.assertRedirects(response, "/")
+
+        action = LoggedAction.objects.filter(
+            table_name="accounts_user", row_id=user.pk
+        ).last()
+        self.assertEqual(action.action, "U")
+        self.assertEqual(action.user_name, f"user-{user.pk}-{user.get_short_name()}")
+
+        # The name is set again after rolling back the savepoint it was set in
+        set_user_name("Fairy tasks")
+        with transaction.atomic():
+            factories.TeamFactory.create()
+            transaction.set_rollback(True)
+        team = factories.TeamFactory.create()
+        team.name = "Renamed"
+        team.save()
+        self.assertEqual(
+            list(
+                LoggedAction.objects.filter(
+                    table_name="accounts_team", row_id=team.pk
+                ).values_list("action", "user_name")
+            ),
+            [("I", "Fairy tasks"), ("U", "Fairy tasks")],
+        )
+
+
+class AuditUserNameTest(TransactionTestCase):
+    def test_autocommit(self):
+        """Writes outside transactions are attributed without leaking the name"""
+        self.addCleanup(deactivate)
+        self.addCleanup(set_user_name, None)
+        user = factories.UserFactory.create()
+        name = f"user-{user.pk}-{user.get_short_name()}"
+        self.client.force_login(user)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                "/accounts/update/",
+                {
+                    "_full_name": "Full Name",
+                    "_short_name": "FN",
+                    "language": "en",
+                    "planning_hours_per_day": 6,
+                },
+            )
+        # Once per request transaction
+        self.assertEqual(
+            len([q for q in context.captured_queries if "set_config" in q["sql"]]), 1
+        )
+        self.assertRedirects(response, "/")
+
+        set_user_name("Fairy tasks")
+        self.assertFalse(connection.in_atomic_block)
+        team = factories.TeamFactory.create()
+        team.name = "Renamed"
+        team.save()
+        self.assertEqual(
+            list(
+                LoggedAction.objects.filter(
+                    table_name="accounts_team", row_id=team.pk
+                ).values_list("action", "user_name")
+            ),
+            [("I", "Fairy tasks"), ("U", "Fairy tasks")],
+        )
+        self.assertEqual(
+            LoggedAction.objects.filter(table_name="accounts_user", row_id=user.pk)
+            .values_list("user_name", flat=True)
+            .last(),
+            name,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT current_setting('application_name')")
+            self.assertNotEqual(cursor.fetchone()[0], "Fairy tasks")
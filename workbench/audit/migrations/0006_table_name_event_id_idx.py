@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("audit", "0005_auto_20210206_1042"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS logged_actions_table_name_event_id_idx"
+            " ON audit_logged_actions(table_name, event_id);",
+            "DROP INDEX IF EXISTS logged_actions_table_name_event_id_idx;",
+        ),
+    ]
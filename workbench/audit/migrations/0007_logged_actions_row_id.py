@@ -0,0 +1,51 @@
+import os
+
+from django.conf import settings
+from django.db import migrations
+
+
+with open(
+    os.path.join(settings.BASE_DIR, "workbench", "tools", "audit.sql"), encoding="utf-8"
+) as f:
+    AUDIT_SQL = f.read()
+
+
+BATCH_SIZE = 100000
+
+
+def backfill_row_id(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT coalesce(max(event_id), 0) FROM audit_logged_actions")
+        (max_event_id,) = cursor.fetchone()
+        for start in range(0, max_event_id + 1, BATCH_SIZE):
+            cursor.execute(
+                """
+UPDATE audit_logged_actions
+SET row_id=(row_data -> 'id')::bigint
+WHERE event_id >= %s AND event_id < %s AND row_id IS NULL AND row_data ? 'id'
+                """,
+                [start, start + BATCH_SIZE],
+            )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("audit", "0006_table_name_event_id_idx"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "ALTER TABLE audit_logged_actions ADD COLUMN IF NOT EXISTS row_id bigint;",
+            "",
+        ),
+        # Replaces audit_if_modified_func so that new entries get their row_id
+        migrations.RunSQL(AUDIT_SQL, ""),
+        migrations.RunPython(backfill_row_id, migrations.RunPython.noop),
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS logged_actions_table_name_row_id_idx"
+            " ON audit_logged_actions(table_name, row_id, event_id);",
+            "DROP INDEX IF EXISTS logged_actions_table_name_row_id_idx;",
+        ),
+    ]
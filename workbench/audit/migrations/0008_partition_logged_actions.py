@@ -0,0 +1,220 @@
+import os
+
+from django.conf import settings
+from django.db import migrations, transaction
+
+
+with open(
+    os.path.join(settings.BASE_DIR, "workbench", "tools", "audit.sql"), encoding="utf-8"
+) as f:
+    AUDIT_SQL = f.read()
+
+
+BATCH_SIZE = 100000
+
+#: Retention classes at the time of partitioning, see workbench.audit.partitions
+RETENTION = {
+    "2y": [
+        "accounts_specialistfield",
+        "accounts_team",
+        "logbook_break",
+        "logbook_loggedcost",
+        "logbook_loggedhours",
+    ],
+    "3y": [
+        "awt_absence",
+        "invoices_projectedinvoice",
+        "deals_value",
+        "deals_deal",
+        "deals_contribution",
+        "planning_milestone",
+        "planning_publicholiday",
+        "planning_plannedwork",
+    ],
+    "5y": [
+        "contacts_organization",
+        "contacts_person",
+        "contacts_phonenumber",
+        "contacts_emailaddress",
+        "contacts_postaladdress",
+        "projects_service",
+        "projects_project",
+        "offers_offer",
+        "invoices_recurringinvoice",
+        "invoices_invoice",
+    ],
+}
+
+FUNCTIONS = """\
+CREATE OR REPLACE FUNCTION audit_create_partitions(from_date date, until_date date)
+RETURNS void AS $$
+DECLARE
+  parent text;
+  month date;
+  lo text;
+  hi text;
+  partition text;
+BEGIN
+  FOR parent IN
+    SELECT c.relname
+    FROM pg_inherits i JOIN pg_class c ON c.oid=i.inhrelid
+    WHERE i.inhparent='audit_logged_actions'::regclass
+  LOOP
+    month := date_trunc('month', from_date);
+    WHILE month <= until_date LOOP
+      partition := parent || '_' || to_char(month, 'YYYYMM');
+      lo := month || ' 00:00:00+00';
+      hi := (month + interval '1 month')::date || ' 00:00:00+00';
+      IF to_regclass(partition) IS NULL THEN
+        EXECUTE format(
+          'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+          partition, parent
+        );
+        EXECUTE format(
+          'WITH moved AS ('
+          '  DELETE FROM %I WHERE created_at >= %L AND created_at < %L RETURNING *'
+          ') INSERT INTO %I SELECT * FROM moved',
+          parent || '_default', lo, hi, partition
+        );
+        EXECUTE format(
+          'ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+          parent, partition, lo, hi
+        );
+      END IF;
+      month := month + interval '1 month';
+    END LOOP;
+  END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def _class_partitions():
+    sql = []
+    for name, tables in RETENTION.items():
+        values = ", ".join(f"'{table}'" for table in tables)
+        sql.append(
+            f"CREATE TABLE audit_logged_actions_{name} PARTITION OF audit_logged_actions"
+            f" FOR VALUES IN ({values}) PARTITION BY RANGE (created_at);"
+        )
+        sql.append(
+            f"CREATE TABLE audit_logged_actions_{name}_default"
+            f" PARTITION OF audit_logged_actions_{name} DEFAULT;"
+        )
+    sql.append(
+        "CREATE TABLE audit_logged_actions_keep PARTITION OF audit_logged_actions"
+        " DEFAULT PARTITION BY RANGE (created_at);"
+    )
+    sql.append(
+        "CREATE TABLE audit_logged_actions_keep_default"
+        " PARTITION OF audit_logged_actions_keep DEFAULT;"
+    )
+    return "\n".join(sql)
+
+
+# The primary key of the unpartitioned table is kept for copying in batches
+SWAP = f"""\
+ALTER TABLE audit_logged_actions RENAME TO audit_logged_actions_unpartitioned;
+DROP INDEX IF EXISTS
+  logged_actions_event_id_idx,
+  logged_actions_relid_idx,
+  logged_actions_action_tstamp_tx_stm_idx,
+  logged_actions_action_idx,
+  logged_actions_table_name_event_id_idx,
+  logged_actions_table_name_row_id_idx;
+
+CREATE TABLE audit_logged_actions (
+    event_id bigint not null default nextval('audit_logged_actions_event_id_seq'),
+    table_name text not null,
+    user_name text,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    action TEXT NOT NULL CHECK (action IN ('I','D','U', 'T')),
+    row_data hstore,
+    changed_fields hstore,
+    row_id bigint
+) PARTITION BY LIST (table_name);
+
+{_class_partitions()}
+
+CREATE INDEX logged_actions_event_id_idx ON audit_logged_actions(event_id);
+CREATE INDEX logged_actions_relid_idx ON audit_logged_actions(table_name);
+CREATE INDEX logged_actions_action_tstamp_tx_stm_idx ON audit_logged_actions(created_at);
+CREATE INDEX logged_actions_action_idx ON audit_logged_actions(action);
+CREATE INDEX logged_actions_table_name_event_id_idx
+  ON audit_logged_actions(table_name, event_id);
+CREATE INDEX logged_actions_table_name_row_id_idx
+  ON audit_logged_actions(table_name, row_id, event_id);
+
+ALTER SEQUENCE audit_logged_actions_event_id_seq OWNED BY audit_logged_actions.event_id;
+"""
+
+
+def is_partitioned(cursor):
+    cursor.execute(
+        "SELECT relkind FROM pg_class WHERE oid='audit_logged_actions'::regclass"
+    )
+    return cursor.fetchone()[0] == "p"
+
+
+def partition(apps, schema_editor):
+    """
+    Swap in the partitioned table and move the entries in batches
+
+    Only the swap runs in a transaction. New entries go to the partitioned
+    table right away; existing entries are moved in batches of event IDs,
+    each in its own transaction, so that the audit log is not locked while
+    it is copied. Every batch deletes the entries it moved, therefore an
+    interrupted migration can be resumed.
+    """
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            with transaction.atomic(using=connection.alias):
+                cursor.execute(FUNCTIONS)
+                cursor.execute("SELECT min(created_at) FROM audit_logged_actions")
+                (first,) = cursor.fetchone()
+                cursor.execute(SWAP)
+                cursor.execute(
+                    "SELECT audit_create_partitions("
+                    " coalesce(%s::date, current_date), current_date + 92)",
+                    [first],
+                )
+                # Recompile the trigger function against the partitioned table
+                cursor.execute(AUDIT_SQL)
+
+        cursor.execute("SELECT to_regclass('audit_logged_actions_unpartitioned')")
+        if cursor.fetchone()[0] is None:
+            return
+
+        cursor.execute(
+            "SELECT min(event_id), max(event_id)"
+            " FROM audit_logged_actions_unpartitioned"
+        )
+        min_event_id, max_event_id = cursor.fetchone()
+        if min_event_id is not None:
+            for start in range(min_event_id, max_event_id + 1, BATCH_SIZE):
+                cursor.execute(
+                    """
+WITH moved AS (
+    DELETE FROM audit_logged_actions_unpartitioned
+    WHERE event_id >= %s AND event_id < %s
+    RETURNING *
+)
+INSERT INTO audit_logged_actions SELECT * FROM moved
+                    """,
+                    [start, start + BATCH_SIZE],
+                )
+
+        cursor.execute("DROP TABLE audit_logged_actions_unpartitioned")
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("audit", "0007_logged_actions_row_id"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition),
+    ]
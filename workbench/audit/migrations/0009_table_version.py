@@ -0,0 +1,79 @@
+# Generated by Django 5.0.6 on 2026-10-17 09:06
+
+from django.db import migrations, models
+
+
+#: Tables whose writes bump their ``audit_tableversion`` row
+TABLES = [
+    "accounts_user",
+    "contacts_person",
+    "deals_contribution",
+    "deals_deal",
+    "invoices_invoice",
+    "invoices_recurringinvoice",
+    "logbook_loggedhours",
+    "offers_offer",
+    "planning_plannedwork",
+    "projects_project",
+    "projects_service",
+]
+
+TRIGGERS = """\
+CREATE SEQUENCE IF NOT EXISTS audit_tableversion_seq;
+
+CREATE OR REPLACE FUNCTION audit_tableversion_bump() RETURNS trigger AS $$
+begin
+  INSERT INTO audit_tableversion (table_name, version)
+  VALUES (TG_TABLE_NAME, nextval('audit_tableversion_seq'))
+  ON CONFLICT (table_name) DO UPDATE SET version=EXCLUDED.version;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+""" + "\n".join(
+    f"CREATE TRIGGER {table}_version"
+    f" AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}"
+    " FOR EACH STATEMENT EXECUTE PROCEDURE audit_tableversion_bump();"
+    for table in TABLES
+)
+
+DROP_TRIGGERS = "\n".join(
+    [f"DROP TRIGGER IF EXISTS {table}_version ON {table};" for table in TABLES]
+    + [
+        "DROP FUNCTION IF EXISTS audit_tableversion_bump();",
+        "DROP SEQUENCE IF EXISTS audit_tableversion_seq;",
+    ]
+)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0023_user_pinned_projects"),
+        ("audit", "0008_partition_logged_actions"),
+        ("contacts", "0013_organization_is_archived"),
+        ("deals", "0007_attributegroup_show_on_overview"),
+        ("invoices", "0027_invoice_archived_at"),
+        ("logbook", "0020_auto_20200511_1419"),
+        ("offers", "0014_alter_offer_tax_rate"),
+        ("planning", "0018_calendar_day"),
+        ("projects", "0030_project_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TableVersion",
+            fields=[
+                (
+                    "table_name",
+                    models.TextField(
+                        primary_key=True, serialize=False, verbose_name="table name"
+                    ),
+                ),
+                ("version", models.BigIntegerField(verbose_name="version")),
+            ],
+            options={
+                "verbose_name": "table version",
+                "verbose_name_plural": "table versions",
+            },
+        ),
+        migrations.RunSQL(TRIGGERS, DROP_TRIGGERS),
+    ]
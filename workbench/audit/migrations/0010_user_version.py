@@ -0,0 +1,182 @@
+# Generated by Django 5.0.6 on 2026-10-17 09:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+#: Users whose start page is affected by rows of a table, ``{rows}`` is
+#: the transition table
+USERS = {
+    "deals_contribution": "SELECT user_id FROM {rows}",
+    "deals_deal": """
+      SELECT owned_by_id FROM {rows}
+      UNION SELECT c.user_id FROM deals_contribution c JOIN {rows} r ON c.deal_id=r.id
+    """,
+    "invoices_invoice": "SELECT owned_by_id FROM {rows}",
+    "invoices_recurringinvoice": "SELECT owned_by_id FROM {rows}",
+    "logbook_loggedhours": """
+      SELECT p.owned_by_id FROM {rows} r
+      JOIN projects_service s ON s.id=r.service_id
+      JOIN projects_project p ON p.id=s.project_id
+    """,
+    "offers_offer": "SELECT owned_by_id FROM {rows}",
+    "planning_plannedwork": """
+      SELECT user_id FROM {rows}
+      UNION SELECT created_by_id FROM {rows}
+      UNION SELECT p.owned_by_id FROM projects_project p JOIN {rows} r ON p.id=r.project_id
+    """,
+    "projects_project": """
+      SELECT owned_by_id FROM {rows}
+      UNION SELECT o.owned_by_id FROM offers_offer o JOIN {rows} r ON o.project_id=r.id
+      UNION SELECT i.owned_by_id FROM invoices_invoice i JOIN {rows} r ON i.project_id=r.id
+      UNION SELECT pw.user_id FROM planning_plannedwork pw JOIN {rows} r ON pw.project_id=r.id
+      UNION SELECT pw.created_by_id
+      FROM planning_plannedwork pw JOIN {rows} r ON pw.project_id=r.id
+    """,
+}
+
+#: Table version triggers replaced by user versions
+TABLE_VERSIONS = [
+    "accounts_user",
+    "deals_contribution",
+    "deals_deal",
+    "invoices_recurringinvoice",
+    "logbook_loggedhours",
+    "planning_plannedwork",
+]
+
+REFERENCING = {
+    "INSERT": "NEW TABLE AS new_rows",
+    "UPDATE": "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "DELETE": "OLD TABLE AS old_rows",
+}
+
+TRIGGERS = (
+    """\
+CREATE SEQUENCE IF NOT EXISTS audit_userversion_seq;
+
+-- Objects of inactive users are shown to everyone
+CREATE OR REPLACE FUNCTION audit_userversion_bump(user_ids integer[])
+RETURNS void AS $$
+  INSERT INTO audit_userversion (user_id, version)
+  SELECT user_id, nextval('audit_userversion_seq')
+  FROM (
+    SELECT unnest(user_ids) AS user_id
+    UNION
+    SELECT id FROM accounts_user WHERE EXISTS (
+      SELECT 1 FROM accounts_user WHERE id=ANY(user_ids) AND NOT is_active
+    )
+    ORDER BY 1
+  ) u
+  WHERE user_id IS NOT NULL
+  ON CONFLICT (user_id) DO UPDATE SET version=EXCLUDED.version;
+$$ LANGUAGE sql;
+
+-- Logins only update last_login and do not bump anything
+CREATE OR REPLACE FUNCTION audit_userversion_accounts_user() RETURNS trigger AS $$
+begin
+  IF TG_OP = 'UPDATE' THEN
+    IF NOT EXISTS (
+      SELECT 1 FROM old_rows o JOIN new_rows n ON o.id=n.id
+      WHERE o.is_active IS DISTINCT FROM n.is_active
+      OR o.person_id IS DISTINCT FROM n.person_id
+    ) THEN
+      RETURN NULL;
+    END IF;
+  END IF;
+  PERFORM audit_userversion_bump(ARRAY(SELECT id FROM accounts_user));
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+"""
+    + "\n".join(
+        f"""
+CREATE OR REPLACE FUNCTION audit_userversion_{table}() RETURNS trigger AS $$
+begin
+  IF TG_OP = 'INSERT' THEN
+    PERFORM audit_userversion_bump(ARRAY({users.format(rows="new_rows")}));
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM audit_userversion_bump(ARRAY({users.format(rows="old_rows")}));
+  ELSE
+    PERFORM audit_userversion_bump(ARRAY(
+      {users.format(rows="old_rows")}
+      UNION
+      {users.format(rows="new_rows")}
+    ));
+  END IF;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+"""
+        for table, users in USERS.items()
+    )
+    + "\n".join(
+        f"CREATE TRIGGER {table}_userversion_{op.lower()} AFTER {op} ON {table}"
+        f" REFERENCING {REFERENCING[op]}"
+        f" FOR EACH STATEMENT EXECUTE PROCEDURE audit_userversion_{table}();"
+        for table in [*USERS, "accounts_user"]
+        for op in REFERENCING
+    )
+)
+
+DROP_TRIGGERS = "\n".join(
+    [
+        f"DROP TRIGGER IF EXISTS {table}_userversion_{op.lower()} ON {table};"
+        for table in [*USERS, "accounts_user"]
+        for op in REFERENCING
+    ]
+    + [
+        f"DROP FUNCTION IF EXISTS audit_userversion_{table}();"
+        for table in [*USERS, "accounts_user"]
+    ]
+    + [
+        "DROP FUNCTION IF EXISTS audit_userversion_bump(integer[]);",
+        "DROP SEQUENCE IF EXISTS audit_userversion_seq;",
+    ]
+)
+
+DROP_TABLE_VERSIONS = "\n".join(
+    f"DROP TRIGGER IF EXISTS {table}_version ON {table};" for table in TABLE_VERSIONS
+)
+
+CREATE_TABLE_VERSIONS = "\n".join(
+    f"CREATE TRIGGER {table}_version"
+    f" AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}"
+    " FOR EACH STATEMENT EXECUTE PROCEDURE audit_tableversion_bump();"
+    for table in TABLE_VERSIONS
+)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0023_user_pinned_projects"),
+        ("audit", "0009_table_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserVersion",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="user",
+                    ),
+                ),
+                ("version", models.BigIntegerField(verbose_name="version")),
+            ],
+            options={
+                "verbose_name": "user version",
+                "verbose_name_plural": "user versions",
+            },
+        ),
+        migrations.RunSQL(TRIGGERS, DROP_TRIGGERS),
+        migrations.RunSQL(DROP_TABLE_VERSIONS, CREATE_TABLE_VERSIONS),
+    ]
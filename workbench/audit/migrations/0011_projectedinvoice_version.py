@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("audit", "0010_user_version"),
+        ("invoices", "0027_invoice_archived_at"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE TRIGGER invoices_projectedinvoice_version"
+            " AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON invoices_projectedinvoice"
+            " FOR EACH STATEMENT EXECUTE PROCEDURE audit_tableversion_bump();",
+            "DROP TRIGGER IF EXISTS invoices_projectedinvoice_version"
+            " ON invoices_projectedinvoice;",
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+#: Autocompleted tables without a table version trigger yet
+TABLES = ["contacts_organization", "projects_campaign"]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("audit", "0011_projectedinvoice_version"),
+        ("contacts", "0013_organization_is_archived"),
+        ("projects", "0030_project_version"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "\n".join(
+                f"CREATE TRIGGER {table}_version"
+                f" AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}"
+                " FOR EACH STATEMENT EXECUTE PROCEDURE audit_tableversion_bump();"
+                for table in TABLES
+            ),
+            "\n".join(
+                f"DROP TRIGGER IF EXISTS {table}_version ON {table};"
+                for table in TABLES
+            ),
+        ),
+    ]
@@ -1,11 +1,14 @@
 import re
 
+from django.conf import settings
 from django.contrib.postgres.fields import HStoreField
 from django.db import models
 from django.db.models import Q
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
+from workbench.tools.reporting import query
+
 
 class LoggedActionQuerySet(models.QuerySet):
     def for_model(self, model):
@@ -14,6 +17,10 @@ class LoggedActionQuerySet(models.QuerySet):
     def with_data(self, **kwargs):
         queryset = self
         for key, value in kwargs.items():
+            if key == "id":
+                # Extracted by the trigger and indexed together with table_name
+                queryset = queryset.filter(row_id=value)
+                continue
             queryset = queryset.filter(
                 Q(**{"row_data__%s" % key: value})
                 | Q(**{"changed_fields__%s" % key: value})
@@ -21,6 +28,16 @@ class LoggedActionQuerySet(models.QuerySet):
         return queryset
 
 
+def table_version(table_name):
+    """
+    Return the version of the table, see ``TableVersion``
+    """
+    rows = query(
+        "select version from audit_tableversion where table_name=%s", [table_name]
+    )
+    return rows[0][0] if rows else 0
+
+
 def audit_user_id(user_name):
     match = re.search(r"^user-([0-9]+)-", user_name)
     return int(match.groups()[0]) if match else None
@@ -41,6 +58,7 @@ class LoggedAction(models.Model):
     action = models.CharField(max_length=1, choices=ACTION_TYPES)
     row_data = HStoreField(null=True)
     changed_fields = HStoreField(null=True)
+    row_id = models.BigIntegerField(null=True)
 
     objects = LoggedActionQuerySet.as_manager()
 
@@ -63,3 +81,48 @@ class LoggedAction(models.Model):
         if self.changed_fields:
             return self.row_data | self.changed_fields
         return self.row_data
+
+
+class TableVersion(models.Model):
+    """
+    Version of a table, maintained by database triggers
+
+    Used in cache keys of start page fragments (see ``workbench.dashboard``),
+    project budget statistics and autocomplete results. Only tables with a
+    ``{table}_version`` trigger have a version.
+    """
+
+    table_name = models.TextField(_("table name"), primary_key=True)
+    version = models.BigIntegerField(_("version"))
+
+    class Meta:
+        verbose_name = _("table version")
+        verbose_name_plural = _("table versions")
+
+    def __str__(self):
+        return f"{self.table_name}: {self.version}"
+
+
+class UserVersion(models.Model):
+    """
+    Version of the start page data of a user, maintained by database triggers
+
+    See ``workbench.dashboard``.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        primary_key=True,
+        verbose_name=_("user"),
+        related_name="+",
+    )
+    version = models.BigIntegerField(_("version"))
+
+    class Meta:
+        verbose_name = _("user version")
+        verbose_name_plural = _("user versions")
+
+    def __str__(self):
+        return f"{self.user_id}: {self.version}"
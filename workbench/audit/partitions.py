@@ -0,0 +1,121 @@
+"""
+Partitioned audit log
+
+``audit_logged_actions`` is partitioned by table name into retention classes
+and each retention class is partitioned by month of ``created_at``. Expired
+entries are pruned by detaching and dropping whole month partitions instead
+of deleting rows. Tables without a retention class are kept forever.
+
+Month partitions are created ahead of time by the fairy tasks. Entries
+without a matching month partition end up in the default partition of their
+retention class and are moved when the month partition is created.
+
+The audit log has been partitioned by the ``audit`` migration
+``0008_partition_logged_actions`` which also creates the
+``audit_create_partitions`` database function. Changing the tables of a
+retention class requires repartitioning.
+"""
+
+import datetime as dt
+import re
+
+from django.db import connections
+
+from workbench.tools.reporting import query
+
+
+RETENTION = {
+    "2y": (
+        2 * 366,
+        [
+            "accounts_specialistfield",
+            "accounts_team",
+            "logbook_break",
+            "logbook_loggedcost",
+            "logbook_loggedhours",
+        ],
+    ),
+    "3y": (
+        3 * 366,
+        [
+            "awt_absence",
+            "invoices_projectedinvoice",
+            "deals_value",
+            "deals_deal",
+            "deals_contribution",
+            "planning_milestone",
+            "planning_publicholiday",
+            "planning_plannedwork",
+        ],
+    ),
+    "5y": (
+        5 * 366,
+        [
+            "contacts_organization",
+            "contacts_person",
+            "contacts_phonenumber",
+            "contacts_emailaddress",
+            "contacts_postaladdress",
+            "projects_service",
+            "projects_project",
+            "offers_offer",
+            "invoices_recurringinvoice",
+            "invoices_invoice",
+        ],
+    ),
+}
+
+
+def create_partitions(from_date, until_date):
+    """
+    Create month partitions for all retention classes
+    """
+    with connections["default"].cursor() as cursor:
+        cursor.execute(
+            "SELECT audit_create_partitions(%s, %s)", [from_date, until_date]
+        )
+
+
+def month_partitions(name):
+    """
+    Return a list of ``(partition, first day of month)`` tuples
+    """
+    partitions = []
+    for (partition,) in query(
+        """
+select c.relname
+from pg_inherits i
+join pg_class c on c.oid=i.inhrelid
+where i.inhparent=%s::regclass
+order by c.relname
+        """,
+        [f"audit_logged_actions_{name}"],
+    ):
+        if match := re.search(r"_([0-9]{4})([0-9]{2})$", partition):
+            partitions.append((partition, dt.date(int(match[1]), int(match[2]), 1)))
+    return partitions
+
+
+def drop_partitions(name, cutoff_date):
+    """
+    Drop all month partitions of the retention class ending before the cutoff
+    date and delete expired entries from its default partition
+    """
+    dropped = []
+    with connections["default"].cursor() as cursor:
+        for partition, month in month_partitions(name):
+            end = (month + dt.timedelta(days=31)).replace(day=1)
+            if end > cutoff_date:
+                continue
+            cursor.execute(
+                f'ALTER TABLE "audit_logged_actions_{name}"'
+                f' DETACH PARTITION "{partition}"'
+            )
+            cursor.execute(f'DROP TABLE "{partition}"')
+            dropped.append(partition)
+
+        cursor.execute(
+            f'DELETE FROM "audit_logged_actions_{name}_default" WHERE created_at < %s',
+            [cutoff_date],
+        )
+    return dropped
@@ -1,45 +1,11 @@
-from workbench.audit.models import LoggedAction
+from workbench.audit.partitions import RETENTION, create_partitions, drop_partitions
 from workbench.tools.validation import in_days
 
 
-def prune_audit():
-    LoggedAction.objects.filter(
-        table_name__in=[
-            "accounts_specialistfield",
-            "accounts_team",
-            "logbook_break",
-            "logbook_loggedcost",
-            "logbook_loggedhours",
-        ],
-        created_at__lt=in_days(-2 * 366),
-    ).delete()
+def create_audit_partitions():
+    create_partitions(in_days(0), in_days(92))
 
-    LoggedAction.objects.filter(
-        table_name__in=[
-            "awt_absence",
-            "invoices_projectedinvoice",
-            "deals_value",
-            "deals_deal",
-            "deals_contribution",
-            "planning_milestone",
-            "planning_publicholiday",
-            "planning_plannedwork",
-        ],
-        created_at__lt=in_days(-3 * 366),
-    ).delete()
 
-    LoggedAction.objects.filter(
-        table_name__in=[
-            "contacts_organization",
-            "contacts_person",
-            "contacts_phonenumber",
-            "contacts_emailaddress",
-            "contacts_postaladdress",
-            "projects_service",
-            "projects_project",
-            "offers_offer",
-            "invoices_recurringinvoice",
-            "invoices_invoice",
-        ],
-        created_at__lt=in_days(-5 * 366),
-    ).delete()
+def prune_audit():
+    for name, (days, _tables) in RETENTION.items():
+        drop_partitions(name, in_days(-days))
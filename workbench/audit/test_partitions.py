@@ -0,0 +1,104 @@
+import datetime as dt
+
+from django.db import connections
+from django.test import TestCase
+
+from workbench import factories
+from workbench.audit.models import LoggedAction
+from workbench.audit.partitions import (
+    RETENTION,
+    create_partitions,
+    month_partitions,
+)
+from workbench.audit.tasks import create_audit_partitions, prune_audit
+from workbench.tools.reporting import query
+from workbench.tools.validation import in_days
+
+
+class PartitionsTest(TestCase):
+    def log(self, table_name, created_at):
+        with connections["default"].cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO audit_logged_actions"
+                " (table_name, created_at, action, row_data, row_id)"
+                " VALUES (%s, %s, 'I', hstore('id', '1'), 1)"
+                " RETURNING event_id",
+                [table_name, created_at],
+            )
+            return cursor.fetchone()[0]
+
+    def partition(self, event_id):
+        return query(
+            "SELECT tableoid::regclass::text FROM audit_logged_actions"
+            " WHERE event_id=%s",
+            [event_id],
+        )[0][0]
+
+    def test_routing(self):
+        """Audit trigger entries are routed to month partitions"""
+        create_audit_partitions()
+        hours = factories.LoggedHoursFactory.create()
+        action = LoggedAction.objects.for_model(hours).with_data(id=hours.id).get()
+        self.assertEqual(
+            self.partition(action.event_id),
+            f"audit_logged_actions_2y_{dt.date.today():%Y%m}",
+        )
+
+        user = factories.UserFactory.create()
+        action = LoggedAction.objects.for_model(user).with_data(id=user.id).get()
+        self.assertTrue(
+            self.partition(action.event_id).startswith("audit_logged_actions_keep_")
+        )
+
+    def test_retention_classes(self):
+        """Entries are routed to the partitions of their retention class"""
+        day = dt.date(2001, 2, 3)
+        for name, (_days, tables) in RETENTION.items():
+            for table in tables:
+                with self.subTest(table=table):
+                    self.assertEqual(
+                        self.partition(self.log(table, day)),
+                        f"audit_logged_actions_{name}_default",
+                    )
+        self.assertEqual(
+            self.partition(self.log("accounts_user", day)),
+            "audit_logged_actions_keep_default",
+        )
+
+    def test_default_partition(self):
+        """Entries without month partition are moved when it is created"""
+        day = dt.date(2001, 2, 3)
+        event_id = self.log("logbook_loggedhours", day)
+        self.assertEqual(self.partition(event_id), "audit_logged_actions_2y_default")
+
+        create_partitions(day, day)
+        self.assertEqual(self.partition(event_id), "audit_logged_actions_2y_200102")
+        self.assertIn(
+            ("audit_logged_actions_2y_200102", day.replace(day=1)),
+            (month_partitions("2y")),
+        )
+
+    def test_prune(self):
+        """Expired month partitions are dropped per retention class"""
+        three_years_ago = in_days(-3 * 366 - 31)
+        create_partitions(three_years_ago, three_years_ago)
+        hours = self.log("logbook_loggedhours", three_years_ago)
+        project = self.log("projects_project", three_years_ago)
+        user = self.log("accounts_user", three_years_ago)
+        old = self.log("logbook_loggedhours", dt.date(2001, 2, 3))
+        recent = self.log("logbook_loggedhours", in_days(-10))
+
+        prune_audit()
+
+        self.assertEqual(
+            set(
+                LoggedAction.objects.filter(
+                    event_id__in=[hours, project, user, old, recent]
+                ).values_list("event_id", flat=True)
+            ),
+            {project, user, recent},
+        )
+        self.assertNotIn(
+            f"audit_logged_actions_2y_{three_years_ago:%Y%m}",
+            {partition for partition, month in month_partitions("2y")},
+        )
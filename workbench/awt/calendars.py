@@ -0,0 +1,223 @@
+"""
+Employment calendars
+
+Employments are accumulated per user in arrays indexed by month: Full months
+are added to a difference array and summed up once, only the first and the
+last month of an employment need a partial month factor. The calendars only
+depend on employments and are memoized per process.
+
+Database triggers assign a new value of ``awt_calendar_version_seq`` to the
+single ``CalendarVersion`` row whenever employments are inserted, updated or
+deleted. Memoized calendars of older versions are discarded. The row is
+updated in the same transaction as the data, so other transactions never see
+a new version before the data it belongs to.
+"""
+
+import datetime as dt
+from collections import defaultdict
+from decimal import Decimal
+
+from workbench.awt.models import Employment
+from workbench.awt.utils import days_per_month
+from workbench.invoices.utils import next_valid_day
+from workbench.tools.formats import Z1
+from workbench.tools.reporting import query
+
+
+def month_index(day):
+    return 12 * day.year + day.month - 1
+
+
+def index_month(index):
+    return dt.date(index // 12, index % 12 + 1, 1)
+
+
+def _partial(days, index):
+    return Decimal(days) / days_per_month(index // 12)[index % 12]
+
+
+def monthly_sums(rows, *, first, last):
+    """
+    Return ``{key: {month index: sum}}`` of ``value * partial month factor``
+    for all ``(key, value, date_from, date_until)`` rows
+
+    Only months between the indices ``first`` and ``last`` covered by at
+    least one row are returned. Values should be exact decimals, full months
+    are summed up without rounding.
+    """
+    deltas = defaultdict(lambda: defaultdict(lambda: [Z1, 0]))
+    partials = defaultdict(lambda: defaultdict(lambda: Z1))
+    first_day = index_month(first)
+
+    for key, value, starts_on, date_until in rows:
+        date_from = max(starts_on, first_day)
+        start, end = month_index(date_from), month_index(date_until)
+        if start > last or end < start:
+            continue
+
+        if start == end:
+            partials[key][start] += value * _partial(
+                (date_until - date_from).days + 1, start
+            )
+        else:
+            partials[key][start] += value * _partial(
+                days_per_month(date_from.year)[date_from.month - 1] - date_from.day + 1,
+                start,
+            )
+            if end <= last:
+                partials[key][end] += value * _partial(date_until.day, end)
+            if start + 1 < min(end, last + 1):
+                deltas[key][start + 1][0] += value
+                deltas[key][min(end, last + 1)][0] -= value
+
+        # Count covering rows so that months with a zero sum are returned too
+        deltas[key][start][1] += 1
+        deltas[key][min(end, last) + 1][1] -= 1
+
+    sums = {}
+    for key, key_deltas in deltas.items():
+        value, count = Z1, 0
+        sums[key] = months = {}
+        for index in range(min(key_deltas), max(key_deltas)):
+            delta = key_deltas.get(index)
+            if delta:
+                value += delta[0]
+                count += delta[1]
+            if count:
+                months[index] = value + partials[key].get(index, Z1)
+    return sums
+
+
+def calendar_version():
+    rows = query("select version from awt_calendarversion where id=1", [])
+    return rows[0][0] if rows else 0
+
+
+_calendars = {}
+
+
+def _memoized(key, compute):
+    """
+    Return the memoized calendar or compute it
+
+    Calendars are returned as-is and must not be modified. Django's cache is
+    not used because unpickling the calendars takes longer than computing
+    them.
+    """
+    key = (calendar_version(), key)
+    if key not in _calendars:
+        if any(version != key[0] for version, _key in _calendars):
+            _calendars.clear()
+        _calendars[key] = compute()
+    return _calendars[key]
+
+
+def employment_calendar(*, until_year, since=None):
+    """
+    Return ``{user ID: {month: percentage}}`` of all employments up to the
+    end of ``until_year``, starting with the month of ``since`` if given
+    """
+
+    def compute():
+        employments = Employment.objects.order_by("date_from")
+        if since:
+            employments = employments.filter(date_until__gte=since)
+        sums = monthly_sums(
+            (
+                (row[0], Decimal(row[1]), row[2], row[3])
+                for row in employments.values_list(
+                    "user", "percentage", "date_from", "date_until"
+                )
+            ),
+            first=month_index(since or dt.date.min),
+            last=month_index(dt.date(until_year, 12, 1)),
+        )
+        return {
+            user_id: {index_month(index): value for index, value in months.items()}
+            for user_id, months in sums.items()
+        }
+
+    since = since.replace(day=1) if since else None
+    return _memoized(f"employments:{until_year}:{since}", compute)
+
+
+def absence_days(starts_on, ends_on, days):
+    """
+    Return ``(month, days)`` tuples distributing the days of an absence to
+    the months it covers proportionally to the calendar days
+    """
+    ends_on = ends_on or starts_on
+    if starts_on.month == ends_on.month:
+        return [(starts_on.month, days)]
+
+    total = Decimal((ends_on - starts_on).days + 1)
+    one_day = dt.timedelta(days=1)
+    calendar_days_per_month = [
+        (
+            m,
+            Decimal(
+                (
+                    # end of absence or last day of this month
+                    min(ends_on, next_valid_day(ends_on.year, m, 99) - one_day)
+                    # start of absence or first day of this month
+                    - max(starts_on, dt.date(starts_on.year, m, 1))
+                ).days
+                # Always off by one
+                + 1
+            ),
+        )
+        for m in range(starts_on.month, ends_on.month + 1)
+    ]
+    return [(m, days * d / total) for m, d in calendar_days_per_month]
+
+
+def year_calendar(year):
+    """
+    Return the employments of all users in the year
+
+    ``employments`` maps user IDs to lists of twelve monthly sums of the
+    percentage factor and of the vacation weeks multiplied by the percentage
+    factor.
+    """
+
+    def compute():
+        rows = Employment.objects.filter(
+            date_from__lte=dt.date(year, 12, 31),
+            date_until__gte=dt.date(year, 1, 1),
+        ).values_list("user", "percentage", "vacation_weeks", "date_from", "date_until")
+        first, last = (
+            month_index(dt.date(year, 1, 1)),
+            month_index(dt.date(year, 12, 1)),
+        )
+
+        employments = {}
+        for i, sums in enumerate([
+            monthly_sums(
+                (
+                    (user_id, Decimal(percentage) / 100, date_from, date_until)
+                    for user_id, percentage, _vw, date_from, date_until in rows
+                ),
+                first=first,
+                last=last,
+            ),
+            monthly_sums(
+                (
+                    (
+                        user_id,
+                        vacation_weeks * Decimal(percentage) / 100,
+                        date_from,
+                        date_until,
+                    )
+                    for user_id, percentage, vacation_weeks, date_from, date_until in rows
+                ),
+                first=first,
+                last=last,
+            ),
+        ]):
+            for user_id, months in sums.items():
+                user_sums = employments.setdefault(user_id, ([Z1] * 12, [Z1] * 12))
+                for index, value in months.items():
+                    user_sums[i][index - first] = value
+        return {"employments": employments}
+
+    return _memoized(f"year:{year}", compute)
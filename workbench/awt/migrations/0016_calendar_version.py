@@ -0,0 +1,50 @@
+from django.db import migrations
+
+
+TRIGGERS = """\
+CREATE SEQUENCE IF NOT EXISTS awt_calendar_version_seq;
+
+CREATE TABLE IF NOT EXISTS awt_calendar_version (
+  id integer PRIMARY KEY,
+  version bigint NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION awt_calendar_version_bump() RETURNS trigger AS $$
+begin
+  INSERT INTO awt_calendar_version (id, version)
+  VALUES (1, nextval('awt_calendar_version_seq'))
+  ON CONFLICT (id) DO UPDATE SET version=EXCLUDED.version;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+"""
+
+#: Tables with triggers bumping the calendar version
+TABLES = ["awt_employment", "awt_absence"]
+
+TRIGGERS += "\n".join(
+    f"DROP TRIGGER IF EXISTS {table}_calendar_version ON {table};\n"
+    f"CREATE TRIGGER {table}_calendar_version"
+    f" AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}"
+    " FOR EACH STATEMENT EXECUTE PROCEDURE awt_calendar_version_bump();"
+    for table in TABLES
+)
+
+DROP_TRIGGERS = "\n".join(
+    [f"DROP TRIGGER IF EXISTS {table}_calendar_version ON {table};" for table in TABLES]
+    + [
+        "DROP FUNCTION IF EXISTS awt_calendar_version_bump();",
+        "DROP TABLE IF EXISTS awt_calendar_version;",
+        "DROP SEQUENCE IF EXISTS awt_calendar_version_seq;",
+    ]
+)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("awt", "0015_vacationdaysoverride_type"),
+    ]
+
+    operations = [
+        migrations.RunSQL(TRIGGERS, DROP_TRIGGERS),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.0.6 on 2026-10-17 12:40
+
+from django.db import migrations, models
+
+
+# Absences are distributed to months when generating reports, the calendars
+# only depend on employments
+TRIGGERS = """\
+CREATE OR REPLACE FUNCTION awt_calendar_version_bump() RETURNS trigger AS $$
+begin
+  INSERT INTO awt_calendarversion (id, version)
+  VALUES (1, nextval('awt_calendar_version_seq'))
+  ON CONFLICT (id) DO UPDATE SET version=EXCLUDED.version;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS awt_absence_calendar_version ON awt_absence;
+DROP TABLE IF EXISTS awt_calendar_version;
+"""
+
+DROP_TRIGGERS = """\
+CREATE TABLE IF NOT EXISTS awt_calendar_version (
+  id integer PRIMARY KEY,
+  version bigint NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION awt_calendar_version_bump() RETURNS trigger AS $$
+begin
+  INSERT INTO awt_calendar_version (id, version)
+  VALUES (1, nextval('awt_calendar_version_seq'))
+  ON CONFLICT (id) DO UPDATE SET version=EXCLUDED.version;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER awt_absence_calendar_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON awt_absence
+FOR EACH STATEMENT EXECUTE PROCEDURE awt_calendar_version_bump();
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("awt", "0016_calendar_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CalendarVersion",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.BigIntegerField(verbose_name="version")),
+            ],
+            options={
+                "verbose_name": "calendar version",
+                "verbose_name_plural": "calendar versions",
+            },
+        ),
+        migrations.RunSQL(TRIGGERS, DROP_TRIGGERS),
+    ]
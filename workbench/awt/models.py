@@ -262,3 +262,20 @@ class VacationDaysOverride(models.Model):
     @property
     def pretty_days(self):
         return days(self.days, plus_sign=self.type == self.Type.RELATIVE)
+
+
+class CalendarVersion(models.Model):
+    """
+    Version of the employment calendars, maintained by database triggers
+
+    The table only ever has a single row. See ``workbench.awt.calendars``.
+    """
+
+    version = models.BigIntegerField(_("version"))
+
+    class Meta:
+        verbose_name = _("calendar version")
+        verbose_name_plural = _("calendar versions")
+
+    def __str__(self):
+        return str(self.version)
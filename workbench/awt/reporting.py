@@ -7,9 +7,8 @@ from django.db.models.functions import ExtractMonth
 from django.utils.datastructures import OrderedSet
 
 from workbench.accounts.models import User
+from workbench.awt.calendars import absence_days, employment_calendar, year_calendar
 from workbench.awt.models import Absence, Employment, VacationDaysOverride, Year
-from workbench.awt.utils import days_per_month, monthly_days
-from workbench.invoices.utils import next_valid_day
 from workbench.logbook.models import LoggedHours
 from workbench.tools.formats import Z1, Z2
 
@@ -66,28 +65,22 @@ def active_users(year):
     )
 
 
-def employment_percentages(*, until_year=False):
+def employment_percentages(*, until_year=False, since=None):
+    calendar = employment_calendar(
+        until_year=until_year or dt.date.today().year, since=since
+    )
+    users = User.objects.in_bulk(calendar)
     user_months = defaultdict(lambda: defaultdict(lambda: Z1))
-    this_year = dt.date.today().year
-    until_year = until_year or this_year
-    for employment in Employment.objects.select_related("user"):
-        percentage_factor = Decimal(employment.percentage)
-        for month, days in monthly_days(  # pragma: no branch
-            employment.date_from, employment.date_until
-        ):
-            if month.year > until_year:
-                break
-            dpm = days_per_month(month.year)
-            partial_month_factor = Decimal(days) / dpm[month.month - 1]
-            user_months[employment.user][month] += (
-                percentage_factor * partial_month_factor
-            )
+    for user_id, months in calendar.items():
+        user_months[users[user_id]].update(months)
     return user_months
 
 
-def full_time_equivalents_by_month():
+def full_time_equivalents_by_month(*, since=None):
     months = defaultdict(lambda: Z1)
-    for user_data in employment_percentages().values():
+    for user_data in employment_calendar(
+        until_year=dt.date.today().year, since=since
+    ).values():
         for month, percentage in user_data.items():
             months[month] += percentage / 100
     return months
@@ -104,41 +97,32 @@ def annual_working_time(year, *, users):
     )
     months = Months(year=year, users=users)
     vacation_days_credit = defaultdict(lambda: Z1)
-    dpm = days_per_month(year)
 
     overrides = {
         override.user_id: override
         for override in VacationDaysOverride.objects.filter(year=year, user__in=users)
     }
 
+    calendar = year_calendar(year)
     for employment in Employment.objects.filter(
-        user__in=months.users_with_wtm
+        user__in=months.users_with_wtm,
+        date_from__lte=dt.date(year, 12, 31),
+        date_until__gte=dt.date(year, 1, 1),
     ).order_by("-date_from"):
-        percentage_factor = Decimal(employment.percentage) / 100
-        available_vacation_days_per_month = (
-            Decimal(employment.vacation_weeks) * 5 / 12 * percentage_factor
-        )
-        month_data = months[employment.user_id]
-
-        for month, days in monthly_days(employment.date_from, employment.date_until):
-            if month.year < year:
-                continue
-            if month.year > year:
-                break
-            partial_month_factor = Decimal(days) / dpm[month.month - 1]
-            month_data["target"][month.month - 1] += (
-                month_data["year"].months[month.month - 1]
-                * percentage_factor
-                * partial_month_factor
+        months[employment.user_id]["employments"].add(employment)
+    for user in months.users_with_wtm:
+        if user.id not in calendar["employments"]:
+            continue
+        month_data = months[user.id]
+        percentage_factors, vacation_weeks = calendar["employments"][user.id]
+        for i in range(12):
+            month_data["target"][i] += (
+                month_data["year"].months[i]
+                * percentage_factors[i]
                 * month_data["year"].working_time_per_day
             )
-            month_data["percentage"][month.month - 1] += (
-                100 * percentage_factor * partial_month_factor
-            )
-            month_data["available_vacation_days"][month.month - 1] += (
-                available_vacation_days_per_month * partial_month_factor
-            )
-            month_data["employments"].add(employment)
+            month_data["percentage"][i] += 100 * percentage_factors[i]
+            month_data["available_vacation_days"][i] += vacation_weeks[i] * 5 / 12
 
     for row in (
         LoggedHours.objects.order_by()
@@ -174,33 +158,7 @@ def annual_working_time(year, *, users):
         key = "absence_%s" % absence.reason
         absences[absence.user_id][key].append(absence)
 
-        starts_on = absence.starts_on
-        ends_on = absence.ends_on or starts_on
-
-        if starts_on.month == ends_on.month:
-            days = [(absence.starts_on.month, absence.days)]
-        else:
-            total = Decimal((ends_on - starts_on).days + 1)
-            one_day = dt.timedelta(days=1)
-
-            calendar_days_per_month = [
-                (
-                    m,
-                    Decimal(
-                        (
-                            # end of absence or last day of this month
-                            min(ends_on, next_valid_day(ends_on.year, m, 99) - one_day)
-                            # start of absence or first day of this month
-                            - max(starts_on, dt.date(starts_on.year, m, 1))
-                        ).days
-                        # Always off by one
-                        + 1
-                    ),
-                )
-                for m in range(starts_on.month, ends_on.month + 1)
-            ]
-            days = [(m, absence.days * d / total) for m, d in calendar_days_per_month]
-
+        days = absence_days(absence.starts_on, absence.ends_on, absence.days)
         for month, d in days:
             month_data[key][month - 1] += d
 
@@ -1,4 +1,5 @@
 import datetime as dt
+from collections import defaultdict
 from decimal import Decimal
 
 from django.core import mail
@@ -11,17 +12,19 @@ from time_machine import travel
 from workbench import factories
 from workbench.accounts.features import FEATURES, F
 from workbench.accounts.models import User
+from workbench.awt.calendars import calendar_version
 from workbench.awt.models import Absence, Employment
 from workbench.awt.reporting import (
     active_users,
     annual_working_time,
     annual_working_time_warnings,
+    employment_percentages,
 )
 from workbench.awt.tasks import (
     annual_working_time_warnings_mails,
     is_previous_month_locked_starting_today,
 )
-from workbench.awt.utils import monthly_days
+from workbench.awt.utils import days_per_month, monthly_days
 from workbench.tools.forms import WarningsForm
 from workbench.tools.testing import check_code, messages
 from workbench.tools.validation import in_days
@@ -161,6 +164,100 @@ class AWTTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response["content-type"], "application/pdf")
 
+    def test_employment_percentages(self):
+        """Employment percentages match the month by month calculation to the cent"""
+        user = factories.UserFactory.create()
+        other = factories.UserFactory.create()
+        user.employments.create(
+            date_from=dt.date(2016, 3, 17), percentage=60, vacation_weeks=5
+        )
+        user.employments.create(
+            date_from=dt.date(2019, 2, 10), percentage=90, vacation_weeks=5
+        )
+        other.employments.create(
+            date_from=dt.date(2018, 2, 3),
+            date_until=dt.date(2018, 2, 20),
+            percentage=100,
+            vacation_weeks=5,
+        )
+        other.employments.create(
+            date_from=dt.date(2018, 5, 1),
+            date_until=dt.date(2020, 2, 29),
+            percentage=0,
+            vacation_weeks=5,
+        )
+
+        def reference(*, until_year, since=None):
+            months = defaultdict(dict)
+            for employment in Employment.objects.all():
+                date_from = employment.date_from
+                if since:
+                    if employment.date_until < since:
+                        continue
+                    date_from = max(date_from, since)
+                for month, days in monthly_days(date_from, employment.date_until):
+                    if month.year > until_year:
+                        break
+                    months[employment.user_id][month] = (
+                        months[employment.user_id].get(month, Decimal(0))
+                        + Decimal(employment.percentage)
+                        * Decimal(days)
+                        / days_per_month(month.year)[month.month - 1]
+                    )
+            return months
+
+        def cents(percentages):
+            return {
+                getattr(user, "id", user): {
+                    month: value.quantize(Decimal("0.01"))
+                    for month, value in months.items()
+                }
+                for user, months in percentages.items()
+            }
+
+        for kwargs in [
+            {"until_year": 2021},
+            {"until_year": 2019, "since": dt.date(2018, 2, 1)},
+        ]:
+            with self.subTest(kwargs=kwargs):
+                self.assertEqual(
+                    cents(employment_percentages(**kwargs)),
+                    cents(reference(**kwargs)),
+                )
+
+        percentages = employment_percentages(until_year=2021)
+        self.assertEqual(
+            percentages[other][dt.date(2018, 2, 1)].quantize(Decimal("0.01")),
+            Decimal("64.29"),
+        )
+        self.assertEqual(percentages[other][dt.date(2018, 5, 1)], 0)
+        self.assertNotIn(dt.date(2018, 4, 1), percentages[other])
+
+        # Calendars are memoized until employments change
+        with self.assertNumQueries(2):
+            employment_percentages(until_year=2021)
+        Employment.objects.filter(user=other).delete()
+        self.assertEqual(list(employment_percentages(until_year=2021)), [user])
+
+    def test_calendar_version(self):
+        """Only employments bump the calendar version, absences are counted anyway"""
+        user = factories.UserFactory.create()
+        factories.YearFactory.create(
+            year=2018, working_time_model=user.working_time_model
+        )
+        user.employments.create(
+            date_from=dt.date(2018, 1, 1), percentage=100, vacation_weeks=5
+        )
+        version = calendar_version()
+        self.assertNotEqual(version, 0)
+
+        annual_working_time(2018, users=[user])
+        user.absences.create(starts_on=dt.date(2018, 3, 1), days=5, reason="vacation")
+        self.assertEqual(calendar_version(), version)
+
+        awt = annual_working_time(2018, users=[user])
+        self.assertEqual(awt["months"][user.id]["absence_vacation"][2], 5)
+
     def test_admin_list(self):
         """The admin changelist of years contains the calculated sum of working days"""
         user = factories.UserFactory.create(is_admin=True)
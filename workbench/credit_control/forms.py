@@ -1,4 +1,4 @@
-import re
+from itertools import islice
 
 from django import forms
 from django.contrib import messages
@@ -6,6 +6,12 @@ from django.utils.html import format_html, mark_safe
 from django.utils.translation import gettext, gettext_lazy as _
 
 from workbench.credit_control.models import CreditEntry, Ledger
+from workbench.credit_control.reconciliation import (
+    HIGH,
+    InvoiceIndex,
+    apply,
+    propose,
+)
 from workbench.invoices.models import Invoice
 from workbench.tools.formats import currency, local_date_format
 from workbench.tools.forms import Autocomplete, Form, ModelForm, Textarea
@@ -89,14 +95,20 @@ class AccountStatementUploadForm(Form):
     def clean(self):
         data = super().clean()
         if data.get("statement") and data.get("ledger"):
+            count, known = 0, False
             try:
-                self.statement_list = data["ledger"].parse_fn(data["statement"].read())
-                messages.info(
-                    self.request,
-                    _("Found {count} credit entries.").format(
-                        count=len(self.statement_list)
-                    ),
-                )
+                entries = iter(data["ledger"].parse(data["statement"]))
+                while batch := list(islice(entries, 1000)):
+                    count += len(batch)
+                    known = (
+                        known
+                        or CreditEntry.objects.filter(
+                            ledger=data["ledger"],
+                            reference_number__in=[
+                                entry["reference_number"] for entry in batch
+                            ],
+                        ).exists()
+                    )
 
             except Exception as exc:
                 raise forms.ValidationError(
@@ -107,16 +119,12 @@ class AccountStatementUploadForm(Form):
                     % exc
                 ) from exc
 
-            reference_numbers = [
-                entry["reference_number"] for entry in self.statement_list
-            ]
+            messages.info(
+                self.request,
+                _("Found {count} credit entries.").format(count=count),
+            )
 
-            if (
-                reference_numbers
-                and not CreditEntry.objects.filter(
-                    ledger=data["ledger"], reference_number__in=reference_numbers
-                ).exists()
-            ):
+            if count and not known:
                 self.add_warning(
                     _(
                         "The uploaded list only contains new payments."
@@ -129,18 +137,15 @@ class AccountStatementUploadForm(Form):
         return data
 
     def save(self):
-        created_entries = []
-        ledger = self.cleaned_data["ledger"]
+        """
+        Parse the statement a second time and insert new credit entries
 
-        for data in reversed(self.statement_list):  # From past to present
-            reference_number = data.pop("reference_number")
-
-            c, created = ledger.transactions.get_or_create(
-                reference_number=reference_number, defaults=data
-            )
-            if created:
-                created_entries.append(c)
-        return created_entries
+        Returns the count of created and skipped credit entries.
+        """
+        statement = self.cleaned_data["statement"]
+        statement.seek(0)
+        ledger = self.cleaned_data["ledger"]
+        return ledger.import_entries(ledger.parse(statement))
 
 
 class AssignCreditEntriesForm(forms.Form):
@@ -149,10 +154,14 @@ class AssignCreditEntriesForm(forms.Form):
 
         super().__init__(*args, **kwargs)
 
+        self.index = InvoiceIndex.open()
+        pending = list(CreditEntry.objects.pending().reverse()[:20])
+        proposals = propose(pending, self.index)
+
         self.entries = []
-        for entry in CreditEntry.objects.reverse().filter(
-            invoice__isnull=True, notes=""
-        )[:20]:
+        for entry in pending:
+            codes = self.index.codes(entry.payment_notice)
+            proposal = proposals.get(entry.id)
             self.fields[f"entry_{entry.pk}_invoice"] = forms.TypedChoiceField(
                 label=format_html(
                     '<a href="{}" target="_blank"'
@@ -171,10 +180,7 @@ class AssignCreditEntriesForm(forms.Form):
                                 format_html('<span title="{}">', invoice.description),
                                 format_html(
                                     "<strong>{}</strong>"
-                                    if re.search(
-                                        r"\b" + invoice.code + r"\b",
-                                        entry.payment_notice,
-                                    )
+                                    if invoice.code in codes
                                     else "{}",
                                     invoice,
                                 ),
@@ -207,15 +213,12 @@ class AssignCreditEntriesForm(forms.Form):
                             ))
                         ),
                     )
-                    for invoice in Invoice.objects.open()
-                    .filter(total=entry.total)
-                    .select_related(
-                        "contact__organization", "customer", "owned_by", "project"
-                    )[:100]
+                    for invoice, _confidence in self.index.candidates(entry)
                 ],
                 coerce=int,
                 required=False,
                 widget=forms.RadioSelect,
+                initial=proposal[0].id if proposal and proposal[1] == HIGH else None,
             )
 
             self.fields[f"entry_{entry.pk}_notes"] = forms.CharField(
@@ -230,12 +233,7 @@ class AssignCreditEntriesForm(forms.Form):
 
     def save(self):
         for entry, invoice_field, notes_field in self.entries:
-            entry.invoice_id = self.cleaned_data.get(invoice_field) or None
+            invoice_id = self.cleaned_data.get(invoice_field)
+            entry.invoice = self.index.invoices[invoice_id] if invoice_id else None
             entry.notes = self.cleaned_data.get(notes_field, "")
-            entry.save()
-
-            if entry.invoice and entry.invoice.status != entry.invoice.PAID:
-                entry.invoice.status = entry.invoice.PAID
-                entry.invoice.closed_on = entry.value_date
-                entry.invoice.payment_notice = entry.payment_notice
-                entry.invoice.save()
+        apply([entry for entry, _invoice_field, _notes_field in self.entries])
@@ -1,3 +1,5 @@
+from itertools import islice
+
 from django.db import models
 from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
@@ -5,15 +7,13 @@ from django.utils.translation import gettext_lazy as _
 from workbench.credit_control import parsers
 from workbench.invoices.models import Invoice
 from workbench.tools.models import Model, MoneyField, SearchQuerySet
+from workbench.tools.reporting import query
 from workbench.tools.urls import model_urls
 
 
 # @model_urls
 class Ledger(Model):
-    PARSER_CHOICES = [
-        ("zkb-csv", _("ZKB CSV")),
-        ("postfinance-csv", _("PostFinance CSV")),
-    ]
+    PARSER_CHOICES = parsers.choices()
 
     name = models.CharField(_("name"), max_length=100)
     parser = models.CharField(_("parser"), max_length=20, choices=PARSER_CHOICES)
@@ -27,12 +27,67 @@ class Ledger(Model):
     def __str__(self):
         return self.name
 
-    @property
-    def parse_fn(self):
-        return {
-            "zkb-csv": parsers.parse_zkb_csv,
-            "postfinance-csv": parsers.parse_postfinance_csv,
-        }[self.parser]
+    def parse(self, file):
+        return parsers.parse(self.parser, file)
+
+    def import_entries(self, entries, *, batch_size=1000):
+        """
+        Insert credit entries in batches, skipping known reference numbers
+
+        Returns the count of created and skipped entries.
+        """
+        created = skipped = 0
+        entries = iter(entries)
+        while batch := list(islice(entries, batch_size)):
+            known = set(
+                CreditEntry.objects.filter(
+                    reference_number__in=[entry["reference_number"] for entry in batch]
+                )
+                .order_by()
+                .values_list("reference_number", flat=True)
+            )
+            new = {}
+            for entry in batch:
+                if entry["reference_number"] in known | new.keys():
+                    skipped += 1
+                    continue
+                credit_entry = CreditEntry(ledger=self, **entry)
+                credit_entry.update_fts()
+                new[entry["reference_number"]] = credit_entry
+            if not new:
+                continue
+            # Entries inserted concurrently are skipped by the database, only
+            # the IDs of entries which have actually been inserted are returned
+            inserted = len(
+                query(
+                    """
+INSERT INTO credit_control_creditentry (
+    ledger_id, reference_number, value_date, total, payment_notice, notes, _fts
+)
+SELECT %s, reference_number, value_date, total, payment_notice, '', fts
+FROM unnest(%s::text[], %s::date[], %s::numeric[], %s::text[], %s::text[])
+    AS e(reference_number, value_date, total, payment_notice, fts)
+ON CONFLICT (reference_number) DO NOTHING
+RETURNING id
+                    """,
+                    [
+                        self.pk,
+                        *(
+                            [getattr(entry, field) for entry in new.values()]
+                            for field in [
+                                "reference_number",
+                                "value_date",
+                                "total",
+                                "payment_notice",
+                                "_fts",
+                            ]
+                        ),
+                    ],
+                )
+            )
+            created += inserted
+            skipped += len(new) - inserted
+        return created, skipped
 
 
 class CreditEntryQuerySet(SearchQuerySet):
@@ -79,7 +134,12 @@ class CreditEntry(Model):
         return self.reference_number
 
     def save(self, *args, **kwargs):
-        self._fts = " ".join(str(part) for part in [self.invoice or "", self.total])
+        self.update_fts()
         super().save(*args, **kwargs)
 
     save.alters_data = True
+
+    def update_fts(self):
+        self._fts = " ".join(str(part) for part in [self.invoice or "", self.total])
+
+    update_fts.alters_data = True
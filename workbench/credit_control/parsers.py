@@ -1,58 +1,112 @@
+"""
+Account statement parsers
+
+Parsers are generators yielding one dictionary per credit entry with the
+``reference_number``, ``value_date``, ``total`` and ``payment_notice``
+keys. They receive a binary file object and decode it incrementally, so
+statements are never loaded into memory as a whole. Parsers are registered
+with a key which is stored in ``Ledger.parser``.
+"""
+
 import csv
 import datetime as dt
 import hashlib
 import io
 import re
+from contextlib import contextmanager
 from decimal import Decimal
 
 from django.utils.dateparse import parse_date
-from django.utils.encoding import force_str
 from django.utils.text import slugify
+from django.utils.translation import gettext_lazy as _
 
 
-def parse_zkb_csv(data):
-    f = io.StringIO()
-    f.write(force_str(data, encoding="utf-8", errors="ignore"))
-    f.seek(0)
+#: Registered parsers, ``{key: (label, parser)}``
+PARSERS = {}
+
+
+def register(key, label):
+    def decorator(fn):
+        PARSERS[key] = (label, fn)
+        return fn
+
+    return decorator
+
+
+def choices():
+    return [(key, label) for key, (label, _fn) in PARSERS.items()]
+
+
+def parse(key, file):
+    """
+    Return an iterator of credit entries in the binary file object
+    """
+    return PARSERS[key][1](file)
+
+
+@contextmanager
+def _decoded(file, encoding):
+    """
+    Decode the binary file incrementally, leaving the file itself open
+    """
+    if isinstance(file, bytes):
+        file = io.BytesIO(file)
+    f = io.TextIOWrapper(
+        getattr(file, "file", file), encoding=encoding, errors="ignore", newline=""
+    )
+    try:
+        yield f
+    finally:
+        # Unfinished parsers may be garbage collected after the file has
+        # been closed, the wrapper is closed too in this case
+        if not f.closed:
+            f.detach()
+
+
+def _csv_reader(f):
     dialect = csv.Sniffer().sniff(f.read(4096))
     f.seek(0)
-    reader = csv.reader(f, dialect)
-    first_line = next(reader)
-
-    day_column = first_line.index("Valuta")
-    amount_column = first_line.index("Gutschrift CHF")
-    reference_column = first_line.index("ZKB-Referenz")
-    detail_columns = [
-        first_line.index("Buchungstext"),
-        first_line.index("Zahlungszweck"),
-        first_line.index("Details"),
-        first_line.index("ZKB-Referenz"),
-    ]
-
-    entries = []
-    while True:
-        try:
-            row = next(reader)
-        except StopIteration:
-            break
-        if not row:
-            continue
-        try:
-            day = dt.datetime.strptime(row[day_column], "%d.%m.%Y").date()
-            amount = row[amount_column] and Decimal(row[amount_column])
-            reference = row[reference_column]
-        except (AttributeError, IndexError, ValueError):
-            continue
-        if day and amount:
-            entries.append({
-                "reference_number": reference,
-                "value_date": day,
-                "total": amount,
-                "payment_notice": "; ".join(
-                    filter(None, (row[c] for c in detail_columns))
-                ),
-            })
-    return entries
+    return csv.reader(f, dialect)
+
+
+@register("zkb-csv", _("ZKB CSV"))
+def iter_zkb_csv(file):
+    with _decoded(file, "utf-8") as f:
+        reader = _csv_reader(f)
+        first_line = next(reader)
+
+        day_column = first_line.index("Valuta")
+        amount_column = first_line.index("Gutschrift CHF")
+        reference_column = first_line.index("ZKB-Referenz")
+        detail_columns = [
+            first_line.index("Buchungstext"),
+            first_line.index("Zahlungszweck"),
+            first_line.index("Details"),
+            first_line.index("ZKB-Referenz"),
+        ]
+
+        for row in reader:
+            if not row:
+                continue
+            try:
+                day = dt.datetime.strptime(row[day_column], "%d.%m.%Y").date()
+                amount = row[amount_column] and Decimal(row[amount_column])
+                reference = row[reference_column]
+            except (AttributeError, IndexError, ValueError):
+                continue
+            if day and amount:
+                yield {
+                    "reference_number": reference,
+                    "value_date": day,
+                    "total": amount,
+                    "payment_notice": "; ".join(
+                        filter(None, (row[c] for c in detail_columns))
+                    ),
+                }
+
+
+def parse_zkb_csv(data):
+    return list(iter_zkb_csv(data))
 
 
 def postfinance_preprocess_notice(payment_notice):
@@ -76,30 +130,29 @@ def postfinance_reference_number(payment_notice, day):
     )
 
 
+@register("postfinance-csv", _("PostFinance CSV"))
+def iter_postfinance_csv(file):
+    with _decoded(file, "latin-1") as f:
+        reader = _csv_reader(f)
+        next(reader)  # Skip first line
+        for row in reader:
+            if not row:
+                continue
+            try:
+                day = parse_date(row[4])
+            except (IndexError, ValueError):
+                continue
+            if day is None or not row[2]:  # Only credit
+                continue
+
+            payment_notice = postfinance_preprocess_notice(row[1])
+            yield {
+                "reference_number": postfinance_reference_number(payment_notice, day),
+                "value_date": day,
+                "total": Decimal(row[2]),
+                "payment_notice": payment_notice,
+            }
+
+
 def parse_postfinance_csv(data):
-    f = io.StringIO()
-    f.write(force_str(data, encoding="latin-1", errors="ignore"))
-    f.seek(0)
-    dialect = csv.Sniffer().sniff(f.read(4096))
-    f.seek(0)
-    reader = csv.reader(f, dialect)
-    next(reader)  # Skip first line
-    entries = []
-    for row in reader:
-        if not row:
-            continue
-        try:
-            day = parse_date(row[4])
-        except (IndexError, ValueError):
-            continue
-        if day is None or not row[2]:  # Only credit
-            continue
-
-        payment_notice = postfinance_preprocess_notice(row[1])
-        entries.append({
-            "reference_number": postfinance_reference_number(payment_notice, day),
-            "value_date": day,
-            "total": Decimal(row[2]),
-            "payment_notice": payment_notice,
-        })
-    return entries
+    return list(iter_postfinance_csv(data))
@@ -0,0 +1,146 @@
+"""
+Reconciliation of credit entries with open invoices
+
+All open invoices are loaded once and indexed by total and by invoice code.
+Pending credit entries are matched against the index in one pass:
+
+- ``HIGH``: The payment notice contains the code of an open invoice and
+  the totals are equal. The QR bill contains the invoice code as additional
+  information, so most payments fall into this category.
+- ``MEDIUM``: The notice contains no known invoice code but exactly one
+  open invoice has the same total.
+- ``LOW``: Several open invoices have the same total, or the notice
+  contains the code of an invoice with a different total.
+
+Invoices which already have a credit entry are skipped. The best candidate
+of every entry is proposed for assignment unless it is also the best
+candidate of another entry with the same or a higher confidence.
+"""
+
+import re
+from collections import defaultdict
+
+from django.db import transaction
+
+from workbench.credit_control.models import CreditEntry
+from workbench.invoices.models import Invoice
+
+
+HIGH = "high"
+MEDIUM = "medium"
+LOW = "low"
+
+CONFIDENCE_ORDER = {HIGH: 0, MEDIUM: 1, LOW: 2}
+
+#: Candidates with the same total are only shown up to this count
+MAX_CANDIDATES = 100
+
+CODE_TOKEN = re.compile(r"\b[0-9]+(?:-[0-9]+)*\b")
+
+
+class InvoiceIndex:
+    def __init__(self, invoices):
+        self.invoices = {}
+        self.by_total = defaultdict(list)
+        self.by_code = {}
+        for invoice in invoices:
+            self.invoices[invoice.id] = invoice
+            self.by_total[invoice.total].append(invoice)
+            self.by_code[invoice.code] = invoice
+
+    @classmethod
+    def open(cls):
+        return cls(
+            Invoice.objects.open()
+            .filter(creditentry__isnull=True)
+            .select_related("contact__organization", "customer", "owned_by", "project")
+            .order_by("pk")
+        )
+
+    def codes(self, payment_notice):
+        """Return the codes of open invoices mentioned in the payment notice"""
+        return [
+            code
+            for code in dict.fromkeys(CODE_TOKEN.findall(payment_notice))
+            if code in self.by_code
+        ]
+
+    def candidates(self, entry):
+        """
+        Return a list of ``(invoice, confidence)`` tuples, best first
+        """
+        candidates = {}
+        for code in self.codes(entry.payment_notice):
+            invoice = self.by_code[code]
+            candidates[invoice] = HIGH if invoice.total == entry.total else LOW
+
+        same_total = self.by_total.get(entry.total, [])
+        for invoice in same_total[:MAX_CANDIDATES]:
+            candidates.setdefault(
+                invoice, MEDIUM if len(same_total) == 1 and not candidates else LOW
+            )
+
+        return sorted(
+            candidates.items(),
+            key=lambda row: (CONFIDENCE_ORDER[row[1]], row[0].pk),
+        )
+
+
+def propose(entries, index):
+    """
+    Return ``{entry ID: (invoice, confidence)}`` for entries with a best
+    candidate which is not a best candidate with the same or a higher
+    confidence of another entry too
+    """
+    best = {}
+    claims = defaultdict(list)
+    for entry in entries:
+        if candidates := index.candidates(entry):
+            best[entry.id] = candidates[0]
+            claims[candidates[0][0]].append(CONFIDENCE_ORDER[candidates[0][1]])
+    return {
+        entry_id: (invoice, confidence)
+        for entry_id, (invoice, confidence) in best.items()
+        if min(claims[invoice]) == CONFIDENCE_ORDER[confidence]
+        and claims[invoice].count(CONFIDENCE_ORDER[confidence]) == 1
+    }
+
+
+def apply(entries):
+    """
+    Save the invoice and notes of credit entries and mark their invoices
+    as paid in one transaction
+    """
+    invoices = []
+    for entry in entries:
+        entry.update_fts()
+        if entry.invoice and entry.invoice.status != Invoice.PAID:
+            entry.invoice.status = Invoice.PAID
+            entry.invoice.closed_on = entry.value_date
+            entry.invoice.payment_notice = entry.payment_notice
+            invoices.append(entry.invoice)
+
+    with transaction.atomic():
+        CreditEntry.objects.bulk_update(entries, ["invoice", "notes", "_fts"])
+        Invoice.objects.bulk_update(invoices, ["status", "closed_on", "payment_notice"])
+
+
+def apply_proposals(*, confidence=HIGH):
+    """
+    Assign all pending credit entries with a proposal of at least the given
+    confidence and return the updated entries
+    """
+    with transaction.atomic():
+        entries = list(CreditEntry.objects.pending().order_by("pk").select_for_update())
+        proposals = propose(entries, InvoiceIndex.open())
+        updated = []
+        for entry in entries:
+            proposal = proposals.get(entry.id)
+            if (
+                proposal
+                and CONFIDENCE_ORDER[proposal[1]] <= CONFIDENCE_ORDER[confidence]
+            ):
+                entry.invoice = proposal[0]
+                updated.append(entry)
+        apply(updated)
+    return updated
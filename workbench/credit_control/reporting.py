@@ -1,3 +1,4 @@
+import datetime as dt
 import io
 import zipfile
 
@@ -6,37 +7,28 @@ from django.utils.text import slugify
 from django.utils.translation import activate, gettext as _
 
 from workbench.credit_control.models import CreditEntry, Ledger
+from workbench.invoices.batch import for_pdf, render_invoices
 from workbench.invoices.models import Invoice
-from workbench.tools.pdf import PDFDocument
 from workbench.tools.xlsx import WorkbenchXLSXDocument
 
 
-def append_invoice(*, zf, invoice, qr):
-    with io.BytesIO() as buf:
-        pdf = PDFDocument(buf)
-        pdf.init_invoice_letter()
-        pdf.process_invoice(invoice, qr=qr)
-        try:
-            pdf.generate()
-        except Exception:
-            print(f"Error while processing invoice {invoice} (ID {invoice.id})")
-            raise
-
-        zf.writestr(
-            "{}/{}.pdf".format(invoice.invoiced_on.strftime("%Y.%m"), invoice.code),
-            buf.getvalue(),
-        )
+def append_invoice(*, zf, invoice, pdf):
+    zf.writestr(
+        "{}/{}.pdf".format(invoice.invoiced_on.strftime("%Y.%m"), invoice.code),
+        pdf,
+    )
 
 
 def paid_debtors_zip(date_range, *, file, qr=False):
     activate(settings.WORKBENCH.PDF_LANGUAGE)
     xlsx = WorkbenchXLSXDocument()
 
-    invoices = (
-        Invoice.objects.filter(invoiced_on__range=date_range)
-        .exclude(status=Invoice.IN_PREPARATION)
-        .order_by("invoiced_on", "id")
-        .select_related("project", "owned_by")
+    invoices = list(
+        for_pdf(
+            Invoice.objects.filter(invoiced_on__range=date_range)
+            .exclude(status=Invoice.IN_PREPARATION)
+            .order_by("invoiced_on", "id")
+        )
     )
     credit_entries = {
         ce.invoice_id: ce for ce in CreditEntry.objects.filter(invoice__in=invoices)
@@ -44,8 +36,8 @@ def paid_debtors_zip(date_range, *, file, qr=False):
 
     with zipfile.ZipFile(file, "w", compression=zipfile.ZIP_DEFLATED) as zf:
         rows = []
-        for invoice in invoices:
-            append_invoice(zf=zf, invoice=invoice, qr=qr)
+        for invoice, pdf in render_invoices(invoices, qr=qr):
+            append_invoice(zf=zf, invoice=invoice, pdf=pdf)
             rows.append([
                 invoice.code,
                 bool(invoice.archived_at),
@@ -121,6 +113,7 @@ def paid_debtors_zip(date_range, *, file, qr=False):
             ],
         )
 
+        additional = set()
         for ledger in Ledger.objects.all():
             rows = []
             for entry in (
@@ -139,11 +132,7 @@ def paid_debtors_zip(date_range, *, file, qr=False):
 
                 if entry.invoice and entry.invoice not in invoices:
                     print(entry.invoice)
-                    append_invoice(
-                        zf=zf,
-                        invoice=entry.invoice,
-                        qr=qr,
-                    )
+                    additional.add(entry.invoice.id)
 
             if rows:
                 xlsx.add_sheet(slugify(ledger.name))
@@ -159,6 +148,25 @@ def paid_debtors_zip(date_range, *, file, qr=False):
                     rows,
                 )
 
+        for invoice, pdf in render_invoices(
+            for_pdf(Invoice.objects.filter(id__in=additional).order_by("id")), qr=qr
+        ):
+            append_invoice(zf=zf, invoice=invoice, pdf=pdf)
+
         with io.BytesIO() as buf:
             xlsx.workbook.save(buf)
             zf.writestr("debtors.xlsx", buf.getvalue())
+
+
+def paid_debtors_job(job):
+    """
+    Background job variant of ``paid_debtors_zip``, does not archive invoices
+    """
+    date_range = [dt.date.fromisoformat(day) for day in job.parameters["date_range"]]
+    with io.BytesIO() as buf:
+        paid_debtors_zip(date_range, file=buf, qr=job.parameters.get("qr", False))
+        return (
+            f"debtors-{date_range[0]}-{date_range[1]}.zip",
+            "application/zip",
+            buf.getvalue(),
+        )
@@ -1,12 +1,14 @@
 import datetime as dt
 import os
 from decimal import Decimal
+from unittest import mock
 
 from django.conf import settings
 from django.test import TestCase
 from django.utils import timezone
 
 from workbench import factories
+from workbench.credit_control import parsers, reconciliation
 from workbench.credit_control.models import CreditEntry
 from workbench.credit_control.parsers import (
     parse_postfinance_csv,
@@ -62,6 +64,67 @@ class CreditEntriesTest(TestCase):
             ],
         )
 
+    def test_reconciliation(self):
+        """Credit entries are matched against an index of open invoices"""
+        invoices = [
+            factories.InvoiceFactory.create(subtotal=total, liable_to_vat=False)
+            for total in [100, 200, 300, 300, 400]
+        ]
+        factories.CreditEntryFactory.create(
+            total=500,
+            invoice=factories.InvoiceFactory.create(subtotal=500, liable_to_vat=False),
+        )
+
+        code = factories.CreditEntryFactory.create(
+            total=100, payment_notice=f"Invoice: {invoices[0].code}"
+        )
+        total = factories.CreditEntryFactory.create(total=200)
+        ambiguous = factories.CreditEntryFactory.create(total=300)
+        other_total = factories.CreditEntryFactory.create(
+            total=150, payment_notice=f"{invoices[4].code}, {invoices[0].code}"
+        )
+        conflict = [factories.CreditEntryFactory.create(total=400) for i in range(2)]
+        paid = factories.CreditEntryFactory.create(total=500)
+
+        with self.assertNumQueries(1):
+            index = reconciliation.InvoiceIndex.open()
+            entries = [code, total, ambiguous, other_total, *conflict, paid]
+            proposals = reconciliation.propose(entries, index)
+
+        self.assertEqual(
+            proposals,
+            {
+                code.id: (invoices[0], reconciliation.HIGH),
+                total.id: (invoices[1], reconciliation.MEDIUM),
+                ambiguous.id: (invoices[2], reconciliation.LOW),
+            },
+        )
+        self.assertEqual(
+            [confidence for _invoice, confidence in index.candidates(other_total)],
+            [reconciliation.LOW, reconciliation.LOW],
+        )
+
+        self.client.force_login(factories.UserFactory.create())
+        response = self.client.get("/credit-control/assign/")
+        self.assertContains(response, f"<strong><small>{invoices[0].code}</small>", 2)
+
+        response = self.client.post("/credit-control/apply-proposals/", follow=True)
+        self.assertRedirects(response, "/credit-control/assign/")
+        self.assertEqual(messages(response), ["Assigned 1 credit entry."])
+
+        code.refresh_from_db()
+        self.assertEqual(code.invoice, invoices[0])
+        self.assertEqual(code.invoice.status, code.invoice.PAID)
+        self.assertEqual(code.invoice.closed_on, code.value_date)
+        self.assertEqual(code._fts, f"{invoices[0]} 100.00")
+
+        response = self.client.post(
+            "/credit-control/apply-proposals/", {"confidence": "medium"}
+        )
+        total.refresh_from_db()
+        self.assertEqual(total.invoice, invoices[1])
+        self.assertEqual(CreditEntry.objects.pending().count(), 5)
+
     def test_account_statement_upload(self):
         """Uploading account statements with and without duplicates"""
         self.client.force_login(factories.UserFactory.create())
@@ -97,7 +160,12 @@ class CreditEntriesTest(TestCase):
 
         self.assertRedirects(response, "/credit-control/")
         self.assertEqual(
-            messages(response), ["Found 2 credit entries.", "Created 0 credit entries."]
+            messages(response),
+            [
+                "Found 2 credit entries.",
+                "Created 0 credit entries.",
+                "Skipped 2 known credit entries.",
+            ],
         )
 
         invoice = factories.InvoiceFactory.create(
@@ -205,6 +273,73 @@ class CreditEntriesTest(TestCase):
         )
         self.assertIn("2019-0214-0001", entries[2]["payment_notice"])
 
+    def test_import_entries(self):
+        """Parsers stream entries which are inserted in batches"""
+        ledger = factories.LedgerFactory.create(parser="postfinance-csv")
+        other = factories.LedgerFactory.create()
+        factories.CreditEntryFactory.create(
+            ledger=other, reference_number="pf-190618CH04D10XYZ"
+        )
+
+        with open(
+            os.path.join(
+                settings.BASE_DIR, "workbench", "test", "postfinance-export.csv"
+            ),
+            "rb",
+        ) as f:
+            entries = ledger.parse(f)
+            self.assertEqual(next(entries)["total"], Decimal("1193.30"))
+            # The file has not been closed by the parser
+            f.seek(0)
+            streamed = list(ledger.parse(f))
+            f.seek(0)
+            parsed = list(ledger.parse(f.read()))
+
+        self.assertEqual(streamed, parsed)
+        with self.assertNumQueries(4):
+            self.assertEqual(
+                ledger.import_entries(streamed * 3, batch_size=4),
+                (2, 7),
+            )
+
+        entry = CreditEntry.objects.get(
+            reference_number="pf-bad7372a51d085b97f7b0e782841490b"
+        )
+        self.assertEqual(entry.ledger, ledger)
+        self.assertEqual(entry._fts, f" {entry.total}")
+        self.assertEqual(
+            CreditEntry.objects.get(reference_number="pf-190618CH04D10XYZ").ledger,
+            other,
+        )
+
+        self.assertIn(("zkb-csv", "ZKB CSV"), parsers.choices())
+
+    def test_import_entries_concurrently(self):
+        """Entries inserted by a concurrent import are counted as skipped"""
+        ledger = factories.LedgerFactory.create()
+        entries = [
+            {
+                "reference_number": f"concurrent-{i}",
+                "value_date": dt.date(2024, 1, 1),
+                "total": Decimal("10.00"),
+                "payment_notice": "Payment",
+            }
+            for i in range(3)
+        ]
+
+        def insert_concurrently(entry):
+            entry._fts = ""
+            if entry.reference_number == "concurrent-1":
+                CreditEntry.objects.bulk_create([
+                    CreditEntry(ledger=ledger, **entries[1])
+                ])
+
+        with mock.patch.object(
+            CreditEntry, "update_fts", autospec=True, side_effect=insert_concurrently
+        ):
+            self.assertEqual(ledger.import_entries(entries), (2, 1))
+        self.assertEqual(CreditEntry.objects.filter(ledger=ledger).count(), 3)
+
     def test_invalid_account_statement(self):
         """Completely invalid account statements do not crash the backend"""
         self.client.force_login(factories.UserFactory.create())
@@ -11,6 +11,7 @@ from workbench.credit_control.models import CreditEntry
 from workbench.credit_control.views import (
     AccountStatementUploadView,
     AssignCreditEntriesView,
+    apply_proposals,
 )
 
 
@@ -66,4 +67,9 @@ urlpatterns = [
         bookkeeping_only(AssignCreditEntriesView.as_view(model=CreditEntry)),
         name="credit_control_creditentry_assign",
     ),
+    path(
+        "apply-proposals/",
+        bookkeeping_only(apply_proposals),
+        name="credit_control_creditentry_apply_proposals",
+    ),
 ]
@@ -1,8 +1,10 @@
 from django.contrib import messages
 from django.shortcuts import redirect
 from django.utils.translation import gettext as _, ngettext
+from django.views.decorators.http import require_POST
 
 from workbench import generic
+from workbench.credit_control import reconciliation
 from workbench.credit_control.forms import AssignCreditEntriesForm
 
 
@@ -12,14 +14,22 @@ class AccountStatementUploadView(generic.CreateView):
         return super().get_context_data(**kwargs)
 
     def form_valid(self, form):
-        entries = form.save()
+        created, skipped = form.save()
         messages.success(
             self.request,
-            ngettext(
-                "Created %s credit entry.", "Created %s credit entries.", len(entries)
-            )
-            % len(entries),
+            ngettext("Created %s credit entry.", "Created %s credit entries.", created)
+            % created,
         )
+        if skipped:
+            messages.info(
+                self.request,
+                ngettext(
+                    "Skipped %s known credit entry.",
+                    "Skipped %s known credit entries.",
+                    skipped,
+                )
+                % skipped,
+            )
         return redirect("credit_control_creditentry_list")
 
 
@@ -48,3 +58,21 @@ class AssignCreditEntriesView(generic.CreateView):
     def get_context_data(self, **kwargs):
         kwargs.setdefault("title", _("Assign credit entries"))
         return super().get_context_data(**kwargs)
+
+
+@require_POST
+def apply_proposals(request):
+    confidence = request.POST.get("confidence")
+    entries = reconciliation.apply_proposals(
+        confidence=confidence
+        if confidence in reconciliation.CONFIDENCE_ORDER
+        else reconciliation.HIGH
+    )
+    messages.success(
+        request,
+        ngettext(
+            "Assigned %s credit entry.", "Assigned %s credit entries.", len(entries)
+        )
+        % len(entries),
+    )
+    return redirect("credit_control_creditentry_assign")
@@ -0,0 +1,360 @@
+"""
+Cached fragments of the start page
+
+The start page is the most visited page. Its expensive parts are computed
+as independent fragments, mostly rendered HTML, and cached with a key
+containing the fragment name, the user for per-user fragments, the day, the
+language and the versions the fragment depends on:
+
+- Fragments with ``per_user=True`` depend on the version of the user.
+  Statement triggers assign a new value of ``audit_userversion_seq`` to
+  the users whose objects changed, that is the owners of deals, offers,
+  invoices and projects, contributors, planned users and so on. Objects of
+  inactive users are shown to everyone, therefore changing them or
+  (de)activating users bumps the versions of all users (see the ``audit``
+  migration ``0010_user_version``). Logins do not bump anything.
+- Global fragments depend on the versions of the rarely written tables
+  they list. Statement triggers assign a new value of
+  ``audit_tableversion_seq`` to the ``audit_tableversion`` row of a table
+  whenever rows are inserted, updated or deleted (see the ``audit``
+  migration ``0009_table_version``). Fragments depending on other tables
+  need a migration adding the triggers to those tables.
+- Fragments with ``slices=True`` depend on the timer slices version of the
+  user which changes whenever timestamps, logged hours or breaks of this
+  user change (see ``workbench.timer.slices``), fragments with
+  ``all_slices=True`` on the latest slices version of all users.
+
+The versions of all fragments are loaded with one query and the fragments
+with one cache lookup; only missing fragments are computed. The time spent
+per fragment is reported in the ``Server-Timing`` header of the start page.
+"""
+
+import datetime as dt
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.translation import get_language, gettext as _
+
+from workbench.accounts.features import FEATURES
+from workbench.deals.models import Deal
+from workbench.invoices.models import Invoice, RecurringInvoice
+from workbench.logbook.models import LoggedHours
+from workbench.offers.models import Offer
+from workbench.planning.models import PlannedWork
+from workbench.projects.models import Project
+from workbench.tools.reporting import query
+from workbench.tools.validation import in_days
+
+
+#: Pseudo table names of the version of the user, the timer slices version
+#: of the user and the latest timer slices version of all users
+USER = "audit_userversion"
+SLICES = "timer_sliceversion"
+ALL_SLICES = "timer_sliceversion:all"
+
+#: Registered fragments, ``{name: Fragment}``
+FRAGMENTS = {}
+
+#: Fragments shown in the "Possibly requiring action" card, in this order
+NEEDS_ACTION = [
+    "planned-work",
+    "deals",
+    "offers",
+    "invoices",
+    "recurring-invoices",
+    "old-projects",
+]
+
+
+class Fragment:
+    def __init__(
+        self,
+        name,
+        fn,
+        *,
+        tables=(),
+        per_user=False,
+        slices=False,
+        all_slices=False,
+        feature=None,
+    ):
+        self.name = name
+        self.fn = fn
+        self.tables = list(tables)
+        self.per_user = per_user
+        self.slices = slices
+        self.all_slices = all_slices
+        self.feature = feature
+
+    def enabled(self, user):
+        return self.feature is None or user.features[self.feature]
+
+    def key(self, *, user, versions):
+        # Table, user and slices versions come from different sequences
+        tables = max([versions.get(table) or 0 for table in self.tables], default=0)
+        return "start:{}:{}:{}:{}:{}.{}.{}.{}".format(
+            self.name,
+            user.id if self.per_user or self.slices else "-",
+            dt.date.today().isoformat(),
+            get_language(),
+            tables,
+            versions.get(USER) or 0 if self.per_user else 0,
+            versions.get(SLICES) or 0 if self.slices else 0,
+            versions.get(ALL_SLICES) or 0 if self.all_slices else 0,
+        )
+
+
+def fragment(name, **kwargs):
+    def decorator(fn):
+        FRAGMENTS[name] = Fragment(name, fn, **kwargs)
+        return fn
+
+    return decorator
+
+
+def versions(user, tables):
+    """
+    Return the versions of the tables, the version and the timer slices
+    version of the user and the latest timer slices version in one query
+    """
+    return dict(
+        query(
+            """
+select table_name, version from audit_tableversion where table_name=any(%s)
+union all
+select %s, version from audit_userversion where user_id=%s
+union all
+select %s, version from timer_sliceversion where user_id=%s
+union all
+select %s, max(version) from timer_sliceversion
+            """,
+            [sorted(tables), USER, user.id, SLICES, user.id, ALL_SLICES],
+        )
+    )
+
+
+def fragments(user):
+    """
+    Return the fragments enabled for the user and the timings as a list of
+    ``(name, description, seconds)`` tuples
+    """
+    enabled = [f for f in FRAGMENTS.values() if f.enabled(user)]
+    timeout = settings.START_CACHE_TIMEOUT
+    timings = []
+    keys, cached = {}, {}
+    if timeout:
+        started = time.perf_counter()
+        current = versions(user, {table for f in enabled for table in f.tables})
+        keys = {f.name: f.key(user=user, versions=current) for f in enabled}
+        cached = cache.get_many(keys.values())
+        timings.append(("versions", None, time.perf_counter() - started))
+
+    result, missing = {}, {}
+    for f in enabled:
+        started = time.perf_counter()
+        if (key := keys.get(f.name)) in cached:
+            result[f.name] = cached[key]
+            description = "hit"
+        else:
+            result[f.name] = missing[key] = f.fn(user)
+            description = "miss"
+        timings.append((f.name, description, time.perf_counter() - started))
+
+    if timeout and missing:
+        cache.set_many(missing, timeout)
+    return result, timings
+
+
+def server_timing(timings):
+    return ", ".join(
+        "{}{};dur={:.1f}".format(
+            name, f';desc="{description}"' if description else "", seconds * 1000
+        )
+        for name, description, seconds in timings
+    )
+
+
+def _needs_action(*, verbose_name_plural, url, objects):
+    objects = list(objects)
+    return (
+        render_to_string(
+            "start/_needs_action.html",
+            {
+                "verbose_name_plural": verbose_name_plural,
+                "url": url,
+                "objects": objects,
+            },
+        )
+        if objects
+        else ""
+    )
+
+
+@fragment(
+    "planned-work",
+    per_user=True,
+    feature=FEATURES.PLANNING,
+)
+def provisional_planned_work(user):
+    return _needs_action(
+        verbose_name_plural=_("Provisional planned work in the near future"),
+        url=user.urls["planning"],
+        objects=PlannedWork.objects.maybe_actionable(user=user).select_related(
+            "project", "user"
+        ),
+    )
+
+
+@fragment(
+    "deals",
+    per_user=True,
+    feature=FEATURES.DEALS,
+)
+def deals(user):
+    return _needs_action(
+        verbose_name_plural=Deal._meta.verbose_name_plural,
+        url=Deal.urls["list"],
+        objects=Deal.objects.maybe_actionable(user=user),
+    )
+
+
+@fragment(
+    "offers",
+    per_user=True,
+    feature=FEATURES.CONTROLLING,
+)
+def offers(user):
+    return _needs_action(
+        verbose_name_plural=Offer._meta.verbose_name_plural,
+        url=Offer.urls["list"],
+        objects=Offer.objects.maybe_actionable(user=user),
+    )
+
+
+@fragment(
+    "invoices",
+    per_user=True,
+    feature=FEATURES.CONTROLLING,
+)
+def invoices(user):
+    return _needs_action(
+        verbose_name_plural=Invoice._meta.verbose_name_plural,
+        url=Invoice.urls["list"],
+        objects=Invoice.objects.maybe_actionable(user=user),
+    )
+
+
+@fragment(
+    "recurring-invoices",
+    per_user=True,
+    feature=FEATURES.CONTROLLING,
+)
+def recurring_invoices(user):
+    return _needs_action(
+        verbose_name_plural=RecurringInvoice._meta.verbose_name_plural,
+        url=RecurringInvoice.urls["list"],
+        objects=RecurringInvoice.objects.maybe_actionable(),
+    )
+
+
+@fragment("old-projects", per_user=True)
+def old_projects(user):
+    return _needs_action(
+        verbose_name_plural=_("Old projects"),
+        url=Project.urls["list"] + "?s=old-projects",
+        objects=Project.objects.old_projects().own_or_inactive(user),
+    )
+
+
+@fragment(
+    "todays-hours",
+    tables=["projects_project"],
+    slices=True,
+)
+def todays_hours(user):
+    return render_to_string(
+        "start/_todays_hours.html",
+        {
+            "user": user,
+            "hours": user.hours,
+            "todays_hours": LoggedHours.objects.filter(
+                rendered_by=user, rendered_on=dt.date.today()
+            )
+            .select_related("service__project__owned_by", "rendered_by", "timestamp")
+            .order_by("-created_at")[:15],
+        },
+    )
+
+
+@fragment(
+    "all-users-hours",
+    tables=["projects_project"],
+    all_slices=True,
+)
+def all_users_hours(user):
+    return render_to_string(
+        "start/_all_users_hours.html",
+        {
+            "all_users_hours": LoggedHours.objects.filter(rendered_on__gte=in_days(-7))
+            .select_related("service__project__owned_by", "rendered_by", "timestamp")
+            .order_by("-created_at")[:20],
+        },
+    )
+
+
+@fragment("birthdays", tables=["contacts_person"], per_user=True)
+def birthdays(user):
+    """
+    Birthdays are computed once per day unless people or users change
+    """
+    rows = query(
+        """
+SELECT id, given_name, family_name, date_of_birth, is_active_user FROM (
+    SELECT
+        p.id,
+        given_name,
+        family_name,
+        date_of_birth,
+        u.is_active AS is_active_user,
+        (current_date - date_of_birth) %% 365.24 AS diff
+    FROM contacts_person p
+    LEFT OUTER JOIN accounts_user u ON p.id=u.person_id
+    WHERE date_of_birth is not null AND is_archived=FALSE
+) AS subquery
+WHERE diff < 7 or diff > 350
+ORDER BY (diff + 180) %% 365 DESC
+        """,
+        [],
+    )
+    return (
+        render_to_string(
+            "start/_birthdays.html",
+            {
+                "birthdays": [
+                    {
+                        "id": row[0],
+                        "given_name": row[1],
+                        "family_name": row[2],
+                        "date_of_birth": row[3],
+                        "is_active_user": row[4],
+                    }
+                    for row in rows
+                ]
+            },
+        )
+        if rows
+        else ""
+    )
+
+
+@fragment("take-a-break", slices=True, feature=FEATURES.BREAKS_NAG)
+def take_a_break(user):
+    msg = user.take_a_break_warning()
+    return str(msg) if msg else None
+
+
+@fragment("unlogged-timestamps", slices=True)
+def unlogged_timestamps(user):
+    return user.unlogged_timestamps_warning()
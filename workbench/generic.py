@@ -1,7 +1,10 @@
+import hashlib
 import json
+from urllib.parse import urlencode
 
 import vanilla
 from django.contrib import messages
+from django.core.cache import cache
 from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils.decorators import classonlymethod
@@ -9,6 +12,7 @@ from django.utils.functional import cached_property
 from django.utils.text import capfirst
 from django.utils.translation import gettext as _, gettext_lazy
 
+from workbench.audit.models import table_version
 from workbench.services.models import ServiceType
 
 
@@ -276,18 +280,52 @@ class DeleteView(ToolsMixin, vanilla.DeleteView):
 class AutocompleteView(ToolsMixin, vanilla.ListView):
     filter = None
     label_from_instance = str
+    limit = 50
+    # Seconds; results are reused for the same query and to narrow down the
+    # search when the user continues typing
+    cache_timeout = 30
+
+    def cache_keys(self, q):
+        version = table_version(self.model._meta.db_table)
+        params = sorted(
+            (key, value) for key, value in self.request.GET.items() if key != "q"
+        )
+        prefix = f"autocomplete:{self.request.path}:{version}:{urlencode(params)}"
+        # Longest prefix first
+        return [
+            f"{prefix}:{hashlib.md5(q[:length].encode()).hexdigest()}"
+            for length in range(len(q), 0, -1)
+        ]
 
     def get(self, request, *args, **kwargs):
-        q = request.GET.get("q")
-        queryset = self.get_queryset().search(q)
+        if not (q := request.GET.get("q")):
+            return JsonResponse({"results": []})
+
+        keys = self.cache_keys(q)
+        cached = cache.get_many(keys)
+        if hit := cached.get(keys[0]):
+            return JsonResponse({"results": hit["results"]})
+
+        queryset = self.get_queryset()
+        for key in keys[1:]:
+            if (hit := cached.get(key)) and hit["complete"]:
+                # Longer queries only ever match a subset of the results
+                queryset = queryset.filter(
+                    pk__in=[result["value"] for result in hit["results"]]
+                )
+                break
+
+        queryset = queryset.search(q)
         queryset = (
             self.filter(queryset=queryset, request=request) if self.filter else queryset
         )
-        return JsonResponse({
-            "results": [
-                {"label": self.label_from_instance(instance), "value": instance.pk}
-                for instance in queryset[:50]
-            ]
-            if q
-            else []
-        })
+        results = [
+            {"label": self.label_from_instance(instance), "value": instance.pk}
+            for instance in queryset[: self.limit]
+        ]
+        cache.set(
+            keys[0],
+            {"results": results, "complete": len(results) < self.limit},
+            self.cache_timeout,
+        )
+        return JsonResponse({"results": results})
@@ -0,0 +1,126 @@
+"""
+Batch rendering of invoice PDFs
+
+Rendering an invoice PDF is CPU bound and does not need the database once
+the invoice, its services and down payment invoices are loaded. Batches are
+therefore loaded in the calling process and rendered in a pool of worker
+processes. The worker processes are spawned and never touch the database.
+"""
+
+import io
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import current_process, get_context
+
+import django
+from django.conf import settings
+from django.utils.translation import activate
+
+from workbench.tools import pdf_cache
+
+
+def _initialize_worker():
+    django.setup()
+    activate(settings.WORKBENCH.PDF_LANGUAGE)
+
+
+def for_pdf(queryset):
+    """
+    Load everything ``PDFDocument.process_invoice`` needs
+    """
+    return queryset.select_related("project", "owned_by").prefetch_related(
+        "services", "down_payment_invoices__project"
+    )
+
+
+def render_invoice(invoice, *, qr=True):
+    from workbench.tools.pdf import PDFDocument
+
+    with io.BytesIO() as buf:
+        pdf = PDFDocument(buf)
+        pdf.init_invoice_letter()
+        pdf.process_invoice(invoice, qr=qr)
+        try:
+            pdf.generate()
+        except Exception as exc:
+            raise RuntimeError(
+                f"Error while processing invoice {invoice.code} (ID {invoice.id})"
+            ) from exc
+        return buf.getvalue()
+
+
+def _render_invoices(invoices, *, qr, workers):
+    # Daemonic processes (e.g. multiprocessing pool workers) cannot have children
+    if workers <= 1 or current_process().daemon:
+        for invoice in invoices:
+            yield render_invoice(invoice, qr=qr)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=_initialize_worker,
+    ) as executor:
+        yield from executor.map(partial(render_invoice, qr=qr), invoices)
+
+
+def render_invoices(invoices, *, qr=True, workers=None):
+    """
+    Yield ``(invoice, pdf)`` tuples in the order of ``invoices``
+
+    Invoices should be loaded using ``for_pdf``. PDFs are taken from the PDF
+    cache if possible, the rest is rendered in ``settings.BATCH_PDF_WORKERS``
+    processes, or in the current process if only one worker is configured.
+    """
+    invoices = list(invoices)
+    keys = [pdf_cache.document_key(invoice, qr=qr) for invoice in invoices]
+    cached = pdf_cache.get_many(keys)
+    missing = [invoice for invoice, key in zip(invoices, keys) if key not in cached]
+    rendered = _render_invoices(
+        missing,
+        qr=qr,
+        workers=min(
+            settings.BATCH_PDF_WORKERS if workers is None else workers,
+            len(missing),
+        ),
+    )
+    for invoice, key in zip(invoices, keys):
+        if (pdf := cached.get(key)) is None:
+            pdf = next(rendered)
+            pdf_cache.store(key, pdf)
+        yield invoice, pdf
+
+
+def invoice_pdf(invoice, *, qr=True):
+    """
+    Return the PDF of a single invoice, using the PDF cache
+    """
+    return pdf_cache.get_or_render(
+        invoice, partial(render_invoice, invoice, qr=qr), qr=qr
+    )
+
+
+def invoice_pdfs_job(job):
+    """
+    Render the invoices ``job.parameters["invoices"]`` into a ZIP file
+    """
+    from workbench.invoices.models import Invoice
+
+    activate(settings.WORKBENCH.PDF_LANGUAGE)
+    ids = job.parameters["invoices"]
+    position = {id: index for index, id in enumerate(ids)}
+    invoices = sorted(
+        for_pdf(Invoice.objects.filter(id__in=ids)),
+        key=lambda invoice: position[invoice.id],
+    )
+    job.set_progress(0, len(invoices))
+
+    with io.BytesIO() as buf:
+        with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for index, (invoice, pdf) in enumerate(
+                render_invoices(invoices, qr=job.parameters.get("qr", True)), 1
+            ):
+                zf.writestr(f"{invoice.code}.pdf", pdf)
+                job.set_progress(index)
+        return "invoices.zip", "application/zip", buf.getvalue()
@@ -15,6 +15,7 @@ from workbench.accounts.models import User
 from workbench.contacts.forms import PostalAddressSelectionForm
 from workbench.contacts.models import Organization, Person
 from workbench.invoices.models import Invoice, RecurringInvoice, Service
+from workbench.jobs.runner import enqueue
 from workbench.logbook.models import LoggedCost, LoggedHours
 from workbench.services.models import ServiceType
 from workbench.tools.formats import Z2, currency, hours, local_date_format
@@ -84,10 +85,22 @@ class InvoiceSearchForm(Form):
 
             count = queryset.count()
             if count > settings.BATCH_MAX_ITEMS:
-                messages.error(
-                    request, _("%s invoices in selection, that's too many.") % count
+                job = enqueue(
+                    "invoice_pdfs",
+                    created_by=request.user,
+                    parameters={
+                        "invoices": list(queryset.values_list("id", flat=True))
+                    },
                 )
-                return HttpResponseRedirect("?error=1")
+                messages.info(
+                    request,
+                    _(
+                        "%s invoices in selection, the PDFs are generated"
+                        " in the background."
+                    )
+                    % count,
+                )
+                return HttpResponseRedirect(job.get_absolute_url())
 
             pdf, response = pdf_response(
                 "invoices",
@@ -16,7 +16,7 @@ from workbench.contacts.models import Organization, Person
 from workbench.invoices.utils import recurring
 from workbench.logbook.models import LoggedCost, LoggedHours
 from workbench.projects.models import Project
-from workbench.services.models import ServiceBase
+from workbench.services.models import ServiceBase, service_batch
 from workbench.tools.formats import Z1, Z2, currency, local_date_format
 from workbench.tools.models import ModelWithTotal, MoneyField, SearchQuerySet
 from workbench.tools.urls import model_urls
@@ -408,75 +408,114 @@ class Invoice(ModelWithTotal):
     def create_services_from_logbook(self, project_services):
         assert self.project, "cannot call create_services_from_logbook without project"
 
-        for position, ps in enumerate(self._ordered_services(project_services)):
-            not_archived_effort = ps.loggedhours.filter(
-                archived_at__isnull=True
-            ).order_by()
-            not_archived_costs = ps.loggedcosts.filter(
-                archived_at__isnull=True
-            ).order_by()
-
-            hours = not_archived_effort.aggregate(Sum("hours"))["hours__sum"] or Z1
-            cost = not_archived_costs.aggregate(Sum("cost"))["cost__sum"] or Z2
-
-            if hours or cost:
-                service = Service(
-                    invoice=self,
-                    project_service=ps,
-                    title=ps.title,
-                    description=ps.description,
-                    position=position + 1,
-                    effort_rate=ps.effort_rate,
-                    effort_type=ps.effort_type,
-                    effort_hours=hours,
-                    cost=cost,
-                    third_party_costs=not_archived_costs.filter(
-                        third_party_costs__isnull=False
-                    ).aggregate(Sum("third_party_costs"))["third_party_costs__sum"],
-                )
-                service.save(skip_related_model=True)
-                not_archived_effort.update(
-                    invoice_service=service, archived_at=timezone.now()
-                )
-                not_archived_costs.update(
-                    invoice_service=service, archived_at=timezone.now()
-                )
+        project_services = self._ordered_services(project_services)
+        ids = [ps.id for ps in project_services]
+        hours = {
+            row["service"]: row["hours"]
+            for row in LoggedHours.objects.filter(
+                service__in=ids, archived_at__isnull=True
+            )
+            .order_by()
+            .values("service")
+            .annotate(hours=Sum("hours"))
+        }
+        costs = {
+            row["service"]: row
+            for row in LoggedCost.objects.filter(
+                service__in=ids, archived_at__isnull=True
+            )
+            .order_by()
+            .values("service")
+            .annotate(cost=Sum("cost"), third_party_costs=Sum("third_party_costs"))
+        }
 
-        (
-            self.service_period_from,
-            self.service_period_until,
-        ) = self.service_period_from_logbook()
-        self.save()
+        with service_batch() as batch:
+            services = []
+            for position, ps in enumerate(project_services):
+                effort = hours.get(ps.id) or Z1
+                row = costs.get(ps.id, {})
+                cost = row.get("cost") or Z2
+
+                if effort or cost:
+                    services.append(
+                        batch.add(
+                            Service(
+                                invoice=self,
+                                project_service=ps,
+                                title=ps.title,
+                                description=ps.description,
+                                position=position + 1,
+                                effort_rate=ps.effort_rate,
+                                effort_type=ps.effort_type,
+                                effort_hours=effort,
+                                cost=cost,
+                                third_party_costs=row.get("third_party_costs"),
+                            )
+                        )
+                    )
+
+            batch.flush()
+            self._archive_logbook(services)
+
+            (
+                self.service_period_from,
+                self.service_period_until,
+            ) = self.service_period_from_logbook()
+            batch.recalculate(self)
+
+    def _archive_logbook(self, services):
+        """
+        Link all unarchived logbook entries of the project services to the
+        invoice services, one statement per logbook table
+        """
+        if not services:
+            return
+        ids = [service.id for service in services]
+        now = timezone.now()
+        with connections["default"].cursor() as cursor:
+            for table in ("logbook_loggedhours", "logbook_loggedcost"):
+                cursor.execute(
+                    f"""
+UPDATE {table}
+SET invoice_service_id=s.id, archived_at=%s
+FROM invoices_service s
+WHERE s.id=ANY(%s)
+AND {table}.service_id=s.project_service_id
+AND {table}.archived_at IS NULL
+                    """,
+                    [now, ids],
+                )
 
     def create_services_from_offer(self, project_services):
         assert self.project, "cannot call create_services_from_offer without project"
 
-        for position, ps in enumerate(self._ordered_services(project_services)):
-            service = Service(
-                invoice=self,
-                project_service=ps,
-                title=ps.title,
-                description=ps.description,
-                position=position + 1,
-                effort_rate=ps.effort_rate,
-                effort_type=ps.effort_type,
-                effort_hours=ps.effort_hours,
-                cost=ps.cost,
-                third_party_costs=ps.third_party_costs,
-            )
-            service.save(skip_related_model=True)
-            ps.loggedhours.filter(archived_at__isnull=True).update(
-                invoice_service=service, archived_at=timezone.now()
-            )
-            ps.loggedcosts.filter(archived_at__isnull=True).update(
-                invoice_service=service, archived_at=timezone.now()
-            )
+        with service_batch() as batch:
+            services = [
+                batch.add(
+                    Service(
+                        invoice=self,
+                        project_service=ps,
+                        title=ps.title,
+                        description=ps.description,
+                        position=position + 1,
+                        effort_rate=ps.effort_rate,
+                        effort_type=ps.effort_type,
+                        effort_hours=ps.effort_hours,
+                        cost=ps.cost,
+                        third_party_costs=ps.third_party_costs,
+                    )
+                )
+                for position, ps in enumerate(self._ordered_services(project_services))
+            ]
 
-        (
-            self.service_period_from,
-            self.service_period_until,
-        ) = self.service_period_from_logbook()
-        self.save()
+            batch.flush()
+            self._archive_logbook(services)
+
+            (
+                self.service_period_from,
+                self.service_period_until,
+            ) = self.service_period_from_logbook()
+            batch.recalculate(self)
 
     def _unlink_logbook(self):
         LoggedHours.objects.filter(invoice_service__invoice=self).update(
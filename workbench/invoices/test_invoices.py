@@ -1,6 +1,9 @@
 import datetime as dt
 from decimal import Decimal
+from unittest import mock
 
+from django.conf import settings
+from django.core.cache import caches
 from django.core.exceptions import ValidationError
 from django.db.models import ProtectedError
 from django.test import TestCase
@@ -8,7 +11,10 @@ from django.test.utils import override_settings
 from django.utils.translation import deactivate_all
 
 from workbench import factories
+from workbench.invoices.batch import for_pdf, render_invoice, render_invoices
 from workbench.invoices.models import Invoice
+from workbench.jobs.models import Job
+from workbench.logbook.models import LoggedCost, LoggedHours
 from workbench.tools.formats import local_date_format
 from workbench.tools.forms import WarningsForm
 from workbench.tools.testing import check_code, messages
@@ -305,6 +311,55 @@ class InvoicesTest(TestCase):
             [f"Invoice '{invoice}' has been deleted successfully."],
         )
 
+    def test_create_services_from_logbook_queries(self):
+        """Creating services from the logbook runs a constant number of queries"""
+
+        def create(count):
+            project = factories.ProjectFactory.create()
+            services = factories.ServiceFactory.create_batch(
+                count, project=project, effort_type="Consulting", effort_rate=100
+            )
+            for service in services:
+                factories.LoggedHoursFactory.create(service=service, hours=1)
+                factories.LoggedHoursFactory.create(service=service, hours=2)
+                factories.LoggedCostFactory.create(
+                    service=service, cost=10, third_party_costs=8
+                )
+                factories.LoggedCostFactory.create(service=service, cost=5)
+            invoice = factories.InvoiceFactory.create(
+                customer=project.customer,
+                contact=project.contact,
+                project=project,
+                type=Invoice.SERVICES,
+            )
+            return invoice, services
+
+        for count in (2, 8):
+            invoice, services = create(count)
+            with self.assertNumQueries(8):
+                invoice.create_services_from_logbook(services)
+
+            self.assertEqual(invoice.subtotal, count * 315)
+            self.assertEqual(
+                [
+                    (s.position, s.effort_hours, s.cost, s.third_party_costs)
+                    for s in invoice.services.all()
+                ],
+                [(i + 1, 3, 15, 8) for i in range(count)],
+            )
+            self.assertEqual(
+                LoggedHours.objects.filter(
+                    invoice_service__invoice=invoice, archived_at__isnull=False
+                ).count(),
+                2 * count,
+            )
+            self.assertEqual(
+                LoggedCost.objects.filter(
+                    invoice_service__invoice=invoice, archived_at__isnull=False
+                ).count(),
+                2 * count,
+            )
+
     def test_delete_service_invoice_with_logs(self):
         """Deleting service invoices with related logbook entries unarchives
         those entries"""
@@ -556,7 +611,7 @@ class InvoicesTest(TestCase):
 
     @override_settings(BATCH_MAX_ITEMS=5)
     def test_too_many_invoices(self):
-        """Creating a PDF with too many invoices fails"""
+        """Creating a PDF with too many invoices starts a background job"""
         invoice = factories.InvoiceFactory.create()
 
         for _i in range(5):
@@ -568,12 +623,48 @@ class InvoicesTest(TestCase):
 
         self.client.force_login(invoice.owned_by)
         response = self.client.get("/invoices/?export=pdf")
+        job = Job.objects.get()
         self.assertRedirects(
-            response, "/invoices/?error=1", fetch_redirect_response=False
+            response, job.urls["detail"], fetch_redirect_response=False
         )
         self.assertEqual(
-            messages(response), ["6 invoices in selection, that's too many."]
-        )
+            messages(response),
+            ["6 invoices in selection, the PDFs are generated in the background."],
+        )
+        self.assertEqual(job.kind, "invoice_pdfs")
+        self.assertEqual(len(job.parameters["invoices"]), 6)
+
+    @override_settings(
+        CACHES={
+            **settings.CACHES,
+            "pdf": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        }
+    )
+    def test_pdf_cache(self):
+        """Invoice PDFs are cached until the invoice or its services change"""
+        caches["pdf"].clear()
+        invoice = factories.InvoiceFactory.create()
+        self.client.force_login(invoice.owned_by)
+
+        with mock.patch(
+            "workbench.invoices.batch.render_invoice", wraps=render_invoice
+        ) as render:
+            pdf = self.client.get(invoice.urls["pdf"]).content
+            self.assertEqual(self.client.get(invoice.urls["pdf"]).content, pdf)
+            self.assertEqual(render.call_count, 1)
+
+            invoice.title = "Changed"
+            invoice.save()
+            self.client.get(invoice.urls["pdf"])
+            self.assertEqual(render.call_count, 2)
+
+            invoice.services.create(title="Test", cost=50)
+            self.client.get(invoice.urls["pdf"])
+            self.assertEqual(render.call_count, 3)
+
+            invoices = list(for_pdf(Invoice.objects.all()))
+            self.assertEqual(len(list(render_invoices(invoices))), 1)
+            self.assertEqual(render.call_count, 3)
 
     def test_list_pdfs(self):
         """Various checks when exporting PDFs of lists"""
@@ -8,8 +8,10 @@ from django.utils.text import slugify
 from django.utils.translation import gettext, ngettext
 
 from workbench import generic
+from workbench.invoices.batch import for_pdf, invoice_pdf
 from workbench.invoices.models import Invoice
 from workbench.logbook.models import LoggedCost, LoggedHours
+from workbench.tools import pdf_cache
 from workbench.tools.pdf import pdf_response
 from workbench.tools.xlsx import WorkbenchXLSXDocument
 
@@ -17,25 +19,25 @@ from workbench.tools.xlsx import WorkbenchXLSXDocument
 class InvoicePDFView(generic.DetailView):
     model = Invoice
 
+    def get_queryset(self):
+        return for_pdf(super().get_queryset())
+
     def get(self, request, *args, **kwargs):
         self.object = self.get_object()
 
-        pdf, response = pdf_response(
-            self.object.code,
-            as_attachment=request.GET.get("disposition") == "attachment",
-        )
-
         try:
-            pdf.init_invoice_letter()
-            pdf.process_invoice(self.object)
-            pdf.generate()
+            pdf = invoice_pdf(self.object)
         except Exception as exc:
             messages.error(
                 request, gettext("Unable to generate the PDF: {}").format(exc)
             )
             return redirect(self.object)
 
-        return response
+        return pdf_cache.pdf_bytes_response(
+            self.object.code,
+            pdf,
+            as_attachment=request.GET.get("disposition") == "attachment",
+        )
 
 
 class InvoiceXLSXView(generic.DetailView):
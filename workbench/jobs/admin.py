@@ -0,0 +1,11 @@
+from workbench.jobs import models
+from workbench.tools import admin
+
+
+@admin.register(models.Job)
+class JobAdmin(admin.ModelAdmin):
+    exclude = ["artifact"]
+    list_display = ["kind", "status", "created_by", "created_at", "finished_at"]
+    list_filter = ["kind", "status"]
+    list_select_related = ["created_by"]
+    raw_id_fields = ["created_by"]
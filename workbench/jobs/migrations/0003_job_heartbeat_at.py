@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-17 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0002_parameters_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="heartbeat_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="heartbeat at"
+            ),
+        ),
+        migrations.RunSQL(
+            "UPDATE jobs_job SET heartbeat_at=started_at WHERE status='running'",
+            migrations.RunSQL.noop,
+        ),
+    ]
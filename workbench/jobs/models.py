@@ -0,0 +1,81 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from workbench.accounts.models import User
+from workbench.tools.urls import model_urls
+
+
+@model_urls
+class Job(models.Model):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (QUEUED, _("queued")),
+        (RUNNING, _("running")),
+        (DONE, _("done")),
+        (FAILED, _("failed")),
+    ]
+
+    kind = models.CharField(_("kind"), max_length=50)
+    parameters = models.JSONField(_("parameters"), default=dict)
+    parameters_hash = models.CharField(
+        _("parameters hash"), max_length=64, blank=True, editable=False
+    )
+    status = models.CharField(
+        _("status"), max_length=10, choices=STATUS_CHOICES, default=QUEUED
+    )
+    progress = models.PositiveIntegerField(_("progress"), default=0)
+    total = models.PositiveIntegerField(_("total"), default=0)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name=_("created by"),
+        related_name="+",
+    )
+    created_at = models.DateTimeField(_("created at"), default=timezone.now)
+    started_at = models.DateTimeField(_("started at"), blank=True, null=True)
+    heartbeat_at = models.DateTimeField(_("heartbeat at"), blank=True, null=True)
+    finished_at = models.DateTimeField(_("finished at"), blank=True, null=True)
+    error = models.TextField(_("error"), blank=True)
+    filename = models.CharField(_("filename"), max_length=200, blank=True)
+    content_type = models.CharField(_("content type"), max_length=100, blank=True)
+    artifact = models.BinaryField(_("artifact"), blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["created_by", "kind", "parameters_hash"]),
+        ]
+        ordering = ["-created_at"]
+        verbose_name = _("job")
+        verbose_name_plural = _("jobs")
+
+    def __str__(self):
+        return f"{self.kind} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in {self.DONE, self.FAILED}
+
+    @property
+    def percent(self):
+        return 100 * self.progress // self.total if self.total else 0
+
+    def set_progress(self, progress, total=None):
+        """
+        Update the progress without touching the rest of the row so that the
+        progress can be polled while the job is running
+
+        Also refreshes the heartbeat which tells workers that the job is
+        still alive.
+        """
+        self.progress = progress
+        self.heartbeat_at = timezone.now()
+        fields = {"progress": progress, "heartbeat_at": self.heartbeat_at}
+        if total is not None:
+            self.total = fields["total"] = total
+        Job.objects.filter(pk=self.pk).update(**fields)
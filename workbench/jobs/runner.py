@@ -0,0 +1,159 @@
+"""
+Background jobs
+
+Long running exports are queued as ``Job`` rows and processed by the
+``run_jobs`` management command. Handlers are registered in ``HANDLERS`` by
+kind; they receive the job, may report progress using ``job.set_progress``
+and return a ``(filename, content_type, data)`` tuple which is stored as the
+downloadable artifact of the job.
+
+Jobs are deduplicated: Enqueueing a job with the same kind and parameters as
+a queued or running job of the same user or a job which has finished less
+than ``JOBS_ARTIFACT_MAX_AGE`` seconds ago returns the existing job instead
+so that its artifact can be downloaded again. Running jobs whose heartbeat,
+refreshed on claiming the job and on every progress update, is older than
+``JOBS_STALE_AFTER`` seconds are considered crashed; they do not block new
+jobs and are failed by workers and when pruning jobs.
+"""
+
+import datetime as dt
+import hashlib
+import json
+import logging
+import traceback
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from workbench.jobs.models import Job
+
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {
+    "invoice_pdfs": "workbench.invoices.batch.invoice_pdfs_job",
+    "paid_debtors": "workbench.credit_control.reporting.paid_debtors_job",
+    "green_hours": "workbench.reporting.jobs.green_hours_job",
+    "key_data": "workbench.reporting.jobs.key_data_job",
+    "labor_costs": "workbench.reporting.jobs.labor_costs_job",
+    "squeeze": "workbench.reporting.jobs.squeeze_job",
+    "workload": "workbench.reporting.jobs.workload_job",
+}
+
+
+def parameters_hash(kind, parameters):
+    return hashlib.sha256(
+        json.dumps([kind, parameters], sort_keys=True, cls=DjangoJSONEncoder).encode()
+    ).hexdigest()
+
+
+def _stale_cutoff():
+    return timezone.now() - dt.timedelta(seconds=settings.JOBS_STALE_AFTER)
+
+
+def enqueue(kind, *, created_by, parameters):
+    """
+    Queue a job or return an existing job with the same parameters
+    """
+    if kind not in HANDLERS:
+        raise KeyError(f"Unknown job kind {kind!r}")
+    parameters = json.loads(json.dumps(parameters, cls=DjangoJSONEncoder))
+    hash = parameters_hash(kind, parameters)
+    if job := (
+        Job.objects.defer("artifact")
+        .filter(
+            Q(status=Job.QUEUED)
+            | Q(status=Job.RUNNING, heartbeat_at__gte=_stale_cutoff())
+            | Q(
+                status=Job.DONE,
+                finished_at__gte=timezone.now()
+                - dt.timedelta(seconds=settings.JOBS_ARTIFACT_MAX_AGE),
+            ),
+            created_by=created_by,
+            kind=kind,
+            parameters_hash=hash,
+        )
+        .order_by("-created_at", "-id")
+        .first()
+    ):
+        return job
+    return Job.objects.create(
+        kind=kind,
+        created_by=created_by,
+        parameters=parameters,
+        parameters_hash=hash,
+    )
+
+
+def _claim_next_job():
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.QUEUED)
+            .order_by("created_at", "id")
+            .first()
+        )
+        if job:
+            job.status = Job.RUNNING
+            job.started_at = job.heartbeat_at = timezone.now()
+            job.save(update_fields=["status", "started_at", "heartbeat_at"])
+        return job
+
+
+def fail_stale_jobs():
+    """
+    Fail running jobs without a heartbeat for ``JOBS_STALE_AFTER`` seconds
+
+    Jobs are only finished by the worker which claimed them. If the worker
+    is killed the job would be running forever otherwise. Long running jobs
+    which still report progress are left alone.
+    """
+    return Job.objects.filter(
+        status=Job.RUNNING, heartbeat_at__lt=_stale_cutoff()
+    ).update(
+        status=Job.FAILED,
+        finished_at=timezone.now(),
+        error=(
+            f"The job did not report progress within {settings.JOBS_STALE_AFTER}"
+            " seconds, its worker has probably been killed."
+        ),
+    )
+
+
+def run(job):
+    try:
+        handler = import_string(HANDLERS[job.kind])
+        job.filename, job.content_type, job.artifact = handler(job)
+    except Exception:
+        logger.exception("Job %s failed", job.pk)
+        job.status = Job.FAILED
+        job.error = traceback.format_exc()
+    else:
+        job.status = Job.DONE
+        job.progress = job.total
+    job.finished_at = timezone.now()
+    job.save()
+
+
+def prune_jobs():
+    """
+    Delete finished jobs and their artifacts after ``JOBS_RETENTION_DAYS``
+    """
+    fail_stale_jobs()
+    return Job.objects.filter(
+        finished_at__lt=timezone.now() - dt.timedelta(days=settings.JOBS_RETENTION_DAYS)
+    ).delete()[0]
+
+
+def run_next_job():
+    """
+    Run the oldest queued job, returns ``None`` if there was nothing to do
+    """
+    fail_stale_jobs()
+    if job := _claim_next_job():
+        run(job)
+    return job
@@ -0,0 +1,223 @@
+import datetime as dt
+import io
+import zipfile
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+from django.utils.translation import deactivate_all
+from openpyxl import load_workbook
+
+from workbench import factories
+from workbench.invoices.batch import for_pdf, render_invoices
+from workbench.invoices.models import Invoice
+from workbench.jobs.models import Job
+from workbench.jobs.runner import (
+    enqueue,
+    fail_stale_jobs,
+    prune_jobs,
+    run_next_job,
+)
+from workbench.tools.xlsx import XLSX_CONTENT_TYPE
+
+
+class JobsTest(TestCase):
+    def setUp(self):
+        deactivate_all()
+
+    @override_settings(BATCH_PDF_WORKERS=1)
+    def test_invoice_pdfs(self):
+        """Invoice PDFs are rendered into a downloadable ZIP in the background"""
+        invoice = factories.InvoiceFactory.create(title="Test")
+        second = factories.InvoiceFactory.create(customer=invoice.customer)
+        job = enqueue(
+            "invoice_pdfs",
+            created_by=invoice.owned_by,
+            parameters={"invoices": [second.id, invoice.id]},
+        )
+
+        self.client.force_login(invoice.owned_by)
+        response = self.client.get(job.urls["detail"])
+        self.assertContains(response, "Queued")
+        self.assertEqual(self.client.get(job.urls["download"]).status_code, 404)
+
+        self.assertEqual(run_next_job(), job)
+        self.assertIsNone(run_next_job())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual((job.progress, job.total), (2, 2))
+
+        response = self.client.get(job.urls["detail"] + "?format=json")
+        self.assertEqual(response.json()["status"], "done")
+        self.assertEqual(response.json()["download"], job.urls["download"])
+
+        response = self.client.get(job.urls["download"])
+        self.assertEqual(response["content-type"], "application/zip")
+        with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
+            self.assertEqual(
+                zf.namelist(), [f"{second.code}.pdf", f"{invoice.code}.pdf"]
+            )
+            self.assertTrue(zf.read(f"{invoice.code}.pdf").startswith(b"%PDF"))
+
+        self.client.force_login(factories.UserFactory.create())
+        self.assertEqual(self.client.get(job.urls["detail"]).status_code, 404)
+
+    def test_failing_job(self):
+        """Failing jobs are marked as failed and processed only once"""
+        user = factories.UserFactory.create()
+        job = enqueue("invoice_pdfs", created_by=user, parameters={})
+
+        with self.assertLogs("workbench.jobs.runner", "ERROR"):
+            call_command("run_jobs", "--once", stdout=io.StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn("KeyError", job.error)
+
+        self.client.force_login(user)
+        self.assertContains(self.client.get(job.urls["detail"]), "The job failed.")
+
+        with self.assertRaises(KeyError):
+            enqueue("unknown", created_by=user, parameters={})
+
+    def test_stale_jobs(self):
+        """Jobs of killed workers are failed after JOBS_STALE_AFTER"""
+        user = factories.UserFactory.create()
+        job = enqueue("key_data", created_by=user, parameters={})
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING,
+            started_at=timezone.now() - dt.timedelta(hours=5),
+            heartbeat_at=timezone.now() - dt.timedelta(hours=5),
+        )
+
+        # Progress reports keep long running jobs alive
+        job.set_progress(1, 10)
+        with override_settings(JOBS_STALE_AFTER=1800):
+            self.assertEqual(fail_stale_jobs(), 0)
+        Job.objects.filter(pk=job.pk).update(
+            heartbeat_at=timezone.now() - dt.timedelta(hours=1)
+        )
+
+        with override_settings(JOBS_STALE_AFTER=7200):
+            self.assertEqual(fail_stale_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+
+        with override_settings(JOBS_STALE_AFTER=1800):
+            self.assertIsNone(run_next_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIsNotNone(job.finished_at)
+        self.assertIn("did not report progress within 1800 seconds", job.error)
+
+        self.client.force_login(user)
+        self.assertContains(self.client.get(job.urls["detail"]), "The job failed.")
+
+    def test_render_invoices_in_processes(self):
+        """Invoices are rendered in worker processes without database access"""
+        invoice = factories.InvoiceFactory.create()
+        factories.InvoiceFactory.create(customer=invoice.customer)
+        invoices = list(for_pdf(Invoice.objects.order_by("id")))
+
+        rendered = list(render_invoices(invoices, workers=2))
+        self.assertEqual([invoice for invoice, pdf in rendered], invoices)
+        self.assertTrue(all(pdf.startswith(b"%PDF") for invoice, pdf in rendered))
+
+    def test_deduplication(self):
+        """Identical jobs are only queued once and recent artifacts are reused"""
+        user = factories.UserFactory.create()
+        parameters = {"date_range": [dt.date(2024, 1, 1), dt.date(2024, 12, 31)]}
+        job = enqueue("key_data", created_by=user, parameters=parameters)
+        self.assertEqual(job.parameters["date_range"], ["2024-01-01", "2024-12-31"])
+
+        self.assertEqual(
+            enqueue("key_data", created_by=user, parameters=parameters), job
+        )
+        self.assertNotEqual(
+            enqueue("labor_costs", created_by=user, parameters=parameters), job
+        )
+        self.assertNotEqual(
+            enqueue(
+                "key_data",
+                created_by=factories.UserFactory.create(),
+                parameters=parameters,
+            ),
+            job,
+        )
+
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.DONE, finished_at=timezone.now()
+        )
+        self.assertEqual(
+            enqueue("key_data", created_by=user, parameters=parameters), job
+        )
+
+        Job.objects.filter(pk=job.pk).update(
+            finished_at=timezone.now() - dt.timedelta(days=1)
+        )
+        second = enqueue("key_data", created_by=user, parameters=parameters)
+        self.assertNotEqual(second, job)
+
+        Job.objects.filter(pk=second.pk).update(
+            status=Job.FAILED, finished_at=timezone.now()
+        )
+        third = enqueue("key_data", created_by=user, parameters=parameters)
+        self.assertNotIn(third, {job, second})
+
+        # Jobs of crashed workers do not block new jobs
+        Job.objects.filter(pk=third.pk).update(
+            status=Job.RUNNING, started_at=timezone.now(), heartbeat_at=timezone.now()
+        )
+        self.assertEqual(
+            enqueue("key_data", created_by=user, parameters=parameters), third
+        )
+        Job.objects.filter(pk=third.pk).update(
+            heartbeat_at=timezone.now() - dt.timedelta(days=1)
+        )
+        fourth = enqueue("key_data", created_by=user, parameters=parameters)
+        self.assertNotIn(fourth, {job, second, third})
+
+        self.assertEqual(prune_jobs(), 0)
+        third.refresh_from_db()
+        self.assertEqual(third.status, Job.FAILED)
+
+        with override_settings(JOBS_RETENTION_DAYS=0):
+            self.assertEqual(prune_jobs(), 3)
+
+    def test_report_exports(self):
+        """Reports and XLSX exports are generated in the background"""
+        user = factories.UserFactory.create()
+        factories.LoggedHoursFactory.create(rendered_by=user)
+        self.client.force_login(user)
+
+        for url, content_type in [
+            ("/report/labor-costs/?export=xlsx", XLSX_CONTENT_TYPE),
+            ("/report/green-hours/?export=xlsx", XLSX_CONTENT_TYPE),
+            ("/report/key-data/?export=xlsx", XLSX_CONTENT_TYPE),
+            (
+                "/report/exports/?kind=squeeze&date_from=2024-01-01&export=1",
+                XLSX_CONTENT_TYPE,
+            ),
+            ("/report/exports/?kind=workload&export=1", XLSX_CONTENT_TYPE),
+            (
+                "/report/exports/?kind=paid_debtors&date_from=2024-01-01&export=1",
+                "application/zip",
+            ),
+        ]:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                job = Job.objects.latest("id")
+                self.assertRedirects(response, job.urls["detail"])
+                self.assertEqual(run_next_job(), job)
+
+                job.refresh_from_db()
+                self.assertEqual(job.status, Job.DONE, job.error)
+                response = self.client.get(job.urls["download"])
+                self.assertEqual(response["content-type"], content_type)
+                if content_type == XLSX_CONTENT_TYPE:
+                    load_workbook(io.BytesIO(response.content))
+
+        response = self.client.get("/report/exports/")
+        self.assertContains(response, job.urls["detail"])
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from workbench.jobs import views
+
+
+urlpatterns = [
+    path("<int:pk>/", views.job_detail, name="jobs_job_detail"),
+    path("<int:pk>/download/", views.job_download, name="jobs_job_download"),
+]
@@ -0,0 +1,44 @@
+from django.contrib import messages
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.translation import gettext as _
+
+from workbench.jobs.models import Job
+from workbench.jobs.runner import enqueue
+
+
+def _job(request, pk):
+    return get_object_or_404(
+        Job.objects.defer("artifact"), pk=pk, created_by=request.user
+    )
+
+
+def job_detail(request, pk):
+    job = _job(request, pk)
+    if request.GET.get("format") == "json":
+        return JsonResponse({
+            "status": job.status,
+            "progress": job.progress,
+            "total": job.total,
+            "download": job.urls["download"] if job.status == job.DONE else None,
+        })
+    return render(request, "jobs/job_detail.html", {"object": job})
+
+
+def job_download(request, pk):
+    job = _job(request, pk)
+    if job.status != job.DONE:
+        raise Http404
+    job.refresh_from_db(fields=["artifact"])
+    response = HttpResponse(bytes(job.artifact), content_type=job.content_type)
+    response["Content-Disposition"] = f'attachment; filename="{job.filename}"'
+    return response
+
+
+def enqueue_response(request, kind, parameters):
+    """
+    Queue a job (or find an identical one) and redirect to its page
+    """
+    job = enqueue(kind, created_by=request.user, parameters=parameters)
+    messages.info(request, _("The export is generated in the background."))
+    return redirect(job)
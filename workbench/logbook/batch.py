@@ -0,0 +1,304 @@
+"""
+Batched creation of logged hours and breaks
+
+Timer clients and imports commit many entries of one user at once. Entries
+are validated with the checks of ``LoggedHoursForm`` and ``BreakForm``, but
+services, timestamps, the hours and breaks per day and the latest logged
+hours are loaded once for the whole batch. Entries are validated in order
+and earlier entries of the batch count towards the day totals and the
+duplicate check of later entries. Either all entries are created in one
+transaction or none.
+"""
+
+import datetime as dt
+from collections import defaultdict
+from contextlib import suppress
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.text import capfirst
+from django.utils.timezone import localtime
+from django.utils.translation import gettext, gettext_lazy as _
+
+from workbench.accounts.features import FEATURES
+from workbench.accounts.models import take_a_break_message
+from workbench.logbook.forms import (
+    validate_break_day,
+    validate_duplicate,
+    validate_project,
+    validate_rendered_on,
+)
+from workbench.logbook.models import Break, LoggedHours
+from workbench.projects.models import Service
+from workbench.timer.models import Timestamp
+from workbench.tools.formats import Z1
+from workbench.tools.forms import Form
+from workbench.tools.validation import logbook_lock, raise_if_errors
+
+
+class EntryForm(Form):
+    type = forms.ChoiceField(
+        choices=[("hours", _("logged hours")), ("break", _("break"))]
+    )
+    timestamp = forms.IntegerField(required=False)
+    detected_ends_at = forms.DateTimeField(required=False)
+
+    def __init__(self, data, **kwargs):
+        self.batch = kwargs.pop("batch")
+        self.instance = None
+        # Date and time fields only parse strings; JSON numbers, lists and
+        # objects are stringified to produce validation errors instead
+        data = {
+            key: value if value is None or isinstance(value, str) else str(value)
+            for key, value in data.items()
+        }
+        super().__init__(data, request=None, **kwargs)
+
+    def _validate_instance(self, exclude):
+        try:
+            self.instance.full_clean(
+                exclude=exclude, validate_unique=False, validate_constraints=False
+            )
+        except ValidationError as exc:
+            self.add_error(None, exc)
+
+    def build_timestamp(self, **kwargs):
+        if pk := self.cleaned_data.get("timestamp"):
+            if timestamp := self.batch.timestamps.get(pk):
+                for key, value in kwargs.items():
+                    setattr(timestamp, key, value)
+                return timestamp
+        elif ends_at := self.cleaned_data.get("detected_ends_at"):
+            return Timestamp(
+                user=self.batch.user,
+                type=Timestamp.STOP,
+                created_at=ends_at,
+                notes=gettext("<detected>"),
+                **kwargs,
+            )
+        return None
+
+
+class LoggedHoursEntryForm(EntryForm):
+    rendered_on = forms.DateField()
+    service = forms.IntegerField()
+    hours = LoggedHours._meta.get_field("hours").formfield()
+    description = LoggedHours._meta.get_field("description").formfield()
+
+    def clean(self):
+        data = super().clean()
+        errors = {}
+        if data.get("service"):
+            data["service"] = self.batch.services.get(data["service"])
+            if data["service"]:
+                validate_project(self, errors, project=data["service"].project)
+            else:
+                errors["service"] = forms.ModelChoiceField.default_error_messages[
+                    "invalid_choice"
+                ]
+
+        user = data["rendered_by"] = self.batch.user
+        if data.get("rendered_on"):
+            validate_rendered_on(
+                self, errors, user=user, day=data["rendered_on"], lock=self.batch.lock
+            )
+
+        if (
+            data.get("rendered_on")
+            and data.get("hours")
+            and (
+                msg := self.batch.take_a_break_warning(
+                    day=data["rendered_on"], add=data["hours"]
+                )
+            )
+        ):
+            self.add_warning(msg, code="take-a-break")
+
+        if self.batch.latest:
+            validate_duplicate(self, data, latest=self.batch.latest)
+
+        raise_if_errors(errors)
+        if self.errors:
+            return data
+
+        self.instance = LoggedHours(
+            service=data["service"],
+            created_by=user,
+            rendered_by=user,
+            rendered_on=data["rendered_on"],
+            hours=data["hours"],
+            description=data["description"],
+        )
+        self._validate_instance([
+            "service",
+            "created_by",
+            "rendered_by",
+            "invoice_service",
+        ])
+        return data
+
+    def validated(self):
+        self.batch.hours[self.instance.rendered_on] += self.instance.hours
+        self.batch.latest = self.instance
+
+    def build_timestamp(self):
+        return super().build_timestamp(logged_hours=self.instance)
+
+
+class BreakEntryForm(EntryForm):
+    day = forms.DateField(label=capfirst(_("day")))
+    starts_at = forms.TimeField(label=capfirst(_("starts at")))
+    ends_at = forms.TimeField(label=capfirst(_("ends at")))
+    description = Break._meta.get_field("description").formfield()
+
+    def clean(self):
+        data = super().clean()
+        errors = {}
+        if data.get("day"):
+            validate_break_day(errors, day=data["day"], lock=self.batch.lock)
+        raise_if_errors(errors)
+        if self.errors:
+            return data
+
+        self.instance = Break(
+            user=self.batch.user,
+            starts_at=timezone.make_aware(
+                dt.datetime.combine(data["day"], data["starts_at"])
+            ),
+            ends_at=timezone.make_aware(
+                dt.datetime.combine(data["day"], data["ends_at"])
+            ),
+            description=data.get("description", ""),
+        )
+        self._validate_instance(["user"])
+        return data
+
+    def validated(self):
+        self.batch.break_seconds[self.cleaned_data["day"]] += int(
+            self.instance.timedelta.total_seconds()
+        )
+
+    def build_timestamp(self):
+        return super().build_timestamp(logged_break=self.instance)
+
+
+ENTRY_FORMS = {"hours": LoggedHoursEntryForm, "break": BreakEntryForm}
+
+
+def _ids(entries, field):
+    ids = set()
+    for entry in entries:
+        with suppress(TypeError, ValueError):
+            ids.add(int(entry.get(field)))
+    return ids
+
+
+class LogbookBatch:
+    """
+    Validate and create logged hours and breaks of a user
+
+    ``entries`` is a list of dictionaries with a ``type`` of ``"hours"`` or
+    ``"break"`` and the fields of ``LoggedHoursForm`` respectively
+    ``BreakForm``. New services cannot be created. Entries may reference a
+    ``timestamp`` of the user or pass a ``detected_ends_at`` value, the same
+    way as the query string of the logbook forms.
+
+    ``results`` contains a dictionary of ``errors`` and ``warnings`` for
+    each entry after validation and the ``id`` of the created object after
+    saving. Warnings are keyed by their code; the batch is valid if no
+    entry has errors and all warnings codes are in ``ignore_warnings``.
+    """
+
+    def __init__(self, entries, *, user, ignore_warnings=()):
+        self.user = user
+        self.ignore_warnings = set(ignore_warnings)
+        self.lock = logbook_lock()
+
+        self.services = (
+            Service.objects.logging()
+            .filter(id__in=_ids(entries, "service"))
+            .select_related("project")
+            .in_bulk()
+        )
+        self.timestamps = Timestamp.objects.filter(
+            user=user, id__in=_ids(entries, "timestamp")
+        ).in_bulk()
+        self.latest = (
+            LoggedHours.objects.filter(rendered_by=user)
+            .select_related("rendered_by", "service")
+            .order_by("-pk")
+            .first()
+        )
+        self.forms = [
+            ENTRY_FORMS.get(entry.get("type"), LoggedHoursEntryForm)(entry, batch=self)
+            for entry in entries
+        ]
+        self._load_days()
+        self.results = []
+
+    def _load_days(self):
+        self.hours = defaultdict(lambda: Z1)
+        self.break_seconds = defaultdict(int)
+        if not self.user.features[FEATURES.BREAKS_NAG]:
+            return
+
+        days = set()
+        for form in self.forms:
+            for field in ("rendered_on", "day"):
+                with suppress(ValidationError):
+                    days.add(forms.DateField().to_python(form.data.get(field)))
+        days.discard(None)
+        self.hours.update(
+            self.user.loggedhours.filter(rendered_on__in=days)
+            .order_by()
+            .values("rendered_on")
+            .annotate(h=Sum("hours"))
+            .values_list("rendered_on", "h")
+        )
+        for brk in self.user.breaks.filter(starts_at__date__in=days):
+            self.break_seconds[localtime(brk.starts_at).date()] += int(
+                brk.timedelta.total_seconds()
+            )
+
+    def take_a_break_warning(self, *, day, add):
+        if not self.user.features[FEATURES.BREAKS_NAG]:
+            return None
+        return take_a_break_message(
+            hours=self.hours[day] + add, break_seconds=self.break_seconds[day]
+        )
+
+    def is_valid(self):
+        self.results = []
+        valid = True
+        for form in self.forms:
+            if not form.errors:
+                form.validated()
+            self.results.append({
+                "errors": form.errors.get_json_data(),
+                "warnings": {code: str(msg) for code, msg in form.warnings.items()},
+            })
+            if form.errors or not set(form.warnings) <= self.ignore_warnings:
+                valid = False
+        return valid
+
+    def save(self):
+        hours = [f.instance for f in self.forms if isinstance(f, LoggedHoursEntryForm)]
+        breaks = [f.instance for f in self.forms if isinstance(f, BreakEntryForm)]
+        with transaction.atomic():
+            LoggedHours.objects.bulk_create(hours)
+            Break.objects.bulk_create(breaks)
+
+            timestamps = {}
+            for form in self.forms:
+                if timestamp := form.build_timestamp():
+                    timestamps[timestamp.pk or id(timestamp)] = timestamp
+            existing = [t for t in timestamps.values() if t.pk]
+            Timestamp.objects.bulk_create(t for t in timestamps.values() if not t.pk)
+            Timestamp.objects.bulk_update(existing, ["logged_hours", "logged_break"])
+
+        for form, result in zip(self.forms, self.results):
+            result["id"] = form.instance.pk
+        return [form.instance for form in self.forms]
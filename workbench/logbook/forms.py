@@ -333,6 +333,59 @@ class LoggedCostSearchForm(Form):
         return None
 
 
+def validate_project(form, errors, *, project):
+    if project.closed_on:
+        if project.is_logbook_locked:
+            errors["__all__"] = _("This project has been closed too long ago.")
+        else:
+            form.add_warning(
+                _("This project has been closed recently."), code="project-closed"
+            )
+
+
+def validate_rendered_on(form, errors, *, user, day, lock):
+    if user.features[FEATURES.LATE_LOGGING]:
+        # Fine
+        pass
+    elif day < lock:
+        errors["rendered_on"] = _("Hours have to be logged in the same week.")
+    elif day > in_days(7):
+        errors["rendered_on"] = _("That's too far in the future.")
+    elif day > in_days(1):
+        form.add_warning(
+            _(
+                "Logging (too) early is certainly better than logging (too) late, but are you sure this is correct?"
+            ),
+            code="maybe-too-early",
+        )
+
+    if user.features[FEATURES.LATE_LOGGING_NAG] and lock <= day < in_days(-2):
+        form.add_warning(
+            _(
+                "You are a bit late. Please try logging your hours immediately upon finishing work."
+            ),
+            code="you-are-late",
+        )
+
+
+def validate_duplicate(form, data, *, latest):
+    fields = ["rendered_by", "rendered_on", "service", "hours", "description"]
+    for field in fields:
+        if data.get(field) != getattr(latest, field):
+            break
+    else:
+        form.add_warning(
+            _("This seems to be a duplicate. Is it?"), code="maybe-duplicate"
+        )
+
+
+def validate_break_day(errors, *, day, lock):
+    if day < lock - dt.timedelta(days=7):
+        errors["day"] = _("Breaks have to be logged promptly.")
+    elif day > in_days(7):
+        errors["day"] = _("That's too far in the future.")
+
+
 @add_prefix("modal")
 class LoggedHoursForm(ModelForm):
     user_fields = default_to_current_user = ("rendered_by",)
@@ -428,13 +481,7 @@ class LoggedHoursForm(ModelForm):
             errors["service"] = _(
                 "Deselect the existing service if you want to create a new service."
             )
-        if self.project.closed_on:
-            if self.project.is_logbook_locked:
-                errors["__all__"] = _("This project has been closed too long ago.")
-            else:
-                self.add_warning(
-                    _("This project has been closed recently."), code="project-closed"
-                )
+        validate_project(self, errors, project=self.project)
         if self.instance.invoice_service:
             self.add_warning(
                 _("This entry is already part of an invoice."), code="part-of-invoice"
@@ -451,30 +498,13 @@ class LoggedHoursForm(ModelForm):
         if all(
             f in self.fields and data.get(f) for f in ["rendered_by", "rendered_on"]
         ) and (not self.instance.pk or ("rendered_on" in self.changed_data)):
-            if data["rendered_by"].features[FEATURES.LATE_LOGGING]:
-                # Fine
-                pass
-            elif data["rendered_on"] < logbook_lock():
-                errors["rendered_on"] = _("Hours have to be logged in the same week.")
-            elif data["rendered_on"] > in_days(7):
-                errors["rendered_on"] = _("That's too far in the future.")
-            elif data["rendered_on"] > in_days(1):
-                self.add_warning(
-                    _(
-                        "Logging (too) early is certainly better than logging (too) late, but are you sure this is correct?"
-                    ),
-                    code="maybe-too-early",
-                )
-
-            if data["rendered_by"].features[
-                FEATURES.LATE_LOGGING_NAG
-            ] and logbook_lock() <= data["rendered_on"] < in_days(-2):
-                self.add_warning(
-                    _(
-                        "You are a bit late. Please try logging your hours immediately upon finishing work."
-                    ),
-                    code="you-are-late",
-                )
+            validate_rendered_on(
+                self,
+                errors,
+                user=data["rendered_by"],
+                day=data["rendered_on"],
+                lock=logbook_lock(),
+            )
 
         if (
             all(data.get(f) for f in ["rendered_by", "rendered_on", "hours"])
@@ -493,14 +523,7 @@ class LoggedHoursForm(ModelForm):
         except LoggedHours.DoesNotExist:
             pass
         else:
-            fields = ["rendered_by", "rendered_on", "service", "hours", "description"]
-            for field in fields:
-                if data.get(field) != getattr(latest, field):
-                    break
-            else:
-                self.add_warning(
-                    _("This seems to be a duplicate. Is it?"), code="maybe-duplicate"
-                )
+            validate_duplicate(self, data, latest=latest)
 
         raise_if_errors(errors)
         return data
@@ -736,10 +759,7 @@ class BreakForm(ModelForm):
         data = super().clean()
         errors = {}
         if data.get("day"):
-            if data["day"] < logbook_lock() - dt.timedelta(days=7):
-                errors["day"] = _("Breaks have to be logged promptly.")
-            elif data["day"] > in_days(7):
-                errors["day"] = _("That's too far in the future.")
+            validate_break_day(errors, day=data["day"], lock=logbook_lock())
 
         raise_if_errors(errors)
 
@@ -1,17 +1,23 @@
 import datetime as dt
+import io
+import json
 
+from django.db import connection
 from django.test import TestCase
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.utils import timezone
+from openpyxl import load_workbook
 from time_machine import travel
 
 from workbench import factories
 from workbench.accounts.features import FEATURES, F
 from workbench.logbook.models import LoggedCost, LoggedHours
 from workbench.projects.models import Project
+from workbench.timer.models import Timestamp
 from workbench.tools.forms import WarningsForm
 from workbench.tools.testing import check_code, messages
 from workbench.tools.validation import in_days, logbook_lock
+from workbench.tools.xlsx import WorkbenchXLSXDocument
 
 
 @override_settings(
@@ -83,6 +89,116 @@ class LogbookTest(TestCase):
         response = send()
         self.assertContains(response, "This project has been closed too long ago.")
 
+    def test_create_logbook_entries(self):
+        """Batches of logged hours and breaks are validated and created at once"""
+        service = factories.ServiceFactory.create()
+        user = service.project.owned_by
+        timestamp = user.timestamp_set.create(type=Timestamp.STOP)
+        today = dt.date.today().isoformat()
+
+        def send(entries, **kwargs):
+            return self.client.post(
+                f"/create-logbook-entries/?token={user.token}",
+                json.dumps({"entries": entries, **kwargs}),
+                content_type="application/json",
+                headers={"accept-language": "en"},
+            )
+
+        def hours(**kwargs):
+            return {
+                "type": "hours",
+                "service": service.id,
+                "rendered_on": today,
+                "hours": "3.0",
+                "description": "Test",
+                **kwargs,
+            }
+
+        brk = {
+            "type": "break",
+            "day": today,
+            "starts_at": "12:00",
+            "ends_at": "12:10",
+            "detected_ends_at": timezone.now().isoformat(),
+        }
+
+        response = send({})
+        self.assertEqual(response.status_code, 400)
+        response = send([hours(type=["hours"])])
+        self.assertEqual(response.status_code, 400)
+        response = send([hours()], ignore_warnings="take-a-break")
+        self.assertEqual(response.status_code, 400)
+        response = send([hours()], ignore_warnings=[{"code": "take-a-break"}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(LoggedHours.objects.count(), 0)
+
+        response = send([
+            hours(service=-42),
+            hours(rendered_on=in_days(10).isoformat()),
+            {**brk, "ends_at": "11:00"},
+            hours(description="Test 2", hours="x"),
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = [entry["errors"] for entry in response.json()["entries"]]
+        self.assertEqual(errors[0]["service"][0]["code"], "")
+        self.assertEqual(
+            errors[1]["rendered_on"][0]["message"], "That's too far in the future."
+        )
+        self.assertEqual(
+            errors[2]["ends_at"][0]["message"],
+            "Breaks should end later than they begin.",
+        )
+        self.assertEqual(list(errors[3]), ["hours"])
+
+        entries = [hours(timestamp=timestamp.id), hours(description="Test 2"), brk]
+        with override_settings(FEATURES={FEATURES.BREAKS_NAG: F.ALWAYS}):
+            response = send(entries)
+            self.assertEqual(response.status_code, 400)
+            warnings = [entry["warnings"] for entry in response.json()["entries"]]
+            self.assertEqual([list(w) for w in warnings], [[], ["take-a-break"], []])
+            self.assertEqual(LoggedHours.objects.count(), 0)
+
+            # Dates and times have to be strings
+            response = send([
+                hours(rendered_on=20240101),
+                {**brk, "day": [today], "starts_at": 12, "detected_ends_at": {}},
+            ])
+            self.assertEqual(response.status_code, 400)
+            errors = [entry["errors"] for entry in response.json()["entries"]]
+            self.assertEqual(list(errors[0]), ["rendered_on"])
+            self.assertEqual(set(errors[1]), {"day", "starts_at", "detected_ends_at"})
+
+            response = send(entries, ignore_warnings=["take-a-break"])
+            self.assertEqual(response.status_code, 201)
+
+        ids = [entry["id"] for entry in response.json()["entries"]]
+        self.assertEqual(
+            [h.description for h in LoggedHours.objects.filter(id__in=ids[:2])],
+            ["Test 2", "Test"],
+        )
+        timestamp.refresh_from_db()
+        self.assertEqual(timestamp.logged_hours_id, ids[0])
+        self.assertEqual(Timestamp.objects.get(logged_break=ids[2]).type, "stop")
+
+        response = send([hours(description="Test 3"), hours(description="Test 3")])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()["entries"][1]["warnings"],
+            {"maybe-duplicate": "This seems to be a duplicate. Is it?"},
+        )
+
+        # The number of queries does not depend on the number of entries
+        with CaptureQueriesContext(connection) as small:
+            response = send([hours(description="Test 4", hours="0.1"), brk])
+        self.assertEqual(response.status_code, 201)
+        with CaptureQueriesContext(connection) as large:
+            response = send(
+                [hours(description=f"Test {i}", hours="0.1") for i in range(5, 15)]
+                + [brk] * 5
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(large), len(small))
+
     def test_move_to_past_week_forbidden(self):
         """Moving hours into the past week is not allowed"""
         hours = factories.LoggedHoursFactory.create()
@@ -460,6 +576,42 @@ class LogbookTest(TestCase):
         code("not_archived=1")
         code("export=xlsx")
 
+    def test_logged_hours_export(self):
+        """The logged hours export runs a constant number of queries"""
+        service1 = factories.ServiceFactory.create(
+            title="First", effort_type="Consulting", effort_rate=100
+        )
+        service2 = factories.ServiceFactory.create(
+            project=service1.project, title="Second"
+        )
+        for day in range(20):
+            factories.LoggedHoursFactory.create(
+                service=service1 if day % 2 else service2,
+                rendered_on=dt.date(2024, 1 + day % 3, 1 + day),
+                hours=1 + day % 4,
+                description=f"Work {day}",
+            )
+
+        xlsx = WorkbenchXLSXDocument()
+        with self.assertNumQueries(7):
+            xlsx.logged_hours(LoggedHours.objects.all())
+
+        with io.BytesIO() as buf:
+            xlsx.workbook.save(buf)
+            workbook = load_workbook(buf, read_only=True)
+            sheets = [
+                list(sheet.iter_rows(values_only=True)) for sheet in workbook.worksheets
+            ]
+
+        hours, _by_user, by_month, _by_user_and_month = sheets
+        self.assertEqual(len(hours), 21)
+        self.assertEqual(hours[1][0], "First: Work 17")
+        self.assertEqual(by_month[1][3], 50)
+        self.assertEqual(
+            [row[1:5] for row in by_month[2:]],
+            [("First", 100, 30, 3000), ("Second", "-", 20, "-")],
+        )
+
     def test_non_ajax_redirect_hours(self):
         """Non-AJAX requests to logged hours produce redirects"""
         hours = factories.LoggedHoursFactory.create()
@@ -4,15 +4,20 @@ from django.utils.translation import activate
 
 from workbench.accounts.middleware import set_user_name
 from workbench.accounts.tasks import coffee_invites
-from workbench.audit.tasks import prune_audit
+from workbench.audit.tasks import create_audit_partitions, prune_audit
 from workbench.awt.tasks import annual_working_time_warnings_mails
 from workbench.invoices.tasks import (
     create_recurring_invoices_and_notify,
     send_unsent_projected_invoices_reminders,
     tuesday_autodunning,
 )
+from workbench.jobs.runner import prune_jobs
+from workbench.planning.cube import extend_calendar
 from workbench.planning.updates import changes_mails
-from workbench.reporting.tasks import create_accruals_for_last_month
+from workbench.reporting.tasks import (
+    create_accruals_for_last_month,
+    refresh_key_data_facts,
+)
 
 
 class Command(BaseCommand):
@@ -22,10 +27,14 @@ class Command(BaseCommand):
         activate(settings.WORKBENCH.PDF_LANGUAGE)
         set_user_name("Fairy tasks")
         create_accruals_for_last_month()
+        refresh_key_data_facts()
         create_recurring_invoices_and_notify()
         coffee_invites()
         changes_mails()
         annual_working_time_warnings_mails()
         send_unsent_projected_invoices_reminders()
         tuesday_autodunning()
+        create_audit_partitions()
         prune_audit()
+        prune_jobs()
+        extend_calendar()
@@ -0,0 +1,36 @@
+import datetime as dt
+
+from django.core.management import BaseCommand
+
+from workbench.management.commands.squeeze import range_type
+from workbench.reporting.key_data import invalidate_key_data, refresh_key_data
+from workbench.tools.formats import local_date_format
+
+
+class Command(BaseCommand):
+    help = "Backfill or invalidate the monthly key data facts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--range",
+            type=range_type,
+            help="Specify as YYYYMMDD-YYYYMMDD, defaults to the last two years",
+        )
+        parser.add_argument(
+            "--invalidate",
+            action="store_true",
+            help="Only remove stored facts, they are recomputed when needed",
+        )
+
+    def handle(self, **options):
+        if not (date_range := options["range"]):
+            today = dt.date.today()
+            date_range = [today.replace(year=today.year - 2, day=1), today]
+
+        pretty = " - ".join(local_date_format(day) for day in date_range)
+        if options["invalidate"]:
+            invalidate_key_data(date_range)
+            self.stdout.write(f"Invalidated key data facts {pretty}.")
+        else:
+            refresh_key_data(date_range)
+            self.stdout.write(f"Refreshed key data facts {pretty}.")
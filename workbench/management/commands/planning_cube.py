@@ -0,0 +1,26 @@
+from django.core.management import BaseCommand, CommandError
+
+from workbench.planning import cube
+
+
+class Command(BaseCommand):
+    help = "Rebuild or check the weekly planning cube"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only compare the cube with planned work and absences",
+        )
+
+    def handle(self, **options):
+        if not options["check"]:
+            cube.rebuild()
+            self.stdout.write("Rebuilt the planning cube.")
+
+        if problems := cube.check():
+            for problem in problems:
+                self.stderr.write(problem)
+            raise CommandError(f"Found {len(problems)} problems.")
+
+        self.stdout.write("The planning cube is consistent.")
@@ -0,0 +1,60 @@
+import time
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import connections
+from django.utils.translation import activate
+
+from workbench.accounts.middleware import set_user_name
+from workbench.jobs.runner import run_next_job
+
+
+class Command(BaseCommand):
+    help = "Process queued background jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit as soon as the queue is empty",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2,
+            help="Seconds to wait when the queue is empty (default %(default)s)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of worker processes (default %(default)s)",
+        )
+
+    def handle(self, **options):
+        if options["workers"] <= 1:
+            self.work(options)
+            return
+
+        # Forked workers must not share the database connection of the parent
+        connections.close_all()
+        processes = [
+            get_context("fork").Process(target=self.work, args=(options,))
+            for _i in range(options["workers"])
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+    def work(self, options):
+        activate(settings.WORKBENCH.PDF_LANGUAGE)
+        set_user_name("Jobs")
+        while True:
+            if job := run_next_job():
+                self.stdout.write(f"Job {job.pk} {job.kind}: {job.status}")
+            elif options["once"]:
+                break
+            else:
+                time.sleep(options["sleep"])
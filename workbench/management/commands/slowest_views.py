@@ -0,0 +1,43 @@
+import datetime as dt
+
+from django.core.management import BaseCommand
+
+from workbench.reporting.view_statistics import ORDERINGS, slowest_views
+from workbench.tools.validation import in_days
+
+
+class Command(BaseCommand):
+    help = "Dump the slowest views recorded by the view statistics middleware"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=7, help="Days to include, defaults to 7"
+        )
+        parser.add_argument(
+            "--order-by",
+            choices=list(ORDERINGS),
+            default="time",
+            help="Order by this average, defaults to the time",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=20, help="Views to show, defaults to 20"
+        )
+
+    def handle(self, **options):
+        rows = slowest_views(
+            [in_days(1 - options["days"]), dt.date.today()],
+            order_by=options["order_by"],
+            limit=options["limit"],
+        )
+        self.stdout.write(
+            f"{'view':<50} {'method':<7} {'requests':>8} {'queries':>8}"
+            f" {'max':>5} {'db ms':>8} {'py ms':>8} {'max ms':>8} {'bytes':>10}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['view_name'][:50]:<50} {row['method']:<7}"
+                f" {row['requests']:>8} {row['avg_queries']:>8.1f}"
+                f" {row['max_queries']:>5} {row['avg_db_time']:>8.1f}"
+                f" {row['avg_python_time']:>8.1f} {row['max_time']:>8.1f}"
+                f" {row['avg_response_size']:>10.0f}"
+            )
@@ -13,6 +13,7 @@ from django.utils.translation import gettext_lazy as _
 
 from workbench.accounts.models import User
 from workbench.projects.models import Project, Service
+from workbench.services.models import service_batch
 from workbench.tools.formats import Z2, local_date_format
 from workbench.tools.models import ModelWithTotal, SearchQuerySet
 from workbench.tools.urls import model_urls
@@ -346,21 +347,23 @@ class Offer(ModelWithTotal):
             liable_to_vat=self.liable_to_vat,
             show_service_details=self.show_service_details,
         )
-        for service in self.services.all():
-            new = Service(
-                project=project,
-                offer=offer,
-                allow_logging=service.allow_logging,
-                is_optional=service.is_optional,
-                title=service.title,
-                description=service.description,
-                position=service.position,
-                effort_type=service.effort_type,
-                effort_hours=service.effort_hours,
-                effort_rate=service.effort_rate,
-                cost=service.cost,
-                third_party_costs=service.third_party_costs,
-            )
-            new.save(skip_related_model=True)
-        offer.save()
+        with service_batch() as batch:
+            for service in self.services.all():
+                batch.add(
+                    Service(
+                        project=project,
+                        offer=offer,
+                        allow_logging=service.allow_logging,
+                        is_optional=service.is_optional,
+                        title=service.title,
+                        description=service.description,
+                        position=service.position,
+                        effort_type=service.effort_type,
+                        effort_hours=service.effort_hours,
+                        effort_rate=service.effort_rate,
+                        cost=service.cost,
+                        third_party_costs=service.third_party_costs,
+                    )
+                )
+            batch.recalculate(offer)
         return offer
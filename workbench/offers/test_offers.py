@@ -11,7 +11,8 @@ from workbench import factories
 from workbench.accounts.features import FEATURES, F
 from workbench.audit.models import LoggedAction
 from workbench.offers.models import Offer
-from workbench.projects.models import Project
+from workbench.projects.models import Project, Service
+from workbench.services.models import service_batch
 from workbench.tools.formats import local_date_format
 from workbench.tools.forms import WarningsForm
 from workbench.tools.testing import check_code, messages
@@ -643,3 +644,41 @@ class OffersTest(TestCase):
         """Offer property testing"""
         self.assertTrue(Offer(status=Offer.ACCEPTED).is_accepted)
         self.assertTrue(Offer(status=Offer.DECLINED).is_declined)
+
+    def test_service_batch(self):
+        """Batched service writes recalculate each offer only once"""
+        offer = factories.OfferFactory.create()
+        other = factories.OfferFactory.create(project=offer.project)
+        existing = factories.ServiceFactory.create(
+            offer=offer, project=offer.project, cost=10
+        )
+
+        with self.assertNumQueries(7), service_batch() as batch:
+            # insert, update and one save for each offer
+            for offer_ in [offer, other, offer]:
+                batch.add(Service(offer=offer_, project=offer.project, cost=100))
+            existing.cost = 20
+            batch.update(existing)
+
+        offer.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(offer.subtotal, 220)
+        self.assertEqual(other.subtotal, 100)
+        self.assertEqual(
+            [service.position for service in offer.services.all()],
+            [existing.position, existing.position + 10, existing.position + 20],
+        )
+        self.assertEqual([service.position for service in other.services.all()], [10])
+
+        actions = LoggedAction.objects.for_model(offer).with_data(id=offer.id)
+        self.assertEqual([action.action for action in actions], ["I", "U", "U", "U"])
+
+    def test_copy_to_queries(self):
+        """Copying offers does not need queries per service"""
+        offer = factories.OfferFactory.create()
+        for _i in range(20):
+            factories.ServiceFactory.create(offer=offer, project=offer.project)
+
+        with self.assertNumQueries(10):
+            copy = offer.copy_to(project=offer.project, owned_by=offer.owned_by)
+        self.assertEqual(copy.services.count(), 20)
@@ -1,3 +1,6 @@
+import io
+from functools import partial
+
 from django.contrib import messages
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
@@ -7,31 +10,48 @@ from workbench import generic
 from workbench.offers.forms import OfferCopyForm, OfferDeleteForm
 from workbench.offers.models import Offer
 from workbench.projects.models import Project
-from workbench.tools.pdf import pdf_response
+from workbench.tools import pdf_cache
+from workbench.tools.pdf import PDFDocument, pdf_response
+
+
+def render_offer(offer):
+    with io.BytesIO() as buf:
+        pdf = PDFDocument(buf)
+        pdf.init_letter()
+        pdf.process_offer(offer)
+        pdf.generate()
+        return buf.getvalue()
 
 
 class OfferPDFView(generic.DetailView):
     model = Offer
 
+    def get_queryset(self):
+        return (
+            super()
+            .get_queryset()
+            .select_related("project", "owned_by")
+            .prefetch_related("services")
+        )
+
     def get(self, request, *args, **kwargs):
         self.object = self.get_object()
 
-        pdf, response = pdf_response(
-            self.object.code,
-            as_attachment=request.GET.get("disposition") == "attachment",
-        )
-
         try:
-            pdf.init_letter()
-            pdf.process_offer(self.object)
-            pdf.generate()
+            pdf = pdf_cache.get_or_render(
+                self.object, partial(render_offer, self.object)
+            )
         except Exception as exc:
             messages.error(
                 request, gettext("Unable to generate the PDF: {}").format(exc)
             )
             return redirect(self.object)
 
-        return response
+        return pdf_cache.pdf_bytes_response(
+            self.object.code,
+            pdf,
+            as_attachment=request.GET.get("disposition") == "attachment",
+        )
 
 
 class ProjectOfferPDFView(generic.DetailView):
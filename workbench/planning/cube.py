@@ -0,0 +1,309 @@
+"""
+Weekly planning cube and daily calendar
+
+Planned work is stored as arrays of weeks. Expanding them to weekly rows on
+every planning request is expensive, so a database trigger keeps a per-week
+copy in ``planning_plannedworkweek``.
+
+Employments, absences and public holidays are expanded into one row per user
+and day in ``planning_calendarday``, containing the employment percentage
+(``NULL`` when not employed), the absence days and the fraction of public
+holidays. Absence days are distributed evenly over the calendar days of the
+absence, the same way the annual working time report does. Capacity and
+workload reports are aggregates over this table. Triggers on the source
+tables recompute the affected days; rows end with
+``planning_calendar_until()``, the end of the year after next, and are
+extended by the fairy tasks.
+
+The migrations contain copies of the SQL as it was when they were written;
+changing the SQL here requires a new migration applying it.
+"""
+
+import datetime as dt
+from collections import Counter
+
+from django.db import connections
+
+from workbench.tools.reporting import query
+
+
+#: Calendar rows of ``user_ids`` (all users if ``NULL``) between
+#: ``from_date`` and ``until_date``, the body of ``planning_calendar_days()``
+CALENDAR_DAYS = """\
+SELECT
+  user_id,
+  day,
+  sum(percentage),
+  sum(absence_days),
+  coalesce((SELECT sum(fraction) FROM planning_publicholiday WHERE date=day), 0)
+FROM (
+  SELECT e.user_id, d::date AS day, e.percentage, 0 AS absence_days
+  FROM awt_employment e, generate_series(
+    greatest(e.date_from, from_date), least(e.date_until, until_date), '1 day'
+  ) AS d
+  WHERE (user_ids IS NULL OR e.user_id = ANY(user_ids))
+    AND e.date_from <= until_date AND e.date_until >= from_date
+
+  UNION ALL
+
+  SELECT
+    a.user_id,
+    d::date,
+    NULL,
+    a.days / (coalesce(a.ends_on, a.starts_on) - a.starts_on + 1)
+  FROM awt_absence a, generate_series(
+    greatest(a.starts_on, from_date),
+    least(coalesce(a.ends_on, a.starts_on), until_date),
+    '1 day'
+  ) AS d
+  WHERE (user_ids IS NULL OR a.user_id = ANY(user_ids))
+    AND a.starts_on <= until_date
+    AND coalesce(a.ends_on, a.starts_on) >= from_date
+) AS days
+GROUP BY user_id, day\
+"""
+
+TRIGGERS = """\
+CREATE OR REPLACE FUNCTION planning_plannedworkweek_sync() RETURNS trigger AS $$
+begin
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    DELETE FROM planning_plannedworkweek WHERE planned_work_id = OLD.id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO planning_plannedworkweek
+      (planned_work_id, user_id, project_id, offer_id, week, hours, is_provisional)
+    SELECT
+      NEW.id, NEW.user_id, NEW.project_id, NEW.offer_id, week,
+      NEW.planned_hours / cardinality(NEW.weeks), NEW.is_provisional
+    FROM unnest(NEW.weeks) AS week;
+  END IF;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS planning_plannedworkweek_trigger ON planning_plannedwork;
+CREATE TRIGGER planning_plannedworkweek_trigger AFTER INSERT OR UPDATE OR DELETE
+  ON planning_plannedwork FOR EACH ROW EXECUTE PROCEDURE planning_plannedworkweek_sync();
+
+"""
+
+CALENDAR_TRIGGERS = f"""\
+CREATE OR REPLACE FUNCTION planning_calendar_until() RETURNS date AS $$
+  SELECT (date_trunc('year', current_date) + interval '3 years')::date - 1;
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION planning_calendar_days(
+  user_ids integer[], from_date date, until_date date
+) RETURNS TABLE (
+  user_id integer,
+  day date,
+  percentage bigint,
+  absence_days numeric,
+  holiday_fraction numeric
+) AS $$
+{CALENDAR_DAYS}
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION planning_calendar_refresh(
+  user_ids integer[], from_date date, until_date date
+) RETURNS void AS $$
+begin
+  until_date := least(until_date, planning_calendar_until());
+  DELETE FROM planning_calendarday
+  WHERE (user_ids IS NULL OR user_id = ANY(user_ids))
+    AND day BETWEEN from_date AND until_date;
+  INSERT INTO planning_calendarday
+    (user_id, day, percentage, absence_days, holiday_fraction)
+  SELECT * FROM planning_calendar_days(user_ids, from_date, until_date);
+end
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION planning_calendar_employment() RETURNS trigger AS $$
+begin
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM planning_calendar_refresh(
+      ARRAY[OLD.user_id], OLD.date_from, OLD.date_until
+    );
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM planning_calendar_refresh(
+      ARRAY[NEW.user_id], NEW.date_from, NEW.date_until
+    );
+  END IF;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS planning_calendar_trigger ON awt_employment;
+CREATE TRIGGER planning_calendar_trigger AFTER INSERT OR UPDATE OR DELETE
+  ON awt_employment FOR EACH ROW EXECUTE PROCEDURE planning_calendar_employment();
+
+CREATE OR REPLACE FUNCTION planning_calendar_absence() RETURNS trigger AS $$
+begin
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM planning_calendar_refresh(
+      ARRAY[OLD.user_id], OLD.starts_on, coalesce(OLD.ends_on, OLD.starts_on)
+    );
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM planning_calendar_refresh(
+      ARRAY[NEW.user_id], NEW.starts_on, coalesce(NEW.ends_on, NEW.starts_on)
+    );
+  END IF;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS planning_calendar_trigger ON awt_absence;
+CREATE TRIGGER planning_calendar_trigger AFTER INSERT OR UPDATE OR DELETE
+  ON awt_absence FOR EACH ROW EXECUTE PROCEDURE planning_calendar_absence();
+
+CREATE OR REPLACE FUNCTION planning_calendar_publicholiday() RETURNS trigger AS $$
+begin
+  UPDATE planning_calendarday
+  SET holiday_fraction=coalesce(
+    (SELECT sum(fraction) FROM planning_publicholiday WHERE date=day), 0
+  )
+  WHERE day IN (
+    CASE WHEN TG_OP <> 'INSERT' THEN OLD.date END,
+    CASE WHEN TG_OP <> 'DELETE' THEN NEW.date END
+  );
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS planning_calendar_trigger ON planning_publicholiday;
+CREATE TRIGGER planning_calendar_trigger AFTER INSERT OR UPDATE OR DELETE
+  ON planning_publicholiday FOR EACH ROW
+  EXECUTE PROCEDURE planning_calendar_publicholiday();
+"""
+
+DROP_TRIGGERS = """\
+DROP TRIGGER IF EXISTS planning_plannedworkweek_trigger ON planning_plannedwork;
+DROP FUNCTION IF EXISTS planning_plannedworkweek_sync();
+"""
+
+DROP_CALENDAR_TRIGGERS = """\
+DROP TRIGGER IF EXISTS planning_calendar_trigger ON awt_employment;
+DROP TRIGGER IF EXISTS planning_calendar_trigger ON awt_absence;
+DROP TRIGGER IF EXISTS planning_calendar_trigger ON planning_publicholiday;
+DROP FUNCTION IF EXISTS planning_calendar_employment();
+DROP FUNCTION IF EXISTS planning_calendar_absence();
+DROP FUNCTION IF EXISTS planning_calendar_publicholiday();
+DROP FUNCTION IF EXISTS planning_calendar_refresh(integer[], date, date);
+DROP FUNCTION IF EXISTS planning_calendar_days(integer[], date, date);
+DROP FUNCTION IF EXISTS planning_calendar_until();
+"""
+
+REBUILD = """\
+DELETE FROM planning_plannedworkweek;
+INSERT INTO planning_plannedworkweek
+  (planned_work_id, user_id, project_id, offer_id, week, hours, is_provisional)
+SELECT
+  id, user_id, project_id, offer_id, week,
+  planned_hours / cardinality(weeks), is_provisional
+FROM planning_plannedwork, unnest(weeks) AS week;
+"""
+
+REBUILD_CALENDAR = """\
+SELECT planning_calendar_refresh(NULL, '0001-01-01', planning_calendar_until());
+"""
+
+
+def rebuild():
+    """
+    Recreate all cube rows from planned work, employments, absences and
+    public holidays
+    """
+    with connections["default"].cursor() as cursor:
+        cursor.execute(REBUILD)
+        cursor.execute(REBUILD_CALENDAR)
+
+
+def extend_calendar():
+    """
+    Add calendar days up to ``planning_calendar_until()``
+
+    Days after the last stored day are computed for all users. Nothing
+    happens if the calendar is complete already.
+    """
+    query(
+        """
+select planning_calendar_refresh(
+    null,
+    coalesce((select max(day) from planning_calendarday), %s) + 1,
+    planning_calendar_until()
+)
+where coalesce((select max(day) from planning_calendarday), %s)
+    < planning_calendar_until()
+        """,
+        [dt.date.min, dt.date.min],
+    )
+
+
+def _planned_work_expected():
+    rows = Counter()
+    for pw_id, user_id, project_id, offer_id, weeks, provisional in query(
+        """
+select id, user_id, project_id, offer_id, weeks, is_provisional
+from planning_plannedwork
+        """,
+        [],
+    ):
+        for week in weeks:
+            rows[(pw_id, user_id, project_id, offer_id, week, provisional)] += 1
+    return rows
+
+
+def check():
+    """
+    Compare the cube with the source tables and return a list of problems
+    """
+    problems = []
+
+    expected = _planned_work_expected()
+    actual = Counter(
+        tuple(row)
+        for row in query(
+            """
+select planned_work_id, user_id, project_id, offer_id, week, is_provisional
+from planning_plannedworkweek
+            """,
+            [],
+        )
+    )
+    problems.extend(f"Missing planned work week {key}" for key in expected - actual)
+    problems.extend(f"Superfluous planned work week {key}" for key in actual - expected)
+
+    problems.extend(
+        f"Planned hours of planned work {pw_id} differ: {planned} != {cube}"
+        for pw_id, planned, cube in query(
+            """
+select pw.id, pw.planned_hours, round(coalesce(sum(pww.hours), 0), 1)
+from planning_plannedwork pw
+left join planning_plannedworkweek pww on pww.planned_work_id=pw.id
+group by pw.id, pw.planned_hours
+having pw.planned_hours <> round(coalesce(sum(pww.hours), 0), 1)
+            """,
+            [],
+        )
+    )
+
+    calendar_rows = """
+select user_id, day, percentage, round(absence_days, 10), holiday_fraction
+from {}
+    """
+    expected = calendar_rows.format(
+        "planning_calendar_days(null, '0001-01-01', planning_calendar_until())"
+    )
+    actual = calendar_rows.format("planning_calendarday")
+    problems.extend(
+        f"Missing calendar day {tuple(row)}"
+        for row in query(f"{expected} except {actual}", [])
+    )
+    problems.extend(
+        f"Superfluous calendar day {tuple(row)}"
+        for row in query(f"{actual} except {expected}", [])
+    )
+
+    return problems
@@ -0,0 +1,230 @@
+# Generated by Django 5.0.6 on 2026-10-17 06:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# The cube as it was created by this migration, see workbench.planning.cube
+TRIGGERS = """\
+CREATE OR REPLACE FUNCTION planning_plannedworkweek_sync() RETURNS trigger AS $$
+begin
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    DELETE FROM planning_plannedworkweek WHERE planned_work_id = OLD.id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO planning_plannedworkweek
+      (planned_work_id, user_id, project_id, offer_id, week, hours, is_provisional)
+    SELECT
+      NEW.id, NEW.user_id, NEW.project_id, NEW.offer_id, week,
+      NEW.planned_hours / cardinality(NEW.weeks), NEW.is_provisional
+    FROM unnest(NEW.weeks) AS week;
+  END IF;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS planning_plannedworkweek_trigger ON planning_plannedwork;
+CREATE TRIGGER planning_plannedworkweek_trigger AFTER INSERT OR UPDATE OR DELETE
+  ON planning_plannedwork FOR EACH ROW EXECUTE PROCEDURE planning_plannedworkweek_sync();
+
+CREATE OR REPLACE FUNCTION planning_absenceweek_sync() RETURNS trigger AS $$
+begin
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    DELETE FROM planning_absenceweek WHERE absence_id = OLD.id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    WITH weeks AS (
+      SELECT w::date AS week
+      FROM generate_series(
+        date_trunc('week', NEW.starts_on),
+        date_trunc('week', NEW.ends_on),
+        '7 days'
+      ) AS w
+    )
+    INSERT INTO planning_absenceweek (absence_id, user_id, week, days)
+    SELECT NEW.id, NEW.user_id, week, NEW.days / (SELECT count(*) FROM weeks)
+    FROM weeks;
+  END IF;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS planning_absenceweek_trigger ON awt_absence;
+CREATE TRIGGER planning_absenceweek_trigger AFTER INSERT OR UPDATE OR DELETE
+  ON awt_absence FOR EACH ROW EXECUTE PROCEDURE planning_absenceweek_sync();
+"""
+
+DROP_TRIGGERS = """\
+DROP TRIGGER IF EXISTS planning_plannedworkweek_trigger ON planning_plannedwork;
+DROP FUNCTION IF EXISTS planning_plannedworkweek_sync();
+DROP TRIGGER IF EXISTS planning_absenceweek_trigger ON awt_absence;
+DROP FUNCTION IF EXISTS planning_absenceweek_sync();
+"""
+
+REBUILD = """\
+DELETE FROM planning_plannedworkweek;
+INSERT INTO planning_plannedworkweek
+  (planned_work_id, user_id, project_id, offer_id, week, hours, is_provisional)
+SELECT
+  id, user_id, project_id, offer_id, week,
+  planned_hours / cardinality(weeks), is_provisional
+FROM planning_plannedwork, unnest(weeks) AS week;
+
+DELETE FROM planning_absenceweek;
+INSERT INTO planning_absenceweek (absence_id, user_id, week, days)
+SELECT
+  id, user_id, week::date,
+  days / (1 + (date_trunc('week', ends_on)::date - date_trunc('week', starts_on)::date) / 7)
+FROM awt_absence, generate_series(
+  date_trunc('week', starts_on), date_trunc('week', ends_on), '7 days'
+) AS week
+WHERE ends_on IS NOT NULL;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("awt", "0015_vacationdaysoverride_type"),
+        ("offers", "0014_alter_offer_tax_rate"),
+        ("planning", "0016_auto_20210802_1938"),
+        ("projects", "0029_alter_internaltype_ordering"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AbsenceWeek",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("week", models.DateField(verbose_name="week")),
+                (
+                    "days",
+                    models.DecimalField(
+                        decimal_places=10, max_digits=20, verbose_name="days"
+                    ),
+                ),
+                (
+                    "absence",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="awt.absence",
+                        verbose_name="absence",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="user",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "absence week",
+                "verbose_name_plural": "absence weeks",
+                "indexes": [
+                    models.Index(
+                        fields=["week", "user"], name="planning_ab_week_b6c74e_idx"
+                    ),
+                    models.Index(
+                        fields=["absence"], name="planning_ab_absence_b64067_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="PlannedWorkWeek",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("week", models.DateField(verbose_name="week")),
+                (
+                    "hours",
+                    models.DecimalField(
+                        decimal_places=10, max_digits=20, verbose_name="hours"
+                    ),
+                ),
+                (
+                    "is_provisional",
+                    models.BooleanField(default=False, verbose_name="is provisional"),
+                ),
+                (
+                    "offer",
+                    models.ForeignKey(
+                        blank=True,
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="offers.offer",
+                        verbose_name="offer",
+                    ),
+                ),
+                (
+                    "planned_work",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="planning.plannedwork",
+                        verbose_name="planned work",
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="projects.project",
+                        verbose_name="project",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="user",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "planned work week",
+                "verbose_name_plural": "planned work weeks",
+                "indexes": [
+                    models.Index(
+                        fields=["week", "user"], name="planning_pl_week_9365c3_idx"
+                    ),
+                    models.Index(
+                        fields=["planned_work"], name="planning_pl_planned_638a08_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunSQL(TRIGGERS, DROP_TRIGGERS),
+        migrations.RunSQL(REBUILD, ""),
+    ]
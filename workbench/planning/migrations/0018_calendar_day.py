@@ -0,0 +1,215 @@
+# Generated by Django 5.0.6 on 2026-10-17 08:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# The calendar as it was created by this migration, see workbench.planning.cube
+CALENDAR_TRIGGERS = """\
+CREATE OR REPLACE FUNCTION planning_calendar_until() RETURNS date AS $$
+  SELECT (date_trunc('year', current_date) + interval '3 years')::date - 1;
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION planning_calendar_days(
+  user_ids integer[], from_date date, until_date date
+) RETURNS TABLE (
+  user_id integer,
+  day date,
+  percentage bigint,
+  absence_days numeric,
+  holiday_fraction numeric
+) AS $$
+SELECT
+  user_id,
+  day,
+  sum(percentage),
+  sum(absence_days),
+  coalesce((SELECT sum(fraction) FROM planning_publicholiday WHERE date=day), 0)
+FROM (
+  SELECT e.user_id, d::date AS day, e.percentage, 0 AS absence_days
+  FROM awt_employment e, generate_series(
+    greatest(e.date_from, from_date), least(e.date_until, until_date), '1 day'
+  ) AS d
+  WHERE (user_ids IS NULL OR e.user_id = ANY(user_ids))
+    AND e.date_from <= until_date AND e.date_until >= from_date
+
+  UNION ALL
+
+  SELECT
+    a.user_id,
+    d::date,
+    NULL,
+    a.days / (coalesce(a.ends_on, a.starts_on) - a.starts_on + 1)
+  FROM awt_absence a, generate_series(
+    greatest(a.starts_on, from_date),
+    least(coalesce(a.ends_on, a.starts_on), until_date),
+    '1 day'
+  ) AS d
+  WHERE (user_ids IS NULL OR a.user_id = ANY(user_ids))
+    AND a.starts_on <= until_date
+    AND coalesce(a.ends_on, a.starts_on) >= from_date
+) AS days
+GROUP BY user_id, day
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION planning_calendar_refresh(
+  user_ids integer[], from_date date, until_date date
+) RETURNS void AS $$
+begin
+  until_date := least(until_date, planning_calendar_until());
+  DELETE FROM planning_calendarday
+  WHERE (user_ids IS NULL OR user_id = ANY(user_ids))
+    AND day BETWEEN from_date AND until_date;
+  INSERT INTO planning_calendarday
+    (user_id, day, percentage, absence_days, holiday_fraction)
+  SELECT * FROM planning_calendar_days(user_ids, from_date, until_date);
+end
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION planning_calendar_employment() RETURNS trigger AS $$
+begin
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM planning_calendar_refresh(
+      ARRAY[OLD.user_id], OLD.date_from, OLD.date_until
+    );
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM planning_calendar_refresh(
+      ARRAY[NEW.user_id], NEW.date_from, NEW.date_until
+    );
+  END IF;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS planning_calendar_trigger ON awt_employment;
+CREATE TRIGGER planning_calendar_trigger AFTER INSERT OR UPDATE OR DELETE
+  ON awt_employment FOR EACH ROW EXECUTE PROCEDURE planning_calendar_employment();
+
+CREATE OR REPLACE FUNCTION planning_calendar_absence() RETURNS trigger AS $$
+begin
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM planning_calendar_refresh(
+      ARRAY[OLD.user_id], OLD.starts_on, coalesce(OLD.ends_on, OLD.starts_on)
+    );
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM planning_calendar_refresh(
+      ARRAY[NEW.user_id], NEW.starts_on, coalesce(NEW.ends_on, NEW.starts_on)
+    );
+  END IF;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS planning_calendar_trigger ON awt_absence;
+CREATE TRIGGER planning_calendar_trigger AFTER INSERT OR UPDATE OR DELETE
+  ON awt_absence FOR EACH ROW EXECUTE PROCEDURE planning_calendar_absence();
+
+CREATE OR REPLACE FUNCTION planning_calendar_publicholiday() RETURNS trigger AS $$
+begin
+  UPDATE planning_calendarday
+  SET holiday_fraction=coalesce(
+    (SELECT sum(fraction) FROM planning_publicholiday WHERE date=day), 0
+  )
+  WHERE day IN (
+    CASE WHEN TG_OP <> 'INSERT' THEN OLD.date END,
+    CASE WHEN TG_OP <> 'DELETE' THEN NEW.date END
+  );
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS planning_calendar_trigger ON planning_publicholiday;
+CREATE TRIGGER planning_calendar_trigger AFTER INSERT OR UPDATE OR DELETE
+  ON planning_publicholiday FOR EACH ROW
+  EXECUTE PROCEDURE planning_calendar_publicholiday();
+"""
+
+DROP_CALENDAR_TRIGGERS = """\
+DROP TRIGGER IF EXISTS planning_calendar_trigger ON awt_employment;
+DROP TRIGGER IF EXISTS planning_calendar_trigger ON awt_absence;
+DROP TRIGGER IF EXISTS planning_calendar_trigger ON planning_publicholiday;
+DROP FUNCTION IF EXISTS planning_calendar_employment();
+DROP FUNCTION IF EXISTS planning_calendar_absence();
+DROP FUNCTION IF EXISTS planning_calendar_publicholiday();
+DROP FUNCTION IF EXISTS planning_calendar_refresh(integer[], date, date);
+DROP FUNCTION IF EXISTS planning_calendar_days(integer[], date, date);
+DROP FUNCTION IF EXISTS planning_calendar_until();
+"""
+
+REBUILD_CALENDAR = """\
+SELECT planning_calendar_refresh(NULL, '0001-01-01', planning_calendar_until());
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("awt", "0016_calendar_version"),
+        ("planning", "0017_planning_cube"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            """\
+DROP TRIGGER IF EXISTS planning_absenceweek_trigger ON awt_absence;
+DROP FUNCTION IF EXISTS planning_absenceweek_sync();
+            """,
+            "",
+        ),
+        migrations.DeleteModel(
+            name="AbsenceWeek",
+        ),
+        migrations.CreateModel(
+            name="CalendarDay",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(verbose_name="day")),
+                (
+                    "percentage",
+                    models.IntegerField(null=True, verbose_name="percentage"),
+                ),
+                (
+                    "absence_days",
+                    models.DecimalField(
+                        decimal_places=10, max_digits=20, verbose_name="absence days"
+                    ),
+                ),
+                (
+                    "holiday_fraction",
+                    models.DecimalField(
+                        decimal_places=2,
+                        max_digits=5,
+                        verbose_name="public holiday fraction",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="user",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "calendar day",
+                "verbose_name_plural": "calendar days",
+                "unique_together": {("user", "day")},
+            },
+        ),
+        migrations.RunSQL(CALENDAR_TRIGGERS, DROP_CALENDAR_TRIGGERS),
+        migrations.RunSQL(REBUILD_CALENDAR, ""),
+    ]
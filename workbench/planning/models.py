@@ -226,3 +226,89 @@ class PlannedWork(AbstractPlannedWork):
 
     def __html__(self):
         return format_html("{} - {}", self.project.title, self.__str__())
+
+
+class PlannedWorkWeek(models.Model):
+    """
+    One row per week of planned work, maintained by a database trigger
+
+    See ``workbench.planning.cube``.
+    """
+
+    planned_work = models.ForeignKey(
+        PlannedWork,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        verbose_name=_("planned work"),
+        related_name="+",
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        verbose_name=_("user"),
+        related_name="+",
+    )
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        verbose_name=_("project"),
+        related_name="+",
+    )
+    offer = models.ForeignKey(
+        Offer,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        blank=True,
+        null=True,
+        verbose_name=_("offer"),
+        related_name="+",
+    )
+    week = models.DateField(_("week"))
+    hours = models.DecimalField(_("hours"), max_digits=20, decimal_places=10)
+    is_provisional = models.BooleanField(_("is provisional"), default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["week", "user"]),
+            models.Index(fields=["planned_work"]),
+        ]
+        verbose_name = _("planned work week")
+        verbose_name_plural = _("planned work weeks")
+
+    def __str__(self):
+        return f"{self.planned_work_id}: {self.week}"
+
+
+class CalendarDay(models.Model):
+    """
+    One row per user and day with an employment or an absence, maintained by
+    database triggers
+
+    See ``workbench.planning.cube``.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        verbose_name=_("user"),
+        related_name="+",
+    )
+    day = models.DateField(_("day"))
+    percentage = models.IntegerField(_("percentage"), null=True)
+    absence_days = models.DecimalField(
+        _("absence days"), max_digits=20, decimal_places=10
+    )
+    holiday_fraction = models.DecimalField(
+        _("public holiday fraction"), max_digits=5, decimal_places=2
+    )
+
+    class Meta:
+        unique_together = [("user", "day")]
+        verbose_name = _("calendar day")
+        verbose_name_plural = _("calendar days")
+
+    def __str__(self):
+        return f"{self.user_id}: {self.day}"
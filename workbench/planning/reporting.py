@@ -12,7 +12,12 @@ from workbench.awt.models import Absence
 from workbench.contacts.models import Organization
 from workbench.invoices.utils import recurring
 from workbench.logbook.models import LoggedHours
-from workbench.planning.models import ExternalWork, Milestone, PlannedWork
+from workbench.planning.models import (
+    ExternalWork,
+    Milestone,
+    PlannedWork,
+    PlannedWorkWeek,
+)
 from workbench.projects.models import Project
 from workbench.services.models import ServiceType
 from workbench.tools.formats import Z1, Z2, hours, local_date_format
@@ -39,11 +44,15 @@ class Planning:
         self.weeks = weeks
         self.users = users
 
+        # Per-week series are stored as lists indexed by the position of the
+        # week in self.weeks
+        self._week_index = {week: idx for idx, week in enumerate(weeks)}
+
         self.external = external_view
 
-        self._by_week = defaultdict(lambda: Z1)
-        self._by_week_provisional = defaultdict(lambda: Z1)
-        self._by_project_and_week = defaultdict(lambda: defaultdict(lambda: Z1))
+        self._by_week = self._zeros()
+        self._by_week_provisional = self._zeros()
+        self._by_project_and_week = defaultdict(self._zeros)
         self._projects_offers = defaultdict(lambda: defaultdict(list))
 
         self._projects_external_work = defaultdict(list)
@@ -51,7 +60,7 @@ class Planning:
         self._project_ids = {project.id for project in projects} if projects else set()
         self._user_ids = {user.id for user in users} if users else set()
 
-        self._worked_hours = defaultdict(lambda: defaultdict(lambda: Z1))
+        self._worked_hours = defaultdict(self._zeros)
 
         self._absences = defaultdict(lambda: [[] for i in weeks])
         self._milestones = defaultdict(lambda: defaultdict(defaultdict))
@@ -59,6 +68,9 @@ class Planning:
         self._work_ids_users = defaultdict(set)
         self._planned_users_by_week = defaultdict(lambda: [set() for i in weeks])
 
+    def _zeros(self):
+        return [Z1] * len(self.weeks)
+
     def add_planned_work_and_milestones(
         self,
         planned_work_qs,
@@ -67,7 +79,10 @@ class Planning:
     ):
         if self.external:
             planned_work_qs = planned_work_qs.filter(milestone__isnull=False)
-        for pw in planned_work_qs.filter(weeks__overlap=self.weeks).select_related(
+        in_weeks = PlannedWorkWeek.objects.filter(
+            week__range=[min(self.weeks), max(self.weeks)]
+        ).values("planned_work")
+        for pw in planned_work_qs.filter(id__in=in_weeks).select_related(
             "user",
             "project__owned_by",
             "offer__project",
@@ -75,18 +90,16 @@ class Planning:
             "milestone",
         ):
             per_week = (pw.planned_hours / len(pw.weeks)).quantize(Z2)
+            hours_per_week = self._zeros()
+            by_project = self._by_project_and_week[pw.project]
             for week in pw.weeks:
-                self._by_week[week] += per_week
-                self._by_project_and_week[pw.project][week] += per_week
+                if (idx := self._week_index.get(week)) is None:
+                    continue
+                hours_per_week[idx] = per_week
+                self._by_week[idx] += per_week
+                by_project[idx] += per_week
                 if pw.is_provisional:
-                    self._by_week_provisional[week] += per_week
-
-            hours_per_week = []
-            for week in self.weeks:
-                if week in pw.weeks:
-                    hours_per_week.append(per_week)
-                else:
-                    hours_per_week.append(Z1)
+                    self._by_week_provisional[idx] += per_week
 
             date_from = min(pw.weeks)
             date_until = max(pw.weeks) + dt.timedelta(days=6)
@@ -206,33 +219,39 @@ class Planning:
             .values("service__project", "service__offer", "rendered_on")
             .annotate(Sum("hours"))
         ):
-            self._worked_hours[row["service__project"]][monday(row["rendered_on"])] += (
-                row["hours__sum"]
-            )
+            if (idx := self._week_index.get(monday(row["rendered_on"]))) is not None:
+                self._worked_hours[row["service__project"]][idx] += row["hours__sum"]
 
     def add_absences(self, queryset):
+        last_day = max(self.weeks) + dt.timedelta(days=6)
         for absence in queryset.filter(
             Q(user__in=self._user_ids),
-            Q(starts_on__lte=max(self.weeks)),
+            Q(starts_on__lte=last_day),
             Q(ends_on__isnull=False, ends_on__gte=min(self.weeks))
             | Q(ends_on__isnull=True, starts_on__gte=min(self.weeks)),
         ).select_related("user"):
-            date_from = monday(absence.starts_on)
-            date_until = monday(absence.ends_on or absence.starts_on)
-            hours = absence.days * absence.user.planning_hours_per_day
-            weeks = [
-                (idx, week)
-                for idx, week in enumerate(self.weeks)
-                if date_from <= week <= date_until
-            ]
+            # Distribute the days evenly over the calendar days of the
+            # absence, the same way as in workbench.planning.cube
+            starts_on = absence.starts_on
+            ends_on = absence.ends_on or starts_on
+            hours_per_day = (
+                absence.days
+                * absence.user.planning_hours_per_day
+                / ((ends_on - starts_on).days + 1)
+            )
 
-            for idx, week in weeks:
+            for idx, week in enumerate(self.weeks):
+                days = (
+                    min(ends_on, week + dt.timedelta(days=6)) - max(starts_on, week)
+                ).days + 1
+                if days <= 0:
+                    continue
                 self._absences[absence.user][idx].append((
-                    hours / len(weeks),
+                    hours_per_day * days,
                     f"{absence.get_reason_display()} - {absence.description}",
                     absence.urls["detail"],
                 ))
-                self._by_week[week] += hours / len(weeks)
+                self._by_week[idx] += hours_per_day * days
 
     def add_public_holidays(self):
         ud = {user.id: user for user in User.objects.filter(id__in=self._user_ids)}
@@ -251,36 +270,29 @@ select
     ph.id,
     ph.date,
     ph.name,
-    user_id,
-    planning_hours_per_day,
-    fraction,
-    percentage
+    cd.user_id,
+    u.planning_hours_per_day,
+    ph.fraction,
+    cd.percentage
 
 from planning_publicholiday ph
-left outer join lateral (
-    select
-        user_id,
-        date_from,
-        date_until,
-        percentage,
-        planning_hours_per_day
-    from awt_employment
-    left join accounts_user on awt_employment.user_id=accounts_user.id
-    where user_id = any (%s)
-) as employment
-on employment.date_from <= ph.date and employment.date_until > ph.date
-
-where ph.date between %s and %s and user_id is not null
+join planning_calendarday cd on cd.day=ph.date and cd.percentage is not null
+join accounts_user u on cd.user_id=u.id
+
+where
+    cd.user_id = any (%s)
+    and ph.date between %s and %s
+    and extract(isodow from ph.date) <= 5
 order by ph.date
             """,
-            [list(ud.keys()), min(self.weeks), max(self.weeks)],
+            [
+                list(ud.keys()),
+                min(self.weeks),
+                max(self.weeks) + dt.timedelta(days=6),
+            ],
         ):
-            # Skip weekends
-            if date.weekday() >= 5:
-                continue
-
             week = monday(date)
-            idx = self.weeks.index(week)
+            idx = self._week_index[week]
 
             user = ud[user_id]
             ph_hours = (
@@ -299,7 +311,7 @@ order by ph.date
                 f"{name} ({detail} = {hours(ph_hours)})",
                 reverse("planning_publicholiday_detail", kwargs={"pk": id}),
             ))
-            self._by_week[week] += ph_hours
+            self._by_week[idx] += ph_hours
 
     def add_milestones(self, queryset):
         for milestone in queryset.filter(
@@ -321,8 +333,8 @@ order by ph.date
         for wl in work_list:
             wl.update({
                 "absences": [
-                    [a for a in self._absences[user][idx] if h > 0]
-                    for idx, h in enumerate(wl["hours_per_week"])
+                    list(absences) if h > 0 else []
+                    for absences, h in zip(self._absences[user], wl["hours_per_week"])
                 ]
                 for user in self._work_ids_users[wl["work"]["id"]]
             })
@@ -411,14 +423,10 @@ order by ph.date
                 if date_from and date_until
                 else None,
                 "planned_hours": hours,
-                "worked_hours": [
-                    self._worked_hours[project.id][week] for week in self.weeks
-                ],
+                "worked_hours": list(self._worked_hours[project.id]),
                 "milestones": milestones if any(milestones) else None,
             },
-            "by_week": [
-                self._by_project_and_week[project][week] for week in self.weeks
-            ],
+            "by_week": list(self._by_project_and_week[project]),
             "external_work": external_work if any(external_work) else None,
             "offers": offers,
         }
@@ -433,102 +441,53 @@ order by ph.date
 
         for week, user, capacity in query(
             """
-select
-    week,
-    user_id,
-    coalesce(percentage, 0) * 5 * coalesce(planning_hours_per_day, 0) / 100
-        - coalesce(pw_hours, 0)
-        - coalesce(abs_hours, 0)
-        - coalesce(ph_days, 0)
-          * coalesce(planning_hours_per_day, 0)
-          * coalesce(percentage, 0) / 100
-        as capacity
-
 --
--- Determine the employment percentage and planning_hours_per_day
--- for each user and week
+-- Employment percentages, absences and public holidays per user and week
+-- are aggregated from the daily calendar, see workbench.planning.cube
 --
-from generate_series(%s::date, %s::date, '7 days') as week
-left outer join lateral (
+select
+    calendar.week,
+    calendar.user_id,
+    round(calendar.capacity - coalesce(planned.hours, 0), 2)
+from (
     select
-        user_id,
-        date_from,
-        date_until,
-        percentage,
-        planning_hours_per_day
-    from awt_employment
-    left join accounts_user on awt_employment.user_id=accounts_user.id
-    where user_id = any (%s)
-) as employment
-on employment.date_from <= week and employment.date_until > week
+        date_trunc('week', cd.day)::date as week,
+        cd.user_id,
+        sum(
+            case when extract(isodow from cd.day) <= 5
+            then coalesce(cd.percentage, 0) * (1 - cd.holiday_fraction) / 100
+            else 0 end
+            - cd.absence_days
+        ) * u.planning_hours_per_day as capacity
+    from planning_calendarday cd
+    join accounts_user u on cd.user_id=u.id
+    where cd.user_id = any (%s) and cd.day between %s and %s
+    group by week, cd.user_id, u.planning_hours_per_day
+    having count(cd.percentage) > 0
+) as calendar
 
 --
--- Aggregate planned hours per week, distributing equally the planned_hours
--- value over all weeks in the planned work record
+-- Planned hours per week are maintained in the weekly planning cube
 --
-left outer join lateral (
-    select
-        user_id as pw_user_id,
-        sum(planned_hours / cardinality(weeks)) as pw_hours,
-        unnest(weeks) as pw_week
-    from planning_plannedwork
-    where user_id = any (%s)
-    group by pw_user_id, pw_week
+left outer join (
+    select user_id, week, sum(hours) as hours
+    from planning_plannedworkweek
+    where user_id = any (%s) and week between %s and %s
+    group by user_id, week
 ) as planned
-on week=pw_week and user_id=pw_user_id
-
-left outer join lateral(
-
-    --
-    -- Generate rows of absences (user_id, days, planning_hours, weeks::date[])
-    --
-    with sq as (
-        select
-            user_id as abs_user_id,
-            days,
-            planning_hours_per_day,
-            (
-              select array_agg(w::date) from generate_series(
-                date_trunc('week', starts_on),
-                date_trunc('week', ends_on),
-                '7 days'
-              ) as w
-            ) as weeks
-          from awt_absence
-          where user_id = any(%s)
-          and user_id=employment.user_id
-          and employment.date_from <= date_trunc('week', week)
-          and employment.date_until > date_trunc('week', week)
-    )
-    --
-    -- Calculate the planning hours for each absence and distribute the hours
-    -- over all weeks in which the absence takes place
-    --
-    select
-      abs_user_id,
-      sum(days * planning_hours_per_day / cardinality(weeks)) as abs_hours,
-      unnest(weeks) as abs_week
-    from sq
-    group by abs_user_id, abs_week
-
-) as absences
-on week=abs_week and user_id=abs_user_id
-
-left outer join lateral(
-    select
-      date_trunc('week', date) as ph_week,
-      sum(fraction) as ph_days
-    from planning_publicholiday
-    where extract(dow from date) between 1 and 6
-    group by ph_week
-) as public_holidays
-on week=ph_week
-
+on calendar.week=planned.week and calendar.user_id=planned.user_id
             """,
-            [min(self.weeks), max(self.weeks), user_ids, user_ids, user_ids],
+            [
+                user_ids,
+                min(self.weeks),
+                max(self.weeks) + dt.timedelta(days=6),
+                user_ids,
+                min(self.weeks),
+                max(self.weeks),
+            ],
         ):
-            by_user[user][week.date()] = capacity
-            total[week.date()] += capacity
+            by_user[user][week] = capacity
+            total[week] += capacity
 
         users = self.users or list(User.objects.filter(id__in=by_user))
         return {
@@ -546,12 +505,8 @@ on week=ph_week
         }
 
     def report(self):
-        try:
-            this_week_index = self.weeks.index(monday())
-        except ValueError:
-            this_week_index = None
         return {
-            "this_week_index": this_week_index,
+            "this_week_index": self._week_index.get(monday()),
             "weeks": [
                 {
                     "monday": week,
@@ -577,10 +532,8 @@ on week=ph_week
                 if row["project"]["date_from"] and row["project"]["date_until"]
                 else (),
             ),
-            "by_week": [self._by_week[week] for week in self.weeks],
-            "by_week_provisional": [
-                self._by_week_provisional[week] for week in self.weeks
-            ],
+            "by_week": list(self._by_week),
+            "by_week_provisional": list(self._by_week_provisional),
             "absences": [
                 (str(user), lst) for user, lst in sorted(self._absences.items())
             ],
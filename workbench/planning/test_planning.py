@@ -1,15 +1,22 @@
 import datetime as dt
+import io
 from decimal import Decimal
 
 from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
 from django.test import RequestFactory, TestCase
 from django.utils.translation import deactivate_all
 
 from workbench import factories
 from workbench.accounts.models import User
-from workbench.planning import reporting
+from workbench.planning import cube, reporting
 from workbench.planning.forms import PlannedWorkSearchForm
-from workbench.planning.models import PlannedWork
+from workbench.planning.models import (
+    CalendarDay,
+    PlannedWork,
+    PlannedWorkWeek,
+    PublicHoliday,
+)
 from workbench.tools.validation import in_days, monday
 
 
@@ -78,6 +85,79 @@ class PlanningTest(TestCase):
         (c,) = report["per_customer"]
         self.assertEqual(len(c["per_week"]), 1)
 
+    def test_report_output(self):
+        """Planned work, absences and public holidays in the planning report"""
+        weeks = [dt.date(2024, 1, 1) + dt.timedelta(days=7 * i) for i in range(4)]
+        user = factories.UserFactory.create()
+        factories.EmploymentFactory.create(user=user, date_from=dt.date(2023, 1, 1))
+        project = factories.ProjectFactory.create()
+        pw = factories.PlannedWorkFactory.create(
+            project=project, user=user, planned_hours=30, weeks=weeks[:3]
+        )
+        provisional = factories.PlannedWorkFactory.create(
+            project=project,
+            user=user,
+            planned_hours=20,
+            weeks=weeks[2:],
+            is_provisional=True,
+        )
+        absence = factories.AbsenceFactory.create(
+            user=user,
+            starts_on=dt.date(2024, 1, 8),
+            ends_on=dt.date(2024, 1, 12),
+            days=5,
+            description="Skiing",
+        )
+        holiday = PublicHoliday.objects.create(
+            date=dt.date(2024, 1, 2), name="Berchtoldstag"
+        )
+
+        report = reporting.user_planning(user, [weeks[0], dt.date(2024, 1, 28)])
+        self.assertEqual(report["by_week"], [18, 50, 20, 10])
+        self.assertEqual(report["by_week_provisional"], [0, 0, 10, 10])
+
+        holiday_absence = (
+            8,
+            "Berchtoldstag (8.0h/d × 100% × 1.00d = 8.0h)",
+            f"/planning/ph/{holiday.pk}/",
+        )
+        vacation = (40, "vacation - Skiing", absence.urls["detail"])
+        self.assertEqual(
+            report["absences"],
+            [(str(user), [[holiday_absence], [vacation], [], []])],
+        )
+
+        (row,) = report["projects_offers"]
+        self.assertEqual(row["by_week"], [10, 10, 20, 10])
+        self.assertEqual(row["project"]["planned_hours"], 50)
+        self.assertEqual(
+            [
+                (
+                    work["work"]["id"],
+                    work["work"]["is_provisional"],
+                    work["hours_per_week"],
+                    work["absences"],
+                )
+                for work in row["offers"][0]["work_list"]
+            ],
+            [
+                (
+                    pw.id,
+                    False,
+                    [10, 10, 10, 0],
+                    [[holiday_absence], [vacation], [], []],
+                ),
+                (
+                    provisional.id,
+                    True,
+                    [0, 0, 10, 10],
+                    [[], [], [], []],
+                ),
+            ],
+        )
+
+        self.assertEqual(report["capacity"]["total"], [22, -10, 20, 30])
+
     def test_planning_search_forms(self):
         """Planning request search form branch test"""
 
@@ -306,3 +386,126 @@ class PlanningTest(TestCase):
 
         response = self.client.get(service.project.urls["creatework"] + "?service=bla")
         self.assertEqual(response.status_code, 200)  # No crash
+
+    def test_planning_cube(self):
+        """The weekly planning cube follows planned work and absences"""
+        pw = factories.PlannedWorkFactory.create(
+            weeks=[dt.date(2020, 6, 22), dt.date(2020, 6, 29), dt.date(2020, 7, 6)]
+        )
+        absence = factories.AbsenceFactory.create(
+            user=pw.user,
+            starts_on=dt.date(2020, 6, 24),
+            ends_on=dt.date(2020, 7, 1),
+            days=4,
+        )
+
+        self.assertEqual(
+            sorted(
+                PlannedWorkWeek.objects.values_list("week", "hours", "user", "project")
+            ),
+            [
+                (week, Decimal("6.6666666667"), pw.user_id, pw.project_id)
+                for week in pw.weeks
+            ],
+        )
+        self.assertEqual(
+            sorted(CalendarDay.objects.values_list("day", "absence_days")),
+            [(dt.date(2020, 6, 24) + dt.timedelta(days=i), 0.5) for i in range(8)],
+        )
+        self.assertEqual(cube.check(), [])
+
+        pw.weeks = [dt.date(2020, 7, 13)]
+        pw.planned_hours = 10
+        pw.save()
+        absence.ends_on = None
+        absence.save()
+        self.assertEqual(
+            list(PlannedWorkWeek.objects.values_list("week", "hours")),
+            [(dt.date(2020, 7, 13), 10)],
+        )
+        self.assertEqual(
+            list(CalendarDay.objects.values_list("day", "absence_days")),
+            [(dt.date(2020, 6, 24), 4)],
+        )
+
+        PlannedWorkWeek.objects.update(week=dt.date(2020, 7, 20))
+        self.assertEqual(len(cube.check()), 2)
+        stderr = io.StringIO()
+        with self.assertRaisesRegex(CommandError, "Found 2 problems"):
+            call_command(
+                "planning_cube", "--check", stdout=io.StringIO(), stderr=stderr
+            )
+        self.assertIn("Missing planned work week", stderr.getvalue())
+        self.assertIn("Superfluous planned work week", stderr.getvalue())
+
+        call_command("planning_cube", stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(cube.check(), [])
+
+        pw.delete()
+        absence.delete()
+        self.assertEqual(PlannedWorkWeek.objects.count(), 0)
+        self.assertEqual(CalendarDay.objects.count(), 0)
+
+    def test_calendar(self):
+        """The daily calendar follows employments, absences and public holidays"""
+        employment = factories.EmploymentFactory.create(
+            date_from=dt.date(2020, 6, 1),
+            date_until=dt.date(2020, 6, 30),
+            percentage=80,
+        )
+        factories.AbsenceFactory.create(
+            user=employment.user,
+            starts_on=dt.date(2020, 6, 29),
+            ends_on=dt.date(2020, 7, 2),
+            days=2,
+        )
+        holiday = PublicHoliday.objects.create(
+            date=dt.date(2020, 6, 1), name="Holiday", fraction=1
+        )
+
+        days = {day.day: day for day in CalendarDay.objects.all()}
+        self.assertEqual(len(days), 32)
+        self.assertEqual(days[dt.date(2020, 6, 1)].holiday_fraction, 1)
+        self.assertEqual(days[dt.date(2020, 6, 30)].percentage, 80)
+        self.assertEqual(days[dt.date(2020, 6, 30)].absence_days, Decimal("0.5"))
+        self.assertIsNone(days[dt.date(2020, 7, 1)].percentage)
+        self.assertEqual(cube.check(), [])
+
+        holiday.fraction = Decimal("0.5")
+        holiday.save()
+        employment.date_until = dt.date(2020, 6, 15)
+        employment.save()
+        days = {day.day: day for day in CalendarDay.objects.all()}
+        self.assertEqual(days[dt.date(2020, 6, 1)].holiday_fraction, Decimal("0.5"))
+        self.assertEqual(len(days), 19)
+        self.assertEqual(cube.check(), [])
+
+        # Extending computes all days after the last stored day
+        CalendarDay.objects.filter(day__gt=dt.date(2020, 6, 10)).delete()
+        cube.extend_calendar()
+        self.assertEqual(cube.check(), [])
+
+        CalendarDay.objects.filter(day=dt.date(2020, 6, 5)).delete()
+        cube.extend_calendar()
+        self.assertEqual(len(cube.check()), 1)
+        cube.rebuild()
+        self.assertEqual(cube.check(), [])
+
+    def test_capacity(self):
+        """Capacity subtracts planned work, absences and public holidays"""
+        week = dt.date(2020, 6, 22)
+        pw = factories.PlannedWorkFactory.create(weeks=[week, week + dt.timedelta(7)])
+        factories.EmploymentFactory.create(
+            user=pw.user, date_from=dt.date(2020, 1, 1), percentage=80
+        )
+        factories.AbsenceFactory.create(
+            user=pw.user, starts_on=week, ends_on=week + dt.timedelta(2), days=2
+        )
+        PublicHoliday.objects.create(date=week, name="Holiday", fraction=1)
+
+        planning = reporting.Planning(
+            weeks=[week, week + dt.timedelta(7)], users=[pw.user]
+        )
+        capacity = planning.capacity()
+        # 80% * 5 * 8h = 32h, minus 10h planned, 16h absences, 80% * 8h holiday
+        self.assertEqual(capacity["total"], [Decimal("-0.4"), Decimal("22")])
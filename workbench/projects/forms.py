@@ -1,6 +1,7 @@
 from django import forms
 from django.conf import settings
 from django.contrib import messages
+from django.db import transaction
 from django.forms.models import inlineformset_factory
 from django.utils.html import format_html
 from django.utils.text import capfirst
@@ -11,6 +12,8 @@ from workbench.accounts.models import User
 from workbench.contacts.models import Organization, Person
 from workbench.invoices.models import ProjectedInvoice
 from workbench.projects.models import Campaign, Project, Service
+from workbench.reporting.models import MonthlyLoggedHours
+from workbench.reporting.monthly_hours import refresh_monthly_logged_hours
 from workbench.services.models import ServiceType
 from workbench.tools.forms import (
     Autocomplete,
@@ -502,8 +505,16 @@ class ReassignLogbookForm(Form):
 
     def save(self):
         service = self.cleaned_data["service"]
-        self.from_service.loggedhours.update(service=service)
-        self.from_service.loggedcosts.update(service=service)
+        # Stored totals of closed months have to follow the entries
+        months = set(
+            MonthlyLoggedHours.objects.filter(service=self.from_service).values_list(
+                "month", flat=True
+            )
+        )
+        with transaction.atomic():
+            self.from_service.loggedhours.update(service=service)
+            self.from_service.loggedcosts.update(service=service)
+            refresh_monthly_logged_hours(months, force=True)
 
         if self.cleaned_data.get("try_delete") and self.from_service.allow_delete(
             self.from_service, self.request
@@ -0,0 +1,128 @@
+# Generated by Django 5.0.6 on 2026-10-17 06:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+TRIGGERS = """\
+CREATE SEQUENCE IF NOT EXISTS projects_projectversion_seq;
+
+CREATE OR REPLACE FUNCTION projects_projectversion_bump(project_ids integer[])
+RETURNS void AS $$
+  INSERT INTO projects_projectversion (project_id, version)
+  SELECT project_id, nextval('projects_projectversion_seq')
+  FROM (SELECT DISTINCT unnest(project_ids) AS project_id ORDER BY 1) p
+  WHERE project_id IS NOT NULL
+  ON CONFLICT (project_id) DO UPDATE SET version=EXCLUDED.version;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION projects_projectversion_logbook() RETURNS trigger AS $$
+DECLARE
+  service_ids integer[];
+begin
+  IF TG_OP = 'INSERT' THEN
+    service_ids := ARRAY(SELECT service_id FROM new_rows);
+  ELSIF TG_OP = 'DELETE' THEN
+    service_ids := ARRAY(SELECT service_id FROM old_rows);
+  ELSE
+    service_ids := ARRAY(
+      SELECT service_id FROM old_rows UNION SELECT service_id FROM new_rows
+    );
+  END IF;
+  PERFORM projects_projectversion_bump(
+    ARRAY(SELECT project_id FROM projects_service WHERE id = ANY(service_ids))
+  );
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION projects_projectversion_service() RETURNS trigger AS $$
+begin
+  IF TG_OP = 'INSERT' THEN
+    PERFORM projects_projectversion_bump(ARRAY(SELECT project_id FROM new_rows));
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM projects_projectversion_bump(ARRAY(SELECT project_id FROM old_rows));
+  ELSE
+    PERFORM projects_projectversion_bump(ARRAY(
+      SELECT project_id FROM old_rows UNION SELECT project_id FROM new_rows
+    ));
+  END IF;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+"""
+
+#: Tables with triggers and the trigger function they use
+TABLES = {
+    "logbook_loggedhours": "projects_projectversion_logbook",
+    "logbook_loggedcost": "projects_projectversion_logbook",
+    "projects_service": "projects_projectversion_service",
+}
+
+
+def _table_triggers():
+    sql = []
+    for table, function in TABLES.items():
+        for op, referencing in [
+            ("INSERT", "NEW TABLE AS new_rows"),
+            ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+            ("DELETE", "OLD TABLE AS old_rows"),
+        ]:
+            trigger = f"{table}_version_{op.lower()}"
+            sql.append(f"DROP TRIGGER IF EXISTS {trigger} ON {table};")
+            sql.append(
+                f"CREATE TRIGGER {trigger} AFTER {op} ON {table}"
+                f" REFERENCING {referencing}"
+                f" FOR EACH STATEMENT EXECUTE PROCEDURE {function}();"
+            )
+    return "\n".join(sql)
+
+
+TRIGGERS += _table_triggers()
+
+DROP_TRIGGERS = "\n".join(
+    [
+        f"DROP TRIGGER IF EXISTS {table}_version_{op} ON {table};"
+        for table in TABLES
+        for op in ["insert", "update", "delete"]
+    ]
+    + [
+        "DROP FUNCTION IF EXISTS projects_projectversion_logbook();",
+        "DROP FUNCTION IF EXISTS projects_projectversion_service();",
+        "DROP FUNCTION IF EXISTS projects_projectversion_bump(integer[]);",
+        "DROP SEQUENCE IF EXISTS projects_projectversion_seq;",
+    ]
+)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("logbook", "0020_auto_20200511_1419"),
+        ("projects", "0029_alter_internaltype_ordering"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectVersion",
+            fields=[
+                (
+                    "project",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to="projects.project",
+                        verbose_name="project",
+                    ),
+                ),
+                ("version", models.BigIntegerField(verbose_name="version")),
+            ],
+            options={
+                "verbose_name": "project version",
+                "verbose_name_plural": "project versions",
+            },
+        ),
+        migrations.RunSQL(TRIGGERS, DROP_TRIGGERS),
+    ]
@@ -413,7 +413,6 @@ class Project(Model):
     def grouped_services(self):
         # Avoid circular imports
         from workbench.deals.models import Deal
-        from workbench.logbook.models import LoggedCost, LoggedHours
 
         # Logged vs. service hours
         service_hours = defaultdict(lambda: Z1)
@@ -435,47 +434,12 @@ class Project(Model):
             lambda: {"services": []}, ((offer, {"services": []}) for offer in offers)
         )
 
-        logged_hours_per_service_and_user = defaultdict(dict)
         logged_hours_per_user = defaultdict(lambda: Z1)
         logged_hours_per_effort_rate = defaultdict(lambda: Z1)
 
-        for row in (
-            LoggedHours.objects.order_by()
-            .filter(service__project=self)
-            .values("service", "rendered_by")
-            .annotate(Sum("hours"))
-        ):
-            logged_hours_per_user[row["rendered_by"]] += row["hours__sum"]
-            logged_hours_per_service_and_user[row["service"]][row["rendered_by"]] = row[
-                "hours__sum"
-            ]
-
-        logged_cost_per_service = {
-            row["service"]: row["cost__sum"]
-            for row in LoggedCost.objects.order_by()
-            .filter(service__project=self)
-            .values("service")
-            .annotate(Sum("cost"))
-        }
-
-        not_archived_logged_hours_per_service = {
-            row["service"]: row["hours__sum"]
-            for row in LoggedHours.objects.order_by()
-            .filter(
-                service__project=self,
-                archived_at__isnull=True,
-                service__effort_rate__isnull=False,
-            )
-            .values("service")
-            .annotate(Sum("hours"))
-        }
-        not_archived_logged_cost_per_service = {
-            row["service"]: row["cost__sum"]
-            for row in LoggedCost.objects.order_by()
-            .filter(service__project=self, archived_at__isnull=True)
-            .values("service")
-            .annotate(Sum("cost"))
-        }
+        for row in self.services_summary.values():
+            for user, hours in row["logged_hours_per_user"].items():
+                logged_hours_per_user[user] += hours
 
         users = {
             user.id: user
@@ -484,22 +448,23 @@ class Project(Model):
 
         for service in self.services.all():
             service.offer = offers_map.get(service.offer_id)  # Reuse
-            logged = logged_hours_per_service_and_user.get(service.id, {})
+            summary = self.services_summary.get(service.id, {})
+            logged = summary.get("logged_hours_per_user", {})
             row = {
                 "service": service,
-                "logged_hours": sum(logged.values(), Z1),
+                "logged_hours": summary.get("logged_hours", Z1),
                 "logged_hours_per_user": sorted(
                     ((users[user], hours) for user, hours in logged.items()),
                     key=lambda row: row[1],
                     reverse=True,
                 ),
-                "logged_cost": logged_cost_per_service.get(service.id, Z2),
-                "not_archived_logged_hours": not_archived_logged_hours_per_service.get(
-                    service.id, Z1
-                ),
-                "not_archived_logged_cost": not_archived_logged_cost_per_service.get(
-                    service.id, Z1
+                "logged_cost": summary.get("logged_cost", Z2),
+                "not_archived_logged_hours": (
+                    summary.get("not_archived_logged_hours", Z1)
+                    if service.effort_rate is not None
+                    else Z1
                 ),
+                "not_archived_logged_cost": summary.get("not_archived_logged_cost", Z2),
             }
             row["not_archived"] = (service.effort_rate or Z2) * row[
                 "not_archived_logged_hours"
@@ -611,30 +576,25 @@ class Project(Model):
         )
 
     @cached_property
-    def not_archived_total(self):
-        # Avoid circular imports
-        from workbench.logbook.models import LoggedCost, LoggedHours
+    def services_summary(self):
+        from workbench.projects.summary import services_summary
+
+        return services_summary(self.id)
 
+    @cached_property
+    def not_archived_total(self):
         total = Z2
         hours_rate_undefined = Z1
 
-        for row in (
-            LoggedHours.objects.order_by()
-            .filter(service__project=self, archived_at__isnull=True)
-            .values("service__effort_rate")
-            .annotate(Sum("hours"))
-        ):
-            if row["service__effort_rate"] is None:
-                hours_rate_undefined += row["hours__sum"]
+        for service_id, effort_rate in self.services.values_list("id", "effort_rate"):
+            summary = self.services_summary.get(service_id)
+            if summary is None:
+                continue
+            if effort_rate is None:
+                hours_rate_undefined += summary["not_archived_logged_hours"]
             else:
-                total += row["hours__sum"] * row["service__effort_rate"]
-
-        total += (
-            LoggedCost.objects.order_by()
-            .filter(service__project=self, archived_at__isnull=True)
-            .aggregate(Sum("cost"))["cost__sum"]
-            or Z2
-        )
+                total += summary["not_archived_logged_hours"] * effort_rate
+            total += summary["not_archived_logged_cost"]
         return {"total": total, "hours_rate_undefined": hours_rate_undefined}
 
     def solely_declined_offers_warning(self, *, request):
@@ -794,3 +754,28 @@ class Service(ServiceBase):
             and not self.is_work_completed
             and not self.is_budget_retainer
         )
+
+
+class ProjectVersion(models.Model):
+    """
+    Version of the logbook summary of a project, maintained by database triggers
+
+    See ``workbench.projects.summary``.
+    """
+
+    project = models.OneToOneField(
+        Project,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        primary_key=True,
+        verbose_name=_("project"),
+        related_name="+",
+    )
+    version = models.BigIntegerField(_("version"))
+
+    class Meta:
+        verbose_name = _("project version")
+        verbose_name_plural = _("project versions")
+
+    def __str__(self):
+        return f"{self.project_id}: {self.version}"
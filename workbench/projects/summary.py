@@ -0,0 +1,102 @@
+"""
+Cached logbook summary of project services
+
+The project detail and statistics pages need the logged and not yet archived
+hours and costs of every service of the project. Those are fetched with one
+grouped query and cached per project.
+
+Database triggers assign a new value of ``projects_projectversion_seq`` to a
+project whenever logbook entries or services of the project are inserted,
+updated or deleted. The version is part of the cache key. Sequences are not
+transactional, so versions of rolled back transactions are never reused.
+"""
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from workbench.tools.formats import Z1, Z2
+from workbench.tools.reporting import query
+
+
+def project_version(project_id):
+    rows = query(
+        "select version from projects_projectversion where project_id=%s",
+        [project_id],
+    )
+    return rows[0][0] if rows else 0
+
+
+def _summary(project_id):
+    summary = defaultdict(
+        lambda: {
+            "logged_hours_per_user": {},
+            "logged_hours": Z1,
+            "not_archived_logged_hours": Z1,
+            "logged_cost": Z2,
+            "not_archived_logged_cost": Z2,
+        }
+    )
+    for (
+        service_id,
+        user_id,
+        hours,
+        not_archived_hours,
+        cost,
+        not_archived_cost,
+    ) in query(
+        """
+select
+    lh.service_id,
+    lh.rendered_by_id,
+    sum(lh.hours),
+    coalesce(sum(lh.hours) filter (where lh.archived_at is null), 0),
+    0,
+    0
+from logbook_loggedhours lh
+join projects_service ps on lh.service_id=ps.id
+where ps.project_id=%s
+group by lh.service_id, lh.rendered_by_id
+
+union all
+
+select
+    lc.service_id,
+    null,
+    0,
+    0,
+    sum(lc.cost),
+    coalesce(sum(lc.cost) filter (where lc.archived_at is null), 0)
+from logbook_loggedcost lc
+join projects_service ps on lc.service_id=ps.id
+where ps.project_id=%s
+group by lc.service_id
+        """,
+        [project_id, project_id],
+    ):
+        row = summary[service_id]
+        if user_id is None:
+            row["logged_cost"] = cost
+            row["not_archived_logged_cost"] = not_archived_cost
+        else:
+            row["logged_hours_per_user"][user_id] = hours
+            row["logged_hours"] += hours
+            row["not_archived_logged_hours"] += not_archived_hours
+    return dict(summary)
+
+
+def services_summary(project_id):
+    """
+    Return a dictionary of logbook totals per service ID
+
+    Each value contains ``logged_hours``, ``logged_cost``, their not archived
+    counterparts and ``logged_hours_per_user`` (a dictionary of hours per
+    user ID). Services without logbook entries are missing.
+    """
+    key = f"project-services:{project_id}:{project_version(project_id)}"
+    summary = cache.get(key)
+    if summary is None:
+        summary = _summary(project_id)
+        cache.set(key, summary, settings.PROJECT_SERVICES_CACHE_TIMEOUT)
+    return summary
@@ -1,6 +1,7 @@
 import datetime as dt
 
 from django.core.exceptions import ValidationError
+from django.db.models import ProtectedError
 from django.test import TestCase
 from django.test.utils import override_settings
 
@@ -9,6 +10,8 @@ from workbench.accounts.features import FEATURES, F
 from workbench.contacts.models import Organization
 from workbench.offers.models import Offer
 from workbench.projects.models import InternalType, Project, Service
+from workbench.reporting.models import MonthlyLoggedHours
+from workbench.reporting.monthly_hours import logged_hours_by_service_and_user
 from workbench.tools.forms import WarningsForm
 from workbench.tools.testing import check_code, messages
 from workbench.tools.validation import in_days
@@ -165,6 +168,38 @@ class ProjectsTest(TestCase):
         )
         self.assertNotContains(response, "try_delete")
 
+    def test_reassign_logbook_closed_months(self):
+        """Stored hours of closed months follow reassigned logbook entries"""
+        closed = (dt.date.today().replace(day=1) - dt.timedelta(days=40)).replace(day=1)
+        hours = factories.LoggedHoursFactory.create(rendered_on=closed, hours=2)
+        service1 = hours.service
+        service2 = factories.ServiceFactory.create(project=service1.project)
+        user = hours.rendered_by
+        date_range = [closed, dt.date.today()]
+        self.assertEqual(
+            logged_hours_by_service_and_user(date_range), {(service1.id, user.id): 2}
+        )
+
+        # Stored hours protect the service
+        with self.assertRaises(ProtectedError):
+            Service.objects.filter(pk=service1.pk).delete()
+
+        self.client.force_login(service1.project.owned_by)
+        response = self.client.post(
+            service1.urls["reassign_logbook"],
+            {"service": service2.pk, "try_delete": "on"},
+            headers={"x-requested-with": "XMLHttpRequest"},
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(set(service1.project.services.all()), {service2})
+        self.assertEqual(
+            list(MonthlyLoggedHours.objects.values_list("month", "service", "hours")),
+            [(closed, service2.id, 2)],
+        )
+        self.assertEqual(
+            logged_hours_by_service_and_user(date_range), {(service2.id, user.id): 2}
+        )
+
     def test_service_with_rate_zero(self):
         """Services with 0/h rate are allowed (since effort_rate is Falsy)"""
         Service(
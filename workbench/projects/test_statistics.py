@@ -1,11 +1,12 @@
 import datetime as dt
 from decimal import Decimal
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.utils import timezone
 
 from workbench import factories
 from workbench.invoices.models import Invoice
-from workbench.projects.models import Project
+from workbench.projects.models import Project, Service
 from workbench.projects.reporting import hours_per_customer
 from workbench.reporting import green_hours, project_budget_statistics
 from workbench.reporting.models import Accruals
@@ -173,6 +174,80 @@ class StatisticsTest(TestCase):
             service=s_order, hours=10, rendered_on=dt.date(2019, 4, 1)
         )
 
+    def test_services_summary_cache(self):
+        """The cached services summary follows logbook and service changes"""
+        service = factories.ServiceFactory.create(effort_rate=100, effort_type="Any")
+        hours = factories.LoggedHoursFactory.create(service=service, hours=2)
+        factories.LoggedCostFactory.create(service=service, cost=50)
+
+        project = Project.objects.get()
+        self.assertEqual(project.grouped_services["logged_hours"], 2)
+        self.assertEqual(project.not_archived_total["total"], 250)
+
+        project = Project.objects.get()
+        with self.assertNumQueries(1):
+            summary = project.services_summary
+        self.assertEqual(
+            summary[service.id]["logged_hours_per_user"], {hours.rendered_by_id: 2}
+        )
+
+        factories.LoggedHoursFactory.create(service=service, hours=3)
+        project = Project.objects.get()
+        self.assertEqual(project.grouped_services["logged_hours"], 5)
+        self.assertEqual(project.not_archived_total["total"], 550)
+
+        service.loggedhours.update(archived_at=timezone.now())
+        project = Project.objects.get()
+        self.assertEqual(project.grouped_services["logged_hours"], 5)
+        self.assertEqual(project.not_archived_total["total"], 50)
+
+        other = factories.ProjectFactory.create()
+        self.assertEqual(other.services_summary, {})
+        Service.objects.filter(id=service.id).update(project=other)
+        other = Project.objects.get(id=other.id)
+        self.assertEqual(other.services_summary[service.id]["logged_hours"], 5)
+        project = Project.objects.get(id=project.id)
+        self.assertEqual(project.services_summary, {})
+
+    def test_project_budget_statistics_cache(self):
+        """Cached project budget statistics rows are reused until data changes"""
+        p1 = factories.ProjectFactory.create()
+        p2 = factories.ProjectFactory.create()
+        factories.LoggedHoursFactory.create(service__project=p1, hours=5)
+        factories.LoggedHoursFactory.create(service__project=p2, hours=3)
+
+        def hours(projects):
+            stats = project_budget_statistics.project_budget_statistics(projects)
+            return [row["hours"] for row in stats["statistics"]]
+
+        with project_budget_statistics.statistics_cache():
+            with self.assertNumQueries(8):
+                self.assertEqual(hours([p1]), [5])
+            # Only the second project is fetched
+            with self.assertNumQueries(8):
+                self.assertEqual(hours([p1, p2]), [5, 3])
+            with self.assertNumQueries(1):
+                self.assertEqual(hours([p2, p1]), [3, 5])
+
+            factories.LoggedHoursFactory.create(service__project=p1, hours=2)
+            # Logged hours only invalidate the row of their project
+            with self.assertNumQueries(1):
+                self.assertEqual(hours([p2]), [3])
+            self.assertEqual(hours([p1, p2]), [7, 3])
+
+            factories.ProjectedInvoiceFactory.create(project=p2)
+            with self.assertNumQueries(8):
+                self.assertEqual(hours([p2]), [3])
+
+        # Without a cache
+        with self.assertNumQueries(7):
+            self.assertEqual(hours([p1]), [7])
+
+        with override_settings(PROJECT_BUDGET_STATISTICS_CACHE_TIMEOUT=60):
+            self.assertEqual(hours([p1]), [7])
+            with self.assertNumQueries(1):
+                self.assertEqual(hours([p1]), [7])
+
     def test_green_hours(self):
         """Green hours report incl. filtering and overall stats"""
         self.create_projects()
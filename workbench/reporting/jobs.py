@@ -0,0 +1,54 @@
+"""
+Background job handlers of reports and XLSX exports
+
+See ``workbench.jobs.runner`` for the protocol. Date ranges are passed as a
+list of two ISO dates in ``job.parameters["date_range"]``.
+"""
+
+import datetime as dt
+
+from workbench.accounts.models import User
+from workbench.reporting import green_hours, key_data, labor_costs
+from workbench.reporting.squeeze import squeeze_report
+from workbench.reporting.workload import workload_xlsx
+from workbench.tools.xlsx import WorkbenchXLSXDocument
+
+
+def _date_range(job):
+    return [dt.date.fromisoformat(day) for day in job.parameters["date_range"]]
+
+
+def labor_costs_job(job):
+    date_range = _date_range(job)
+    xlsx = WorkbenchXLSXDocument()
+    xlsx.labor_costs(labor_costs.labor_costs_by_cost_center(date_range))
+    return xlsx.to_artifact(f"labor-costs-{date_range[0]}-{date_range[1]}.xlsx")
+
+
+def green_hours_job(job):
+    date_range = _date_range(job)
+    users = job.parameters.get("users")
+    xlsx = WorkbenchXLSXDocument()
+    xlsx.green_hours(
+        green_hours.green_hours(
+            date_range,
+            users=User.objects.filter(id__in=users) if users else None,
+        )
+    )
+    return xlsx.to_artifact(f"green-hours-{date_range[0]}-{date_range[1]}.xlsx")
+
+
+def key_data_job(job):
+    date_range = _date_range(job)
+    xlsx = WorkbenchXLSXDocument()
+    xlsx.gross_margin_by_month(key_data.gross_margin_by_month(date_range))
+    return xlsx.to_artifact(f"key-data-{date_range[0]}-{date_range[1]}.xlsx")
+
+
+def squeeze_job(job):
+    return squeeze_report(_date_range(job))
+
+
+def workload_job(job):
+    filename, xlsx = workload_xlsx(dt.date.fromisoformat(job.parameters["start"]))
+    return xlsx.to_artifact(filename)
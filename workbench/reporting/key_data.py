@@ -2,6 +2,7 @@ import datetime as dt
 from collections import defaultdict
 from itertools import takewhile
 
+from django.db import transaction
 from django.db.models import Q, Sum
 from django.db.models.functions import ExtractMonth, ExtractYear
 
@@ -11,7 +12,7 @@ from workbench.invoices.utils import recurring
 from workbench.logbook.models import LoggedCost, LoggedHours
 from workbench.offers.models import Offer
 from workbench.projects.models import Project, Service
-from workbench.reporting.models import Accruals
+from workbench.reporting.models import Accruals, KeyDataFact
 from workbench.tools.formats import Z1, Z2
 
 
@@ -85,11 +86,115 @@ def accruals_by_month(date_range):
     }
 
 
+def _month_range(date_range):
+    """
+    Extend the date range to cover whole months
+    """
+    end = date_range[1].replace(day=1)
+    return [
+        date_range[0].replace(day=1),
+        end.replace(year=end.year + end.month // 12, month=end.month % 12 + 1)
+        - dt.timedelta(days=1),
+    ]
+
+
+def _compute_key_data(date_range):
+    fte = full_time_equivalents_by_month(since=date_range[0])
+    return {
+        KeyDataFact.GROSS_PROFIT: gross_profit_by_month(date_range),
+        KeyDataFact.THIRD_PARTY_COSTS: third_party_costs_by_month(date_range),
+        KeyDataFact.FULL_TIME_EQUIVALENTS: {
+            (day.year, day.month): value
+            for day, value in fte.items()
+            if date_range[0] <= day <= date_range[1]
+        },
+    }
+
+
+def refresh_key_data(date_range):
+    """
+    Recompute and store the key data facts of all closed months in the range
+    """
+    date_range = _month_range(date_range)
+    date_range[1] = min(
+        date_range[1], dt.date.today().replace(day=1) - dt.timedelta(days=1)
+    )
+    if date_range[0] > date_range[1]:
+        return
+
+    facts = _compute_key_data(date_range)
+    with transaction.atomic():
+        KeyDataFact.objects.filter(month__range=date_range).delete()
+        KeyDataFact.objects.bulk_create(
+            KeyDataFact(
+                month=day,
+                metric=metric,
+                value=values.get((day.year, day.month), Z2),
+            )
+            for day in takewhile(
+                lambda day: day < date_range[1],
+                recurring(date_range[0], "monthly"),
+            )
+            for metric, values in facts.items()
+        )
+
+
+def invalidate_key_data(date_range):
+    """
+    Remove stored key data facts; they are recomputed when needed next time
+    """
+    KeyDataFact.objects.filter(month__range=_month_range(date_range)).delete()
+
+
+def key_data_by_month(date_range):
+    """
+    Return gross profit, third party costs and full time equivalents by month
+
+    Closed months are read from the fact store (and refreshed first if they
+    are missing), the current and future months are always computed live.
+    Months are always included completely even if the range starts or ends
+    in the middle of a month.
+    """
+    date_range = _month_range(date_range)
+    this_month = dt.date.today().replace(day=1)
+    data = {
+        KeyDataFact.GROSS_PROFIT: defaultdict(lambda: Z2),
+        KeyDataFact.THIRD_PARTY_COSTS: defaultdict(lambda: Z2),
+        KeyDataFact.FULL_TIME_EQUIVALENTS: {},
+    }
+
+    if date_range[0] < this_month:
+        closed = [date_range[0], min(date_range[1], this_month - dt.timedelta(days=1))]
+        months = set(
+            takewhile(lambda day: day < closed[1], recurring(closed[0], "monthly"))
+        )
+        facts = list(KeyDataFact.objects.filter(month__range=closed))
+        if missing := months - {fact.month for fact in facts}:
+            refresh_key_data([min(missing), max(missing)])
+            facts = list(KeyDataFact.objects.filter(month__range=closed))
+
+        for fact in facts:
+            month = (fact.month.year, fact.month.month)
+            if fact.metric == KeyDataFact.FULL_TIME_EQUIVALENTS:
+                if fact.value:
+                    data[fact.metric][month] = fact.value
+            else:
+                data[fact.metric][month] = fact.value.quantize(Z2)
+
+    if date_range[1] >= this_month:
+        live = _compute_key_data([max(date_range[0], this_month), date_range[1]])
+        for metric, values in live.items():
+            data[metric].update(values)
+
+    return data
+
+
 def gross_margin_by_month(date_range):
-    gross = gross_profit_by_month(date_range)
-    third = third_party_costs_by_month(date_range)
+    data = key_data_by_month(date_range)
+    gross = data[KeyDataFact.GROSS_PROFIT]
+    third = data[KeyDataFact.THIRD_PARTY_COSTS]
+    fte = data[KeyDataFact.FULL_TIME_EQUIVALENTS]
     accruals = accruals_by_month(date_range)
-    fte = full_time_equivalents_by_month()
 
     pgm = projected_gross_margin()
 
@@ -110,7 +215,7 @@ def gross_margin_by_month(date_range):
             "gross_profit": gross[month],
             "third_party_costs": third[month],
             "accruals": accruals.get(month) or {"accrual": None, "delta": Z2},
-            "fte": fte.get(day, Z2),
+            "fte": fte.get(month, Z2),
             "projected_gross_margin": pgm["monthly_overall"].get(month),
         }
         if not any((
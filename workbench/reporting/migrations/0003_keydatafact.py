@@ -0,0 +1,58 @@
+# Generated by Django 5.0.6 on 2026-10-17 06:17
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reporting", "0002_costcenter"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="KeyDataFact",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.DateField(verbose_name="month")),
+                (
+                    "metric",
+                    models.CharField(
+                        choices=[
+                            ("gross_profit", "gross profit"),
+                            ("third_party_costs", "third party costs"),
+                            ("fte", "full time equivalents"),
+                        ],
+                        max_length=20,
+                        verbose_name="metric",
+                    ),
+                ),
+                (
+                    "value",
+                    models.DecimalField(
+                        decimal_places=10, max_digits=20, verbose_name="value"
+                    ),
+                ),
+                (
+                    "computed_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="computed at"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "key data fact",
+                "verbose_name_plural": "key data facts",
+                "ordering": ["month", "metric"],
+                "unique_together": {("month", "metric")},
+            },
+        ),
+    ]
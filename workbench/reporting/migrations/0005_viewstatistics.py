@@ -0,0 +1,45 @@
+# Generated by Django 5.0.6 on 2026-10-17 08:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reporting", "0004_monthlyloggedhours"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ViewStatistics",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(verbose_name="day")),
+                ("view_name", models.CharField(max_length=200, verbose_name="view")),
+                ("method", models.CharField(max_length=10, verbose_name="method")),
+                ("requests", models.PositiveIntegerField(verbose_name="requests")),
+                ("queries", models.PositiveIntegerField(verbose_name="queries")),
+                (
+                    "max_queries",
+                    models.PositiveIntegerField(verbose_name="max. queries"),
+                ),
+                ("db_time", models.FloatField(verbose_name="database time")),
+                ("python_time", models.FloatField(verbose_name="Python time")),
+                ("max_time", models.FloatField(verbose_name="max. time")),
+                ("response_size", models.BigIntegerField(verbose_name="response size")),
+            ],
+            options={
+                "verbose_name": "view statistics",
+                "verbose_name_plural": "view statistics",
+                "ordering": ["-day", "view_name", "method"],
+                "unique_together": {("day", "view_name", "method")},
+            },
+        ),
+    ]
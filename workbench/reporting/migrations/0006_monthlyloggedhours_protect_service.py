@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-17 09:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("projects", "0030_project_version"),
+        ("reporting", "0005_viewstatistics"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="monthlyloggedhours",
+            name="service",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="projects.service",
+                verbose_name="service",
+            ),
+        ),
+    ]
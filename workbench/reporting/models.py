@@ -1,10 +1,12 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from workbench.projects.models import Project
+from workbench.accounts.models import User
+from workbench.projects.models import Project, Service
 from workbench.reporting.project_budget_statistics import project_budget_statistics
 from workbench.tools.formats import local_date_format
-from workbench.tools.models import MoneyField
+from workbench.tools.models import HoursField, MoneyField
 
 
 class AccrualsQuerySet(models.QuerySet):
@@ -36,6 +38,60 @@ class Accruals(models.Model):
         return local_date_format(self.cutoff_date)
 
 
+class KeyDataFact(models.Model):
+    GROSS_PROFIT = "gross_profit"
+    THIRD_PARTY_COSTS = "third_party_costs"
+    FULL_TIME_EQUIVALENTS = "fte"
+
+    METRIC_CHOICES = [
+        (GROSS_PROFIT, _("gross profit")),
+        (THIRD_PARTY_COSTS, _("third party costs")),
+        (FULL_TIME_EQUIVALENTS, _("full time equivalents")),
+    ]
+
+    month = models.DateField(_("month"))
+    metric = models.CharField(_("metric"), max_length=20, choices=METRIC_CHOICES)
+    value = models.DecimalField(_("value"), max_digits=20, decimal_places=10)
+    computed_at = models.DateTimeField(_("computed at"), default=timezone.now)
+
+    class Meta:
+        ordering = ["month", "metric"]
+        unique_together = [("month", "metric")]
+        verbose_name = _("key data fact")
+        verbose_name_plural = _("key data facts")
+
+    def __str__(self):
+        return (
+            f"{local_date_format(self.month, fmt='F Y')}: {self.get_metric_display()}"
+        )
+
+
+class MonthlyLoggedHours(models.Model):
+    month = models.DateField(_("month"))
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.PROTECT,
+        related_name="+",
+        verbose_name=_("service"),
+    )
+    rendered_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name=_("rendered by"),
+    )
+    hours = HoursField(_("hours"))
+
+    class Meta:
+        ordering = ["month"]
+        unique_together = [("month", "service", "rendered_by")]
+        verbose_name = _("monthly logged hours")
+        verbose_name_plural = _("monthly logged hours")
+
+    def __str__(self):
+        return f"{local_date_format(self.month, fmt='F Y')}: {self.hours}"
+
+
 class CostCenter(models.Model):
     title = models.CharField(_("title"), max_length=200)
     position = models.PositiveIntegerField(_("position"), default=0)
@@ -47,3 +103,31 @@ class CostCenter(models.Model):
 
     def __str__(self):
         return self.title
+
+
+class ViewStatistics(models.Model):
+    """
+    Sampled request statistics per day, view and method
+
+    See ``workbench.reporting.view_statistics``.
+    """
+
+    day = models.DateField(_("day"))
+    view_name = models.CharField(_("view"), max_length=200)
+    method = models.CharField(_("method"), max_length=10)
+    requests = models.PositiveIntegerField(_("requests"))
+    queries = models.PositiveIntegerField(_("queries"))
+    max_queries = models.PositiveIntegerField(_("max. queries"))
+    db_time = models.FloatField(_("database time"))
+    python_time = models.FloatField(_("Python time"))
+    max_time = models.FloatField(_("max. time"))
+    response_size = models.BigIntegerField(_("response size"))
+
+    class Meta:
+        ordering = ["-day", "view_name", "method"]
+        unique_together = [("day", "view_name", "method")]
+        verbose_name = _("view statistics")
+        verbose_name_plural = _("view statistics")
+
+    def __str__(self):
+        return f"{local_date_format(self.day)}: {self.method} {self.view_name}"
@@ -0,0 +1,128 @@
+"""
+Logged hours per month, service and user
+
+Logged hours cannot be added, changed or deleted before the logbook lock
+anymore. The totals of months which ended before the lock are therefore
+stored in ``MonthlyLoggedHours`` when they are needed the first time, all
+other hours are summed up live.
+"""
+
+import datetime as dt
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+from workbench.logbook.models import LoggedHours
+from workbench.reporting.models import MonthlyLoggedHours
+from workbench.tools.formats import Z1
+from workbench.tools.validation import logbook_lock
+
+
+def _month_end(day):
+    next_month = (day.replace(day=1) + dt.timedelta(days=31)).replace(day=1)
+    return next_month - dt.timedelta(days=1)
+
+
+def month_ranges(date_range):
+    """
+    Split the date range into ``[start, end]`` ranges at month boundaries
+    """
+    ranges = []
+    day = date_range[0]
+    while day <= date_range[1]:
+        ranges.append([day, min(_month_end(day), date_range[1])])
+        day = ranges[-1][1] + dt.timedelta(days=1)
+    return ranges
+
+
+def closed_months(date_range):
+    """
+    Return the first days of all complete months in the range which ended
+    before the logbook lock
+    """
+    lock = logbook_lock()
+    return [
+        start
+        for start, end in month_ranges(date_range)
+        if start.day == 1 and end == _month_end(start) and end < lock
+    ]
+
+
+def _logged_hours(date_range):
+    return (
+        LoggedHours.objects.filter(rendered_on__range=date_range)
+        .order_by()
+        .values("service", "rendered_by")
+        .annotate(hours=Sum("hours"))
+    )
+
+
+def refresh_monthly_logged_hours(months, *, force=False):
+    """
+    Compute and store the logged hours of closed months
+
+    Months which are already stored are skipped unless ``force`` is set.
+    """
+    months = set(months)
+    if not force:
+        months -= set(
+            MonthlyLoggedHours.objects.filter(month__in=months)
+            .values_list("month", flat=True)
+            .distinct()
+        )
+    if not months:
+        return
+
+    with transaction.atomic():
+        MonthlyLoggedHours.objects.filter(month__in=months).delete()
+        MonthlyLoggedHours.objects.bulk_create(
+            (
+                MonthlyLoggedHours(
+                    month=row["month"],
+                    service_id=row["service"],
+                    rendered_by_id=row["rendered_by"],
+                    hours=row["hours"],
+                )
+                for row in _logged_hours([min(months), _month_end(max(months))])
+                .annotate(month=TruncMonth("rendered_on"))
+                .values("month", "service", "rendered_by", "hours")
+                if row["month"] in months
+            ),
+            ignore_conflicts=True,
+        )
+
+
+def logged_hours_by_service_and_user(date_range):
+    """
+    Return a dictionary of logged hours in the range by ``(service ID, user
+    ID)``
+    """
+    months = closed_months(date_range)
+    refresh_monthly_logged_hours(months)
+
+    hours = defaultdict(lambda: Z1)
+    for row in (
+        MonthlyLoggedHours.objects.filter(month__in=months)
+        .order_by()
+        .values("service", "rendered_by")
+        .annotate(hours=Sum("hours"))
+    ):
+        hours[row["service"], row["rendered_by"]] += row["hours"]
+
+    live = [
+        [start, end] for start, end in month_ranges(date_range) if start not in months
+    ]
+    # Merge adjacent ranges to avoid one query per month
+    merged = []
+    for start, end in live:
+        if merged and merged[-1][1] + dt.timedelta(days=1) == start:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    for live_range in merged:
+        for row in _logged_hours(live_range):
+            hours[row["service"], row["rendered_by"]] += row["hours"]
+
+    return dict(hours)
@@ -1,6 +1,10 @@
 import datetime as dt
 from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
 from django.db.models import Sum
 from django.utils import timezone
@@ -10,15 +14,70 @@ from workbench.logbook.models import LoggedCost, LoggedHours
 from workbench.offers.models import Offer
 from workbench.projects.models import Service
 from workbench.tools.formats import Z1, Z2
+from workbench.tools.reporting import query
 
 
-def project_budget_statistics(projects, *, cutoff_date=None):
-    cutoff_date = cutoff_date or dt.date.today()
+#: Changes to these tables invalidate all cached statistics (see the ``audit``
+#: migrations), changes to logbook entries and services only invalidate the
+#: rows of their project (see ``workbench.projects.summary``)
+STATISTICS_TABLES = [
+    "invoices_invoice",
+    "invoices_projectedinvoice",
+    "offers_offer",
+    "projects_project",
+]
+
+_request_cache = ContextVar("project_budget_statistics_cache", default=None)
+
+
+@contextmanager
+def statistics_cache():
+    """
+    Share project budget statistics rows until the block is left
+    """
+    token = _request_cache.set({})
+    try:
+        yield
+    finally:
+        _request_cache.reset(token)
+
+
+def statistics_cache_middleware(get_response):
+    def middleware(request):
+        with statistics_cache():
+            return get_response(request)
+
+    return middleware
+
+
+def _statistics_versions(project_ids):
+    """
+    Return the versions of the statistics rows of the projects
+    """
+    return {
+        project_id: f"{tables}.{project}"
+        for project_id, project, tables in query(
+            """
+select p.id, coalesce(v.version, 0), coalesce(t.version, 0)
+from unnest(%s::integer[]) AS p(id)
+left join projects_projectversion v on v.project_id=p.id
+cross join (
+    select max(version) AS version
+    from audit_tableversion
+    where table_name=any(%s)
+) t
+            """,
+            [list(project_ids), STATISTICS_TABLES],
+        )
+    }
+
+
+def _project_rows(project_ids, cutoff_date):
     cutoff_dttm = timezone.make_aware(dt.datetime.combine(cutoff_date, dt.time.max))
 
     costs = (
         LoggedCost.objects.filter(
-            service__project__in=projects, rendered_on__lte=cutoff_dttm
+            service__project__in=project_ids, rendered_on__lte=cutoff_dttm
         )
         .order_by()
         .values("service__project")
@@ -36,7 +95,7 @@ def project_budget_statistics(projects, *, cutoff_date=None):
 
     hours = (
         LoggedHours.objects.filter(
-            service__project__in=projects, rendered_on__lte=cutoff_dttm
+            service__project__in=project_ids, rendered_on__lte=cutoff_dttm
         )
         .order_by()
         .values("service__project", "service__effort_rate")
@@ -60,7 +119,7 @@ def project_budget_statistics(projects, *, cutoff_date=None):
     service_hours = {
         row["project"]: row["service_hours__sum"]
         for row in Service.objects.budgeted()
-        .filter(project__in=projects)
+        .filter(project__in=project_ids)
         .order_by()
         .values("project")
         .annotate(Sum("service_hours"))
@@ -69,7 +128,7 @@ def project_budget_statistics(projects, *, cutoff_date=None):
     sold_per_project = {
         row["project"]: row["total_excl_tax__sum"]
         for row in Offer.objects.accepted()
-        .filter(project__in=projects, is_budget_retainer=False)
+        .filter(project__in=project_ids, is_budget_retainer=False)
         .order_by()
         .values("project")
         .annotate(Sum("total_excl_tax"))
@@ -77,7 +136,7 @@ def project_budget_statistics(projects, *, cutoff_date=None):
     invoiced_per_project = {
         row["project"]: row["total_excl_tax__sum"]
         for row in Invoice.objects.invoiced()
-        .filter(project__in=projects, invoiced_on__lte=cutoff_date)
+        .filter(project__in=project_ids, invoiced_on__lte=cutoff_date)
         .order_by()
         .values("project")
         .annotate(Sum("total_excl_tax"))
@@ -87,7 +146,7 @@ def project_budget_statistics(projects, *, cutoff_date=None):
     projected_gross_margin = defaultdict(lambda: Z2)
     for row in (
         ProjectedInvoice.objects.filter(
-            project__in=projects, project__closed_on__isnull=True
+            project__in=project_ids, project__closed_on__isnull=True
         )
         .annotate(
             before_cutoff_date=models.ExpressionWrapper(
@@ -105,31 +164,83 @@ def project_budget_statistics(projects, *, cutoff_date=None):
             ]
         projected_gross_margin[row["project"]] += row["gross_margin__sum"]
 
-    statistics = [
-        {
-            "project": project,
-            "logbook": cost_per_project.get(project.id, Z2)
-            + effort_cost_per_project[project.id],
-            "cost": cost_per_project.get(project.id, Z2),
-            "effort_cost": effort_cost_per_project[project.id],
+    return {
+        project_id: {
+            "logbook": cost_per_project.get(project_id, Z2)
+            + effort_cost_per_project[project_id],
+            "cost": cost_per_project.get(project_id, Z2),
+            "effort_cost": effort_cost_per_project[project_id],
             "effort_hours_with_rate_undefined": effort_hours_with_rate_undefined_per_project[
-                project.id
+                project_id
             ],
-            "third_party_costs": third_party_costs_per_project.get(project.id, Z2),
-            "sold": sold_per_project.get(project.id, Z2),
-            "invoiced": invoiced_per_project.get(project.id, Z2),
-            "hours": hours_per_project[project.id],
-            "service_hours": service_hours.get(project.id, Z1),
-            "delta": cost_per_project.get(project.id, Z2)
-            + effort_cost_per_project[project.id]
-            - invoiced_per_project.get(project.id, Z2),
-            "projected_gross_margin": projected_gross_margin[project.id],
+            "third_party_costs": third_party_costs_per_project.get(project_id, Z2),
+            "sold": sold_per_project.get(project_id, Z2),
+            "invoiced": invoiced_per_project.get(project_id, Z2),
+            "hours": hours_per_project[project_id],
+            "service_hours": service_hours.get(project_id, Z1),
+            "delta": cost_per_project.get(project_id, Z2)
+            + effort_cost_per_project[project_id]
+            - invoiced_per_project.get(project_id, Z2),
+            "projected_gross_margin": projected_gross_margin[project_id],
             "projected_gross_margin_on_cutoff_date": projected_gross_margin_on_cutoff_date.get(
-                project.id, Z2
+                project_id, Z2
             ),
         }
-        for project in projects
-    ]
+        for project_id in project_ids
+    }
+
+
+def _cached_project_rows(project_ids, cutoff_date):
+    """
+    Return statistics rows, fetching only those not cached yet
+
+    Rows are cached per request when running inside ``statistics_cache()``
+    and in Django's cache if ``PROJECT_BUDGET_STATISTICS_CACHE_TIMEOUT`` is
+    set. Keys contain the trigger maintained versions of the project and of
+    the other underlying tables, so any change to them invalidates the
+    cached rows.
+    """
+    request_cache = _request_cache.get()
+    timeout = settings.PROJECT_BUDGET_STATISTICS_CACHE_TIMEOUT
+    if request_cache is None and not timeout:
+        return _project_rows(project_ids, cutoff_date)
+
+    keys = {
+        project_id: f"pbs:{version}:{cutoff_date.isoformat()}:{project_id}"
+        for project_id, version in _statistics_versions(project_ids).items()
+    }
+    rows = {
+        project_id: request_cache[key]
+        for project_id, key in keys.items()
+        if request_cache and key in request_cache
+    }
+    if timeout:
+        cached = cache.get_many([
+            key for project_id, key in keys.items() if project_id not in rows
+        ])
+        rows |= {
+            project_id: cached[key] for project_id, key in keys.items() if key in cached
+        }
+
+    if missing := [project_id for project_id in project_ids if project_id not in rows]:
+        fetched = _project_rows(missing, cutoff_date)
+        rows |= fetched
+        if timeout:
+            cache.set_many(
+                {keys[project_id]: row for project_id, row in fetched.items()},
+                timeout,
+            )
+
+    if request_cache is not None:
+        request_cache |= {keys[project_id]: row for project_id, row in rows.items()}
+    return rows
+
+
+def project_budget_statistics(projects, *, cutoff_date=None):
+    cutoff_date = cutoff_date or dt.date.today()
+    projects = list(projects)
+    rows = _cached_project_rows([project.id for project in projects], cutoff_date)
+    statistics = [{"project": project} | rows[project.id] for project in projects]
     overall = {
         key: sum(s[key] for s in statistics)
         for key in [
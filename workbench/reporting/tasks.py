@@ -1,6 +1,7 @@
 import datetime as dt
 
 from workbench.invoices.utils import recurring
+from workbench.reporting.key_data import refresh_key_data
 from workbench.reporting.models import Accruals
 
 
@@ -12,3 +13,8 @@ def create_accruals_for_last_month():
         if day > today:
             break
         Accruals.objects.for_cutoff_date(day - dt.timedelta(days=1))
+
+
+def refresh_key_data_facts():
+    today = dt.date.today()
+    refresh_key_data([today.replace(year=today.year - 2, day=1), today])
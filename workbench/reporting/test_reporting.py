@@ -1,12 +1,34 @@
 import datetime as dt
+import io
 from decimal import Decimal
 
-from django.test import RequestFactory, TestCase
+from django.core import mail
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
 
 from workbench import factories
+from workbench.logbook.models import LoggedHours
+from workbench.reporting.key_data import (
+    gross_margin_by_month,
+    invalidate_key_data,
+    key_data_by_month,
+    refresh_key_data,
+)
 from workbench.reporting.labor_costs import labor_costs_by_cost_center
-from workbench.reporting.models import Accruals
+from workbench.reporting.models import (
+    Accruals,
+    KeyDataFact,
+    MonthlyLoggedHours,
+    ViewStatistics,
+)
+from workbench.reporting.monthly_hours import (
+    logged_hours_by_service_and_user,
+    month_ranges,
+    refresh_monthly_logged_hours,
+)
+from workbench.reporting.view_statistics import slowest_views
 from workbench.reporting.views import DateRangeAndTeamFilterForm
+from workbench.tools.testing import check_query_budget
 
 
 class ReportingTest(TestCase):
@@ -16,6 +38,117 @@ class ReportingTest(TestCase):
         self.assertEqual(obj.accruals, Decimal("0.00"))
         self.assertEqual(str(obj), obj.cutoff_date.strftime("%d.%m.%Y"))
 
+    def test_key_data_facts(self):
+        """Closed months are read from the fact store, the current month is live"""
+        today = dt.date.today()
+        this_month = today.replace(day=1)
+        last_month = (this_month - dt.timedelta(days=1)).replace(day=1)
+        date_range = [last_month, today]
+
+        factories.EmploymentFactory.create(date_from=dt.date(2010, 1, 1))
+        invoice = factories.InvoiceFactory.create(
+            subtotal=100,
+            third_party_costs=10,
+            status=factories.Invoice.SENT,
+            invoiced_on=last_month,
+        )
+        factories.InvoiceFactory.create(
+            subtotal=50, status=factories.Invoice.SENT, invoiced_on=today
+        )
+
+        key_data_by_month(date_range)
+        # Missing closed months have been stored
+        self.assertEqual(KeyDataFact.objects.count(), 3)
+        # One query for the facts, four for computing the current month
+        with self.assertNumQueries(5):
+            data = key_data_by_month(date_range)
+        self.assertEqual(
+            data[KeyDataFact.GROSS_PROFIT][(last_month.year, last_month.month)],
+            Decimal("100.00"),
+        )
+        self.assertEqual(
+            data[KeyDataFact.THIRD_PARTY_COSTS][(last_month.year, last_month.month)],
+            Decimal("-10.00"),
+        )
+        self.assertEqual(
+            data[KeyDataFact.GROSS_PROFIT][(today.year, today.month)],
+            Decimal("50.00"),
+        )
+        self.assertEqual(
+            data[KeyDataFact.FULL_TIME_EQUIVALENTS][(today.year, today.month)], 1
+        )
+
+        # Stored facts are not recomputed...
+        invoice.subtotal = 200
+        invoice.save()
+        rows = gross_margin_by_month(date_range)
+        self.assertEqual(rows[0]["gross_profit"], Decimal("100.00"))
+        self.assertEqual(rows[0]["fte"], 1)
+
+        # ... until they are refreshed or invalidated
+        refresh_key_data(date_range)
+        self.assertEqual(gross_margin_by_month(date_range)[0]["gross_profit"], 200)
+
+        invalidate_key_data(date_range)
+        self.assertEqual(KeyDataFact.objects.count(), 0)
+
+        call_command("key_data_facts", stdout=io.StringIO())
+        self.assertEqual(KeyDataFact.objects.count(), 3 * 24)
+        self.assertEqual(
+            str(KeyDataFact.objects.filter(month=last_month).first()),
+            f"{last_month:%B %Y}: full time equivalents",
+        )
+
+    def test_monthly_logged_hours(self):
+        """Logged hours of closed months are stored, the rest is summed up live"""
+        today = dt.date.today()
+        # Months ending two months ago are always before the logbook lock
+        closed = (today.replace(day=1) - dt.timedelta(days=40)).replace(day=1)
+        date_range = [closed, today]
+
+        factories.EmploymentFactory.create(date_from=dt.date(2010, 1, 1))
+        hours = factories.LoggedHoursFactory.create(rendered_on=closed, hours=2)
+        factories.LoggedHoursFactory.create(
+            service=hours.service, rendered_by=hours.rendered_by, hours=3
+        )
+        key = (hours.service_id, hours.rendered_by_id)
+
+        self.assertEqual(logged_hours_by_service_and_user(date_range), {key: 5})
+        self.assertEqual(
+            list(MonthlyLoggedHours.objects.values_list("month", "hours")),
+            [(closed, 2)],
+        )
+        self.assertEqual(str(MonthlyLoggedHours.objects.get()), f"{closed:%B %Y}: 2.0")
+        self.assertEqual(
+            month_ranges([dt.date(2024, 1, 15), dt.date(2024, 2, 10)]),
+            [
+                [dt.date(2024, 1, 15), dt.date(2024, 1, 31)],
+                [dt.date(2024, 2, 1), dt.date(2024, 2, 10)],
+            ],
+        )
+
+        # Stored months are not recomputed until they are refreshed
+        LoggedHours.objects.filter(pk=hours.pk).update(hours=4)
+        self.assertEqual(logged_hours_by_service_and_user(date_range), {key: 5})
+        refresh_monthly_logged_hours([closed], force=True)
+        self.assertEqual(logged_hours_by_service_and_user(date_range), {key: 7})
+
+        # The squeeze report needs logged hours in every month
+        factories.LoggedHoursFactory.create(
+            rendered_on=today.replace(day=1) - dt.timedelta(days=1)
+        )
+        call_command(
+            "squeeze",
+            "--monthly",
+            "--workers=1",
+            f"--range={closed:%Y%m%d}-{today:%Y%m%d}",
+            "--mailto=test@example.com",
+        )
+        self.assertEqual(
+            [attachment[0] for attachment in mail.outbox[0].attachments],
+            [f"squeeze-{start}-{end}.xlsx" for start, end in month_ranges(date_range)],
+        )
+
     def test_labor_costs(self):
         """The labor costs report does a few things"""
         user1 = factories.EmploymentFactory.create().user
@@ -78,3 +211,40 @@ class ReportingTest(TestCase):
         form = DateRangeAndTeamFilterForm({"team": -user2.id}, request=req)
         self.assertTrue(form.is_valid())
         self.assertEqual(set(form.users()), {user2})
+
+    def test_view_statistics(self):
+        """Sampled requests are aggregated per view and reported"""
+        user = factories.UserFactory.create()
+        self.client.force_login(user)
+
+        with override_settings(VIEW_STATISTICS_SAMPLE_RATE=0):
+            check_query_budget(self, "/", 20)
+        self.assertEqual(ViewStatistics.objects.count(), 0)
+
+        with override_settings(VIEW_STATISTICS_SAMPLE_RATE=1):
+            response = check_query_budget(self, "/", 20)
+            self.client.get("/")
+            self.client.get("/report/logging/")
+            self.client.get("/this-does-not-exist/")
+
+        stats = ViewStatistics.objects.get(view_name="workbench.views.start")
+        self.assertEqual(stats.day, dt.date.today())
+        self.assertEqual(stats.method, "GET")
+        self.assertEqual(stats.requests, 2)
+        self.assertGreater(stats.max_queries, 0)
+        self.assertGreaterEqual(stats.response_size, 2 * len(response.content))
+        self.assertEqual(ViewStatistics.objects.count(), 2)  # 404 not recorded
+
+        rows = slowest_views([dt.date.today(), dt.date.today()], order_by="requests")
+        self.assertEqual(
+            [(row["view_name"], row["requests"]) for row in rows],
+            [("workbench.views.start", 2), ("report_logging", 1)],
+        )
+
+        response = self.client.get("/report/view-statistics/?order_by=queries")
+        self.assertContains(response, "<code>workbench.views.start</code>")
+        self.assertContains(response, "Recording view statistics is disabled.")
+
+        stdout = io.StringIO()
+        call_command("slowest_views", "--days=1", stdout=stdout)
+        self.assertIn("report_logging", stdout.getvalue())
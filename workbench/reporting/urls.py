@@ -10,6 +10,7 @@ from workbench.reporting.views import (
     birthdays_view,
     date_range_and_users_filter_view,
     date_range_filter_view,
+    exports_view,
     key_data_gross_profit,
     key_data_third_party_costs,
     key_data_view,
@@ -19,6 +20,7 @@ from workbench.reporting.views import (
     playing_bank_view,
     project_budget_statistics_view,
     projected_gross_margin,
+    view_statistics_view,
     work_anniversaries_view,
 )
 
@@ -82,7 +84,11 @@ urlpatterns = [
     path(
         "green-hours/",
         controlling_only(date_range_and_users_filter_view),
-        {"template_name": "reporting/green_hours.html", "stats_fn": green_hours},
+        {
+            "template_name": "reporting/green_hours.html",
+            "stats_fn": green_hours,
+            "job": "green_hours",
+        },
         name="report_green_hours",
     ),
     path(
@@ -111,8 +117,14 @@ urlpatterns = [
         {"template_name": "reporting/deal_history.html", "stats_fn": deal_history},
         name="report_deal_history",
     ),
+    path("exports/", controlling_only(exports_view), name="report_exports"),
     path("labor-costs/", labor_costs_only(labor_costs_view), name="report_labor_costs"),
     path("logging/", controlling_only(logging), name="report_logging"),
+    path(
+        "view-statistics/",
+        controlling_only(view_statistics_view),
+        name="report_view_statistics",
+    ),
     path(
         "work-anniversaries/",
         work_anniversaries_view,
@@ -0,0 +1,139 @@
+"""
+Sampled query counts and timings per view
+
+``view_statistics_middleware`` measures a random sample of requests (see
+``settings.VIEW_STATISTICS_SAMPLE_RATE``, zero disables the middleware)
+without depending on ``DEBUG``: Queries are counted and timed by an
+execute wrapper, the Python time is the remaining time spent in the view
+and the middlewares below. Measurements are aggregated per day, view and
+HTTP method in ``ViewStatistics`` using one upsert per sampled request.
+"""
+
+import random
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Max, Sum
+
+from workbench.reporting.models import ViewStatistics
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+
+def record(*, view_name, method, queries, db_time, python_time, response_size):
+    with connections["default"].cursor() as cursor:
+        cursor.execute(
+            """
+INSERT INTO reporting_viewstatistics (
+    day, view_name, method, requests, queries, max_queries,
+    db_time, python_time, max_time, response_size
+)
+VALUES (current_date, %s, %s, 1, %s, %s, %s, %s, %s, %s)
+ON CONFLICT (day, view_name, method) DO UPDATE SET
+    requests=reporting_viewstatistics.requests + 1,
+    queries=reporting_viewstatistics.queries + EXCLUDED.queries,
+    max_queries=greatest(reporting_viewstatistics.max_queries, EXCLUDED.max_queries),
+    db_time=reporting_viewstatistics.db_time + EXCLUDED.db_time,
+    python_time=reporting_viewstatistics.python_time + EXCLUDED.python_time,
+    max_time=greatest(reporting_viewstatistics.max_time, EXCLUDED.max_time),
+    response_size=reporting_viewstatistics.response_size + EXCLUDED.response_size
+            """,
+            [
+                view_name[:200],
+                method[:10],
+                queries,
+                queries,
+                db_time,
+                python_time,
+                db_time + python_time,
+                response_size,
+            ],
+        )
+
+
+def view_statistics_middleware(get_response):
+    def middleware(request):
+        rate = settings.VIEW_STATISTICS_SAMPLE_RATE
+        if not rate or random.random() >= rate:
+            return get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with connections["default"].execute_wrapper(recorder):
+            response = get_response(request)
+        elapsed = time.perf_counter() - started
+
+        if request.resolver_match:
+            record(
+                view_name=request.resolver_match.view_name,
+                method=request.method,
+                queries=recorder.queries,
+                db_time=recorder.db_time,
+                python_time=max(0.0, elapsed - recorder.db_time),
+                response_size=0 if response.streaming else len(response.content),
+            )
+        return response
+
+    return middleware
+
+
+#: Keys of ``slowest_views`` rows available for ordering, descending
+ORDERINGS = {
+    "time": "avg_time",
+    "queries": "avg_queries",
+    "db_time": "avg_db_time",
+    "response_size": "avg_response_size",
+    "requests": "requests",
+}
+
+
+def slowest_views(date_range, *, order_by="time", limit=None):
+    """
+    Return aggregated statistics per view and method, slowest first
+
+    Averages are not affected by the sample rate, ``requests`` only counts
+    sampled requests. Times are in milliseconds, sizes in bytes.
+    """
+    rows = []
+    for row in (
+        ViewStatistics.objects.filter(day__range=date_range)
+        .order_by()
+        .values("view_name", "method")
+        .annotate(
+            sum_requests=Sum("requests"),
+            sum_queries=Sum("queries"),
+            sum_db_time=Sum("db_time"),
+            sum_python_time=Sum("python_time"),
+            sum_response_size=Sum("response_size"),
+            highest_queries=Max("max_queries"),
+            highest_time=Max("max_time"),
+        )
+    ):
+        requests = row["sum_requests"]
+        rows.append({
+            "view_name": row["view_name"],
+            "method": row["method"],
+            "requests": requests,
+            "avg_queries": row["sum_queries"] / requests,
+            "max_queries": row["highest_queries"],
+            "avg_db_time": 1000 * row["sum_db_time"] / requests,
+            "avg_python_time": 1000 * row["sum_python_time"] / requests,
+            "avg_time": 1000 * (row["sum_db_time"] + row["sum_python_time"]) / requests,
+            "max_time": 1000 * row["highest_time"],
+            "avg_response_size": row["sum_response_size"] / requests,
+        })
+    rows.sort(key=lambda row: row[ORDERINGS[order_by]], reverse=True)
+    return rows[:limit]
@@ -5,6 +5,7 @@ from functools import reduce
 from itertools import groupby
 
 from django import forms
+from django.conf import settings
 from django.db.models import Q
 from django.shortcuts import render
 from django.utils.html import format_html, format_html_join
@@ -20,6 +21,8 @@ from workbench.accounts.reporting import (
 )
 from workbench.invoices.models import Invoice
 from workbench.invoices.utils import next_valid_day
+from workbench.jobs.models import Job
+from workbench.jobs.views import enqueue_response
 from workbench.logbook.models import LoggedCost
 from workbench.logbook.reporting import logbook_stats
 from workbench.projects.models import Project
@@ -31,6 +34,7 @@ from workbench.reporting import (
     third_party_costs,
 )
 from workbench.reporting.utils import date_ranges
+from workbench.reporting.view_statistics import slowest_views
 from workbench.tools.formats import Z0, Z2, local_date_format
 from workbench.tools.forms import DateInput, Form
 from workbench.tools.validation import filter_form, in_days, monday
@@ -171,6 +175,9 @@ def key_data_view(request):
     today = dt.date.today()
     date_range = [dt.date(today.year - 3, 1, 1), dt.date(today.year, 12, 31)]
 
+    if request.GET.get("export") == "xlsx":
+        return enqueue_response(request, "key_data", {"date_range": date_range})
+
     gross_margin_by_month = key_data.gross_margin_by_month(date_range)
     gross_margin_months = {
         row["month"]: row["gross_margin"] for row in gross_margin_by_month
@@ -524,7 +531,23 @@ def date_range_filter_view(request, form, *, template_name, stats_fn):
 
 
 @filter_form(DateRangeAndTeamFilterForm)
-def date_range_and_users_filter_view(request, form, *, template_name, stats_fn):
+def date_range_and_users_filter_view(
+    request, form, *, template_name, stats_fn, job=None
+):
+    if job and request.GET.get("export") == "xlsx":
+        return enqueue_response(
+            request,
+            job,
+            {
+                "date_range": [
+                    form.cleaned_data["date_from"],
+                    form.cleaned_data["date_until"],
+                ],
+                "users": sorted(form.users().values_list("id", flat=True))
+                if form.cleaned_data.get("team")
+                else None,
+            },
+        )
     return render(
         request,
         template_name,
@@ -566,6 +589,8 @@ def labor_costs_view(request, form):
             "reporting/labor_costs_by_user.html",
             {"stats": labor_costs.labor_costs_by_user(date_range)},
         )
+    if request.GET.get("export") == "xlsx":
+        return enqueue_response(request, "labor_costs", {"date_range": date_range})
 
     return render(
         request,
@@ -578,6 +603,44 @@ def labor_costs_view(request, form):
     )
 
 
+class ExportForm(DateRangeFilterForm):
+    KINDS = [
+        ("squeeze", _("Squeeze")),
+        ("workload", _("Workload")),
+        ("paid_debtors", _("Paid debtors")),
+    ]
+
+    kind = forms.ChoiceField(label=capfirst(_("kind")), choices=KINDS)
+
+    def __init__(self, data, *args, **kwargs):
+        data = data.copy()
+        data.setdefault("kind", self.KINDS[0][0])
+        super().__init__(data, *args, **kwargs)
+
+
+@filter_form(ExportForm)
+def exports_view(request, form):
+    if request.GET.get("export"):
+        parameters = {
+            "date_range": [
+                form.cleaned_data["date_from"],
+                form.cleaned_data["date_until"],
+            ]
+        }
+        if form.cleaned_data["kind"] == "workload":
+            parameters = {"start": monday()}
+        return enqueue_response(request, form.cleaned_data["kind"], parameters)
+
+    return render(
+        request,
+        "reporting/exports.html",
+        {
+            "form": form,
+            "jobs": Job.objects.defer("artifact").filter(created_by=request.user)[:20],
+        },
+    )
+
+
 @filter_form(DateRangeFilterForm)
 def logging(request, form):
     date_range = [form.cleaned_data["date_from"], form.cleaned_data["date_until"]]
@@ -589,6 +652,43 @@ def logging(request, form):
     )
 
 
+class ViewStatisticsForm(DateRangeFilterForm):
+    order_by = forms.ChoiceField(
+        label=capfirst(_("order by")),
+        choices=[
+            ("time", _("average time")),
+            ("queries", _("average queries")),
+            ("db_time", _("average database time")),
+            ("response_size", _("average response size")),
+            ("requests", _("requests")),
+        ],
+    )
+
+    def __init__(self, data, *args, **kwargs):
+        data = data.copy()
+        data.setdefault("date_from", in_days(-7).isoformat())
+        data.setdefault("date_until", dt.date.today().isoformat())
+        data.setdefault("order_by", "time")
+        super().__init__(data, *args, **kwargs)
+
+
+@filter_form(ViewStatisticsForm)
+def view_statistics_view(request, form):
+    return render(
+        request,
+        "reporting/view_statistics.html",
+        {
+            "form": form,
+            "views": slowest_views(
+                [form.cleaned_data["date_from"], form.cleaned_data["date_until"]],
+                order_by=form.cleaned_data["order_by"],
+                limit=100,
+            ),
+            "sample_rate": settings.VIEW_STATISTICS_SAMPLE_RATE,
+        },
+    )
+
+
 def work_anniversaries_view(request):
     return render(
         request,
@@ -0,0 +1,94 @@
+# Generated by Django 5.0.6 on 2026-10-17 06:47
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+from workbench.tools import search
+
+
+SOURCES = [
+    ("projects_project", ["title", "_fts"], None),
+    ("projects_campaign", ["title", "_fts"], None),
+    ("contacts_organization", ["name"], "is_archived"),
+    ("contacts_person", ["given_name", "family_name", "_fts"], "is_archived"),
+    ("invoices_invoice", ["title", "_fts"], None),
+    ("invoices_recurringinvoice", ["title"], None),
+    ("offers_offer", ["title", "_fts"], None),
+    ("deals_deal", ["title", "_fts"], None),
+]
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ("contacts", "0013_organization_is_archived"),
+        ("deals", "0007_attributegroup_show_on_overview"),
+        ("invoices", "0027_invoice_archived_at"),
+        ("offers", "0014_alter_offer_tax_rate"),
+        ("projects", "0029_alter_internaltype_ordering"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.CreateModel(
+            name="SearchEntry",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "table_name",
+                    models.CharField(max_length=100, verbose_name="table name"),
+                ),
+                ("object_id", models.IntegerField(verbose_name="object ID")),
+                ("title", models.TextField(verbose_name="title")),
+                (
+                    "is_active",
+                    models.BooleanField(default=True, verbose_name="is active"),
+                ),
+                (
+                    "document",
+                    django.contrib.postgres.search.SearchVectorField(
+                        null=True, verbose_name="document"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "search entry",
+                "verbose_name_plural": "search entries",
+                "indexes": [
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["document"], name="search_entry_document_idx"
+                    ),
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["title"],
+                        name="search_entry_title_trgm_idx",
+                        opclasses=["gin_trgm_ops"],
+                    ),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="searchentry",
+            constraint=models.UniqueConstraint(
+                fields=("table_name", "object_id"), name="search_entry_unique"
+            ),
+        ),
+        *(
+            migrations.RunSQL(
+                search.index(table, fields, archived=archived)
+                + search.reindex(table, fields, archived=archived),
+                search.drop_index(table),
+            )
+            for table, fields, archived in SOURCES
+        ),
+    ]
@@ -0,0 +1,88 @@
+from collections import defaultdict
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from workbench.tools.reporting import query
+from workbench.tools.search import process_query
+
+
+class SearchEntry(models.Model):
+    """
+    One row per searchable object, maintained by database triggers
+    """
+
+    table_name = models.CharField(_("table name"), max_length=100)
+    object_id = models.IntegerField(_("object ID"))
+    title = models.TextField(_("title"))
+    is_active = models.BooleanField(_("is active"), default=True)
+    document = SearchVectorField(_("document"), null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["table_name", "object_id"], name="search_entry_unique"
+            )
+        ]
+        indexes = [
+            GinIndex(fields=["document"], name="search_entry_document_idx"),
+            GinIndex(
+                fields=["title"],
+                name="search_entry_title_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
+        verbose_name = _("search entry")
+        verbose_name_plural = _("search entries")
+
+    def __str__(self):
+        return f"{self.table_name} {self.object_id}: {self.title}"
+
+
+def search_all(terms, querysets, *, limit=101):
+    """
+    Search all querysets with one query against the unified search table
+
+    Returns a list of ``(queryset, objects)`` tuples in the order of
+    ``querysets``. Objects are ordered by relevance; each list contains at
+    most ``limit`` objects. Only active objects are returned.
+    """
+    tables = {queryset.model._meta.db_table: queryset for queryset in querysets}
+    tsquery = process_query(terms)
+    hits = defaultdict(list)
+    for table_name, object_id in query(
+        """
+select table_name, object_id
+from (
+    select
+        table_name,
+        object_id,
+        row_number() over (
+            partition by table_name
+            order by ts_rank(document, to_tsquery('pg_catalog.german', unaccent(%s)))
+                + word_similarity(unaccent(%s), title) desc,
+            object_id desc
+        ) as position
+    from search_searchentry
+    where table_name = any(%s) and is_active and (
+        document @@ to_tsquery('pg_catalog.german', unaccent(%s))
+        or unaccent(%s) <%% title
+    )
+) ranked
+where position <= %s
+order by table_name, position
+        """,
+        [tsquery, terms, list(tables), tsquery, terms, limit],
+    ):
+        hits[table_name].append(object_id)
+
+    results = []
+    for table_name, queryset in tables.items():
+        objects = queryset.in_bulk(hits[table_name]) if hits[table_name] else {}
+        results.append((
+            queryset,
+            [objects[pk] for pk in hits[table_name] if pk in objects],
+        ))
+    return results
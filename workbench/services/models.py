@@ -1,3 +1,6 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
 from functools import total_ordering
 
 from colorfield.fields import ColorField
@@ -27,6 +30,156 @@ class ServiceType(Model):
         return self.title
 
 
+_service_batch = ContextVar("service_batch", default=None)
+
+
+class ServiceBatch:
+    """
+    Collects service writes and saves each affected offer or invoice once
+
+    Use ``service_batch()`` to create a batch.
+    """
+
+    def __init__(self):
+        self._new = defaultdict(list)
+        self._changed = defaultdict(dict)
+        self._parents = defaultdict(dict)
+
+    def add(self, service):
+        """
+        Add a new service, inserted in bulk when the batch is flushed
+        """
+        self._new[service.__class__].append(service)
+        return service
+
+    def update(self, service):
+        """
+        Add a changed service, updated in bulk when the batch is flushed
+        """
+        self._changed[service.__class__][service.pk] = service
+        return service
+
+    def touch(self, service):
+        """
+        Remember the offer or invoice of the service for recalculation
+        """
+        field = service._related_model
+        parents = self._parents[field.remote_field.model]
+        for id in (service._orig_related_id, getattr(service, field.attname)):
+            if id:
+                parents.setdefault(id, None)
+        if field.is_cached(service) and (parent := getattr(service, field.name)):
+            self.recalculate(parent)
+
+    def recalculate(self, parent):
+        """
+        Save the offer or invoice when the batch is closed
+        """
+        self._parents[parent.__class__][parent.pk] = parent
+
+    def _assign_positions(self, model, services):
+        field = model._meta.get_field(model.RELATED_MODEL_FIELD)
+        parent_ids = {
+            getattr(service, field.attname)
+            for service in services
+            if not service.position
+        }
+        if not parent_ids:
+            return
+        positions = {
+            row[field.attname]: row["m"] or 0
+            for row in model._default_manager.filter(**{
+                f"{field.attname}__in": parent_ids - {None}
+            })
+            .order_by()
+            .values(field.attname)
+            .annotate(m=Max("position"))
+        }
+        if None in parent_ids:
+            positions[None] = (
+                model._default_manager.aggregate(m=Max("position"))["m"] or 0
+            )
+        for service in services:
+            if not service.position:
+                parent_id = getattr(service, field.attname)
+                positions[parent_id] = service.position = (
+                    positions.get(parent_id, 0) + 10
+                )
+
+    def flush(self):
+        """
+        Insert and update services now; offers and invoices are still only
+        saved when the batch is closed
+        """
+        for model, services in self._new.items():
+            self._assign_positions(model, services)
+            for service in services:
+                service._calculate_service()
+            model._default_manager.bulk_create(services)
+            for service in services:
+                self.touch(service)
+                service._orig_related_id = getattr(
+                    service, service._related_model.attname
+                )
+
+        for model, services in self._changed.items():
+            for service in services.values():
+                service._calculate_service()
+            model._default_manager.bulk_update(
+                services.values(),
+                [
+                    field.name
+                    for field in model._meta.concrete_fields
+                    if not field.primary_key
+                ],
+            )
+            for service in services.values():
+                self.touch(service)
+                service._orig_related_id = getattr(
+                    service, service._related_model.attname
+                )
+
+        self._new.clear()
+        self._changed.clear()
+
+    def close(self):
+        self.flush()
+        for model, parents in self._parents.items():
+            if missing := [id for id, parent in parents.items() if parent is None]:
+                parents.update(model._default_manager.in_bulk(missing))
+            for parent in parents.values():
+                if parent is not None:
+                    parent.save()
+        self._parents.clear()
+
+
+@contextmanager
+def service_batch():
+    """
+    Batch service writes::
+
+        with service_batch() as batch:
+            for ...:
+                batch.add(Service(offer=offer, ...))
+
+    Services added or updated through the batch are written in bulk, other
+    service saves and deletes inside the block are written immediately.
+    Each offer or invoice affected by any of those writes is saved exactly
+    once when the block is exited. Nested blocks use the outer batch.
+    """
+    if batch := _service_batch.get():
+        yield batch
+        return
+
+    batch = ServiceBatch()
+    token = _service_batch.set(batch)
+    try:
+        yield batch
+    finally:
+        _service_batch.reset(token)
+    batch.close()
+
+
 @total_ordering
 class ServiceBase(Model):
     created_at = models.DateTimeField(_("created at"), default=timezone.now)
@@ -79,20 +232,27 @@ class ServiceBase(Model):
         self._related_model = self._meta.get_field(self.RELATED_MODEL_FIELD)
         self._orig_related_id = getattr(self, self._related_model.attname)
 
+    def _calculate_service(self):
+        self.service_hours = self.effort_hours or Z1
+        self.service_cost = self.cost or Z2
+        if all((self.effort_hours, self.effort_rate)):
+            self.service_cost += self.effort_hours * self.effort_rate
+
     def save(self, *args, **kwargs):
         skip_related_model = kwargs.pop("skip_related_model", False)
 
         if not self.position:
             max_pos = self.__class__._default_manager.aggregate(m=Max("position"))["m"]
             self.position = 10 + (max_pos or 0)
-        self.service_hours = self.effort_hours or Z1
-        self.service_cost = self.cost or Z2
-        if all((self.effort_hours, self.effort_rate)):
-            self.service_cost += self.effort_hours * self.effort_rate
+        self._calculate_service()
 
         super().save(*args, **kwargs)
 
-        if not skip_related_model:
+        if skip_related_model:
+            pass
+        elif batch := _service_batch.get():
+            batch.touch(self)
+        else:
             ids = filter(
                 None,
                 [self._orig_related_id, getattr(self, self._related_model.attname)],
@@ -108,7 +268,9 @@ class ServiceBase(Model):
 
     def delete(self, *args, **kwargs):
         super().delete(*args, **kwargs)
-        if self._orig_related_id:
+        if batch := _service_batch.get():
+            batch.touch(self)
+        elif self._orig_related_id:
             ids = filter(
                 None,
                 [self._orig_related_id, getattr(self, self._related_model.attname)],
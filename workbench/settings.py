@@ -53,12 +53,14 @@ INSTALLED_APPS = [
         "workbench.deals",
         "workbench.expenses",
         "workbench.invoices",
+        "workbench.jobs",
         "workbench.logbook",
         "workbench.notes",
         "workbench.offers",
         "workbench.planning",
         "workbench.projects",
         "workbench.reporting",
+        "workbench.search",
         "workbench.services",
         "workbench.timer",
         "debug_toolbar" if DEBUG_TOOLBAR else "",
@@ -74,7 +76,9 @@ LOGIN_REQUIRED_EXEMPT = (
     "/robots",
     "/sitemap",
     "/create-timestamp",
+    "/create-logbook-entries",
     "/list-timestamps",
+    "/timestamp-slices",
     "/timestamps-controller",
 )
 
@@ -91,6 +95,8 @@ MIDDLEWARE = [
         "django.contrib.messages.middleware.MessageMiddleware",
         "django.middleware.clickjacking.XFrameOptionsMiddleware",
         "workbench.accounts.middleware.user_middleware",
+        "workbench.reporting.view_statistics.view_statistics_middleware",
+        "workbench.reporting.project_budget_statistics.statistics_cache_middleware",
         "workbench.middleware.history_fallback",
     ]
     if m
@@ -129,8 +135,8 @@ LOCALE_PATHS = [BASE_DIR / "conf" / "locale"]
 AUTHENTICATION_BACKENDS = ["authlib.backends.EmailBackend"]
 
 DATABASES = {"default": django_database_url(env("DATABASE_URL", required=True))}
+DATABASES["default"]["ATOMIC_REQUESTS"] = True
 DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
-ATOMIC_REQUESTS = True
 
 LANGUAGE_CODE = "de"
 LANGUAGES = [("en", _("english")), ("de", _("german"))]
@@ -438,7 +444,9 @@ if LIVE:  # pragma: no cover
     SECURE_SSL_REDIRECT = True
     SECURE_HSTS_SECONDS = 604800  # One week
     SECURE_HSTS_INCLUDE_SUBDOMAINS = True
-    SECURE_REDIRECT_EXEMPT = [r"^(create-timestamp|list-timestamps)/"]
+    SECURE_REDIRECT_EXEMPT = [
+        r"^(create-timestamp|create-logbook-entries|list-timestamps|timestamp-slices)/"
+    ]
 else:
     os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
     WORKBENCH.TITLE = f"(debug) {WORKBENCH.TITLE}"
@@ -463,6 +471,43 @@ if env("SQL", default=False):  # pragma: no cover
 
 FEATURES = WORKBENCH.FEATURES
 BATCH_MAX_ITEMS = 250
+# Processes used for rendering PDFs in background jobs and exports
+BATCH_PDF_WORKERS = env("BATCH_PDF_WORKERS", default=os.cpu_count() or 1)
+# Rendered invoice and offer PDFs are only cached if a directory is set
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "pdf": (
+        {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": PDF_CACHE_DIR,
+            "TIMEOUT": 90 * 86400,
+            "OPTIONS": {"MAX_ENTRIES": 20000},
+        }
+        if (PDF_CACHE_DIR := env("PDF_CACHE_DIR"))
+        else {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+    ),
+}
+# Seconds; project budget statistics are only cached per request if zero
+PROJECT_BUDGET_STATISTICS_CACHE_TIMEOUT = env(
+    "PROJECT_BUDGET_STATISTICS_CACHE_TIMEOUT", default=0
+)
+# Seconds; the project services summary is versioned by database triggers
+PROJECT_SERVICES_CACHE_TIMEOUT = env(
+    "PROJECT_SERVICES_CACHE_TIMEOUT", default=7 * 86400
+)
+# Seconds; timer slices are versioned by database triggers
+TIMER_SLICES_CACHE_TIMEOUT = env("TIMER_SLICES_CACHE_TIMEOUT", default=86400)
+# Seconds; start page fragments are versioned by database triggers, 0 disables
+START_CACHE_TIMEOUT = env("START_CACHE_TIMEOUT", default=86400)
+# Share of requests whose query counts and timings are recorded, 0 disables
+VIEW_STATISTICS_SAMPLE_RATE = env("VIEW_STATISTICS_SAMPLE_RATE", default=0)
+# Seconds; running jobs without progress for this long are failed, their
+# worker probably died
+JOBS_STALE_AFTER = env("JOBS_STALE_AFTER", default=3 * 3600)
+# Seconds; identical jobs return the artifact of a recently finished job
+JOBS_ARTIFACT_MAX_AGE = env("JOBS_ARTIFACT_MAX_AGE", default=900)
+# Days; finished jobs and their artifacts are deleted by the fairy tasks
+JOBS_RETENTION_DAYS = env("JOBS_RETENTION_DAYS", default=14)
 
 if SENTRY_DSN := env("SENTRY_DSN"):
     import sentry_sdk
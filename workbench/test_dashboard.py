@@ -0,0 +1,186 @@
+import datetime as dt
+
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+from django.utils.translation import deactivate_all
+
+from workbench import factories
+from workbench.audit.models import TableVersion, UserVersion
+from workbench.dashboard import FRAGMENTS
+from workbench.tools.reporting import query
+
+
+def cache_states(response, *names):
+    """Return the cache state of fragments from the Server-Timing header"""
+    states = {}
+    for part in response["Server-Timing"].split(", "):
+        name, *params = part.split(";")
+        states[name] = dict(param.split("=") for param in params).get("desc")
+    return {name: states[name].strip('"') for name in names}
+
+
+class DashboardTest(TestCase):
+    def tearDown(self):
+        deactivate_all()
+
+    def test_start_fragments(self):
+        """Start page fragments are cached and invalidated by writes"""
+        user = factories.UserFactory.create()
+        other = factories.UserFactory.create()
+        service = factories.ServiceFactory.create()
+        self.client.force_login(user)
+
+        response = self.client.get("/")
+        self.assertEqual(
+            cache_states(response, "todays-hours", "all-users-hours", "birthdays"),
+            {"todays-hours": "miss", "all-users-hours": "miss", "birthdays": "miss"},
+        )
+        self.assertContains(response, "no hours today")
+
+        with self.assertNumQueries(6):
+            # The user, the savepoint of the request transaction, the versions
+            # and the active projects
+            response = self.client.get("/")
+        self.assertEqual(
+            cache_states(response, "todays-hours", "all-users-hours", "birthdays"),
+            {"todays-hours": "hit", "all-users-hours": "hit", "birthdays": "hit"},
+        )
+
+        # Hours of other users only invalidate global fragments
+        factories.LoggedHoursFactory.create(
+            service=service, rendered_by=other, created_by=other, description="Other's"
+        )
+        response = self.client.get("/")
+        self.assertEqual(
+            cache_states(response, "todays-hours", "all-users-hours", "birthdays"),
+            {"todays-hours": "hit", "all-users-hours": "miss", "birthdays": "hit"},
+        )
+        self.assertContains(response, "Other&#x27;s", 1)
+
+        factories.LoggedHoursFactory.create(
+            service=service, rendered_by=user, created_by=user, description="Mine"
+        )
+        response = self.client.get("/")
+        self.assertEqual(
+            cache_states(response, "todays-hours", "all-users-hours", "birthdays"),
+            {"todays-hours": "miss", "all-users-hours": "miss", "birthdays": "hit"},
+        )
+        self.assertContains(response, "Mine", 2)
+
+        person = factories.PersonFactory.create(
+            given_name="Birthday", date_of_birth=dt.date.today(), primary_contact=user
+        )
+        response = self.client.get("/")
+        self.assertEqual(
+            cache_states(response, "todays-hours", "birthdays"),
+            {"todays-hours": "hit", "birthdays": "miss"},
+        )
+        self.assertContains(response, person.get_absolute_url())
+
+        with override_settings(START_CACHE_TIMEOUT=0):
+            response = self.client.get("/")
+        self.assertEqual(
+            cache_states(response, "todays-hours", "birthdays"),
+            {"todays-hours": "miss", "birthdays": "miss"},
+        )
+        self.assertNotIn("versions", response["Server-Timing"])
+
+    def test_needs_action_fragments(self):
+        """Fragments requiring action are cached per user"""
+        user = factories.UserFactory.create()
+        other = factories.UserFactory.create()
+        project = factories.ProjectFactory.create(owned_by=user)
+        factories.LoggedHoursFactory.create(
+            service=factories.ServiceFactory.create(project=project),
+            rendered_on=dt.date.today() - dt.timedelta(days=90),
+        )
+
+        self.client.force_login(other)
+        response = self.client.get("/")
+        self.assertNotContains(response, "Old projects")
+
+        self.client.force_login(user)
+        response = self.client.get("/")
+        self.assertEqual(
+            cache_states(response, "old-projects"), {"old-projects": "miss"}
+        )
+        self.assertContains(response, "Old projects")
+        self.assertContains(response, project.get_absolute_url())
+
+        # Logging in again does not invalidate anything
+        self.client.force_login(user)
+        response = self.client.get("/")
+        self.assertEqual(
+            cache_states(response, "old-projects"), {"old-projects": "hit"}
+        )
+
+        project.closed_on = dt.date.today()
+        project.save()
+        response = self.client.get("/")
+        self.assertEqual(
+            cache_states(response, "old-projects"), {"old-projects": "miss"}
+        )
+        self.assertNotContains(response, "Old projects")
+
+    def test_table_versions(self):
+        """Writes to all tables of fragments bump their version"""
+        triggers = {
+            row[0]
+            for row in query(
+                "select tgname from pg_trigger where tgname like %s", ["%_version"]
+            )
+        }
+        for table in {table for f in FRAGMENTS.values() for table in f.tables}:
+            with self.subTest(table=table):
+                self.assertIn(f"{table}_version", triggers)
+
+        factories.PersonFactory.create()
+        version = TableVersion.objects.get(table_name="contacts_person").version
+        factories.PersonFactory.create()
+        self.assertGreater(
+            TableVersion.objects.get(table_name="contacts_person").version, version
+        )
+
+    def test_user_versions(self):
+        """Writes bump the versions of the affected users only"""
+
+        def version(user):
+            return (
+                UserVersion.objects.filter(user=user)
+                .values_list("version", flat=True)
+                .first()
+                or 0
+            )
+
+        user = factories.UserFactory.create()
+        other = factories.UserFactory.create()
+        project = factories.ProjectFactory.create()
+        versions = {user: version(user), other: version(other)}
+
+        offer = factories.OfferFactory.create(project=project, owned_by=other)
+        self.assertEqual(version(user), versions[user])
+        self.assertGreater(version(other), versions[other])
+        versions[other] = version(other)
+
+        other.last_login = timezone.now()
+        other.save(update_fields=["last_login"])
+        self.assertEqual(version(other), versions[other])
+
+        # Objects of inactive users are shown to everyone
+        other.is_active = False
+        other.save()
+        self.assertGreater(version(user), versions[user])
+        versions[user] = version(user)
+
+        offer.save()
+        self.assertGreater(version(user), versions[user])
+
+        triggers = {
+            row[0]
+            for row in query(
+                "select tgname from pg_trigger where tgname like %s", ["%_version"]
+            )
+        }
+        self.assertNotIn("accounts_user_version", triggers)
+        self.assertNotIn("logbook_loggedhours_version", triggers)
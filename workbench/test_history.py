@@ -1,5 +1,6 @@
 import datetime as dt
 from types import SimpleNamespace
+from unittest import mock
 
 from django.test import TestCase
 from django.test.utils import override_settings
@@ -9,7 +10,7 @@ from workbench.accounts.features import FEATURES, F
 from workbench.accounts.middleware import set_user_name
 from workbench.audit.models import LoggedAction
 from workbench.projects.models import Project
-from workbench.tools.history import EVERYTHING, Prettifier
+from workbench.tools.history import EVERYTHING, Prettifier, changes
 
 
 class HistoryTest(TestCase):
@@ -55,6 +56,62 @@ class HistoryTest(TestCase):
         # print(response, response.content.decode("utf-8"))
         self.assertContains(response, "New value of 'Is archived' was 'yes'.")
 
+    def test_history_query_count(self):
+        """Related instances are fetched in bulk, independent of history length"""
+        project = factories.ProjectFactory.create()
+        for _i in range(10):
+            set_user_name(f"user-{project.owned_by.id}-{project.owned_by._short_name}")
+            project.owned_by = factories.UserFactory.create()
+            project.customer = factories.OrganizationFactory.create()
+            project.save()
+
+        actions = LoggedAction.objects.for_model(project).with_data(id=project.id)
+        # Actions, users of the actions, related users, organizations and people
+        with self.assertNumQueries(5):
+            history = changes(Project, EVERYTHING, actions)
+        self.assertEqual(len(history), 11)
+        self.assertIn(
+            f'<a href="/history/accounts_user/id/{project.owned_by.pk}/"',
+            "".join(history[-1].changes),
+        )
+        self.assertEqual(history[-1].values["owned_by_id"], project.owned_by)
+
+        self.client.force_login(project.owned_by)
+        response = self.client.get(f"/history/projects_project/id/{project.pk}/")
+        self.assertContains(response, "UPDATE", 10)
+
+    def test_row_id(self):
+        """The audit trigger extracts the primary key into the indexed row_id"""
+        project = factories.ProjectFactory.create()
+        project.title += " test"
+        project.save()
+
+        actions = LoggedAction.objects.for_model(project).with_data(id=project.id)
+        self.assertEqual([action.row_id for action in actions], [project.id] * 2)
+        self.assertEqual([action.action for action in actions], ["I", "U"])
+
+    @mock.patch("workbench.views.HISTORY_PAGE_SIZE", 3)
+    def test_history_pagination(self):
+        """Older versions are paginated using the event ID as cursor"""
+        project = factories.ProjectFactory.create()
+        for i in range(4):
+            project.title = f"Version {i}"
+            project.save()
+        actions = list(LoggedAction.objects.for_model(project).with_data(id=project.id))
+
+        self.client.force_login(project.owned_by)
+        url = f"/history/projects_project/id/{project.pk}/"
+        response = self.client.get(url)
+        self.assertContains(response, "UPDATE", 3)
+        self.assertContains(response, "Version 3")
+        self.assertContains(response, f"{url}?before={actions[2].event_id}")
+
+        response = self.client.get(f"{url}?before={actions[2].event_id}")
+        self.assertContains(response, "INSERT", 1)
+        self.assertContains(response, "UPDATE", 1)
+        self.assertContains(response, "Version 0")
+        self.assertNotContains(response, "?before=")
+
     def test_related_history(self):
         """Filtering history by a relation works"""
         pa = factories.PostalAddressFactory.create()
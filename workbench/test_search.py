@@ -1,8 +1,15 @@
+from django.db import connection
 from django.test import TestCase
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLResolver, get_resolver
 
 from workbench import factories
 from workbench.accounts.features import F
+from workbench.contacts.models import Organization
+from workbench.generic import AutocompleteView
+from workbench.projects.models import Project
+from workbench.search.models import SearchEntry, search_all
+from workbench.tools.reporting import query
 from workbench.tools.search import process_query
 
 
@@ -44,3 +51,95 @@ class SearchTest(TestCase):
         self.assertEqual(process_query("org"), "org:*")
         self.assertEqual(process_query("a b"), "a & b:*")
         self.assertEqual(process_query("(foo bar)"), "foo & bar:*")
+
+    def test_search_index(self):
+        """The unified search table is maintained by triggers"""
+        project = factories.ProjectFactory.create(title="Workbench rewrite")
+        organization = project.customer
+        entry = SearchEntry.objects.get(
+            table_name="projects_project", object_id=project.pk
+        )
+        self.assertIn("Workbench rewrite", entry.title)
+        self.assertIn(project.code, entry.title)
+
+        querysets = [Project.objects.all(), Organization.objects.all()]
+        with self.assertNumQueries(2):
+            (_, projects), (_, organizations) = search_all("workbench", querysets)
+        self.assertEqual(projects, [project])
+        self.assertEqual(organizations, [])
+
+        # Typos are found using trigrams
+        self.assertEqual(search_all("Workbench rewirte", querysets)[0][1], [project])
+
+        organization.name = "Workbench AG"
+        organization.save()
+        self.assertEqual(search_all("workbench", querysets)[1][1], [organization])
+
+        organization.is_archived = True
+        organization.save()
+        self.assertEqual(search_all("workbench", querysets)[1][1], [])
+
+        project.delete()
+        self.assertFalse(
+            SearchEntry.objects.filter(
+                table_name="projects_project", object_id=project.pk
+            ).exists()
+        )
+
+    def test_autocomplete_cache(self):
+        """Autocomplete results are cached and narrow down longer queries"""
+        project = factories.ProjectFactory.create(title="Autocomplete")
+        self.client.force_login(project.owned_by)
+        url = Project.urls["autocomplete"]
+
+        def searches(q):
+            with CaptureQueriesContext(connection) as context:
+                results = self.client.get(f"{url}?q={q}").json()["results"]
+            return results, [
+                query["sql"] for query in context if "fts_document" in query["sql"]
+            ]
+
+        results, queries = searches("autoc")
+        self.assertEqual(results, [{"label": str(project), "value": project.pk}])
+        self.assertEqual(len(queries), 1)
+
+        results, queries = searches("autoc")
+        self.assertEqual(len(results), 1)
+        self.assertEqual(queries, [])
+
+        results, queries = searches("autocomp")
+        self.assertEqual(len(results), 1)
+        self.assertEqual(len(queries), 1)
+        self.assertIn(f"IN ({project.pk})", queries[0])
+
+        # Changes invalidate the cache
+        other = factories.ProjectFactory.create(title="Autocompletion")
+        results, queries = searches("autoc")
+        self.assertEqual(
+            {result["value"] for result in results}, {project.pk, other.pk}
+        )
+        self.assertEqual(len(queries), 1)
+
+    def test_autocomplete_versions(self):
+        """All autocompleted tables have a table version trigger"""
+        triggers = {
+            row[0]
+            for row in query(
+                "select tgname from pg_trigger where tgname like %s", ["%_version"]
+            )
+        }
+
+        def views(patterns):
+            for pattern in patterns:
+                if isinstance(pattern, URLResolver):
+                    yield from views(pattern.url_patterns)
+                elif getattr(pattern.callback, "view_class", None) is AutocompleteView:
+                    yield pattern.callback
+
+        models = {
+            view.view_initkwargs["model"] for view in views(get_resolver().url_patterns)
+        }
+        self.assertIn(Project, models)
+        for model in models:
+            with self.subTest(model=model):
+                self.assertIn(f"{model._meta.db_table}_version", triggers)
@@ -0,0 +1,146 @@
+# Generated by Django 5.0.6 on 2026-10-17 08:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+TRIGGERS = """\
+CREATE SEQUENCE IF NOT EXISTS timer_sliceversion_seq;
+
+CREATE OR REPLACE FUNCTION timer_sliceversion_bump(user_ids integer[])
+RETURNS void AS $$
+  INSERT INTO timer_sliceversion (user_id, version)
+  SELECT user_id, nextval('timer_sliceversion_seq')
+  FROM (SELECT DISTINCT unnest(user_ids) AS user_id ORDER BY 1) u
+  WHERE user_id IS NOT NULL
+  ON CONFLICT (user_id) DO UPDATE SET version=EXCLUDED.version;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION timer_sliceversion_user() RETURNS trigger AS $$
+begin
+  IF TG_OP = 'INSERT' THEN
+    PERFORM timer_sliceversion_bump(ARRAY(SELECT user_id FROM new_rows));
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM timer_sliceversion_bump(ARRAY(SELECT user_id FROM old_rows));
+  ELSE
+    PERFORM timer_sliceversion_bump(ARRAY(
+      SELECT user_id FROM old_rows UNION SELECT user_id FROM new_rows
+    ));
+  END IF;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION timer_sliceversion_logbook() RETURNS trigger AS $$
+begin
+  IF TG_OP = 'INSERT' THEN
+    PERFORM timer_sliceversion_bump(ARRAY(SELECT rendered_by_id FROM new_rows));
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM timer_sliceversion_bump(ARRAY(SELECT rendered_by_id FROM old_rows));
+  ELSE
+    PERFORM timer_sliceversion_bump(ARRAY(
+      SELECT rendered_by_id FROM old_rows UNION SELECT rendered_by_id FROM new_rows
+    ));
+  END IF;
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION timer_sliceversion_service() RETURNS trigger AS $$
+begin
+  PERFORM timer_sliceversion_bump(ARRAY(
+    SELECT DISTINCT lh.rendered_by_id
+    FROM logbook_loggedhours lh
+    JOIN new_rows n ON lh.service_id=n.id
+    JOIN old_rows o ON o.id=n.id
+    WHERE n.title IS DISTINCT FROM o.title
+  ));
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+"""
+
+#: Tables with triggers, the trigger function and the operations they use
+TABLES = {
+    "timer_timestamp": ("timer_sliceversion_user", ["INSERT", "UPDATE", "DELETE"]),
+    "logbook_break": ("timer_sliceversion_user", ["INSERT", "UPDATE", "DELETE"]),
+    "logbook_loggedhours": (
+        "timer_sliceversion_logbook",
+        ["INSERT", "UPDATE", "DELETE"],
+    ),
+    "projects_service": ("timer_sliceversion_service", ["UPDATE"]),
+}
+
+REFERENCING = {
+    "INSERT": "NEW TABLE AS new_rows",
+    "UPDATE": "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "DELETE": "OLD TABLE AS old_rows",
+}
+
+
+def _table_triggers():
+    sql = []
+    for table, (function, ops) in TABLES.items():
+        for op in ops:
+            trigger = f"{table}_slices_{op.lower()}"
+            sql.append(f"DROP TRIGGER IF EXISTS {trigger} ON {table};")
+            sql.append(
+                f"CREATE TRIGGER {trigger} AFTER {op} ON {table}"
+                f" REFERENCING {REFERENCING[op]}"
+                f" FOR EACH STATEMENT EXECUTE PROCEDURE {function}();"
+            )
+    return "\n".join(sql)
+
+
+TRIGGERS += _table_triggers()
+
+DROP_TRIGGERS = "\n".join(
+    [
+        f"DROP TRIGGER IF EXISTS {table}_slices_{op.lower()} ON {table};"
+        for table, (_function, ops) in TABLES.items()
+        for op in ops
+    ]
+    + [
+        "DROP FUNCTION IF EXISTS timer_sliceversion_user();",
+        "DROP FUNCTION IF EXISTS timer_sliceversion_logbook();",
+        "DROP FUNCTION IF EXISTS timer_sliceversion_service();",
+        "DROP FUNCTION IF EXISTS timer_sliceversion_bump(integer[]);",
+        "DROP SEQUENCE IF EXISTS timer_sliceversion_seq;",
+    ]
+)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0023_user_pinned_projects"),
+        ("logbook", "0020_auto_20200511_1419"),
+        ("projects", "0030_project_version"),
+        ("timer", "0008_remove_timestamp_project"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SliceVersion",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="user",
+                    ),
+                ),
+                ("version", models.BigIntegerField(verbose_name="version")),
+            ],
+            options={
+                "verbose_name": "slice version",
+                "verbose_name_plural": "slice versions",
+            },
+        ),
+        migrations.RunSQL(TRIGGERS, DROP_TRIGGERS),
+    ]
@@ -303,3 +303,28 @@ class Timestamp(models.Model):
     @property
     def pretty_time(self):
         return local_date_format(self.created_at, fmt="H:i")
+
+
+class SliceVersion(models.Model):
+    """
+    Version of the timer slices of a user, maintained by database triggers
+
+    See ``workbench.timer.slices``.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        primary_key=True,
+        verbose_name=_("user"),
+        related_name="+",
+    )
+    version = models.BigIntegerField(_("version"))
+
+    class Meta:
+        verbose_name = _("slice version")
+        verbose_name_plural = _("slice versions")
+
+    def __str__(self):
+        return f"{self.user_id}: {self.version}"
@@ -0,0 +1,95 @@
+"""
+Cached timer slices with incremental client sync
+
+Timer clients poll the slices of the current day. Building slices needs
+timestamps, logged hours and breaks and the merge algorithm of
+``TimestampQuerySet.slices``, so serialized slices are cached per user and
+day.
+
+Database triggers assign a new value of ``timer_sliceversion_seq`` to a user
+whenever timestamps, logged hours or breaks of the user are inserted,
+updated or deleted, and when the title of a service with logged hours of the
+user changes. A cached slice list is rebuilt when its version differs from
+the current version of the user. Each slice carries the version which last
+changed it, so clients only fetch the slices changed since the version
+(the cursor) they received last.
+"""
+
+import datetime as dt
+
+from django.conf import settings
+from django.core.cache import cache
+
+from workbench.timer.models import Timestamp
+from workbench.tools.reporting import query
+
+
+def slices_version(user_id):
+    rows = query(
+        "select version from timer_sliceversion where user_id=%s",
+        [user_id],
+    )
+    return rows[0][0] if rows else 0
+
+
+def _key(slice):
+    if slice.get("timestamp_id"):
+        return f"timestamp-{slice['timestamp_id']}"
+    if obj := slice.get("logged_hours"):
+        return f"hours-{obj.id}"
+    if obj := slice.get("logged_break"):
+        return f"break-{obj.id}"
+    return "detected-{}".format(
+        int(slice["starts_at"].timestamp()) if slice.get("starts_at") else ""
+    )
+
+
+def _serialize(slice):
+    return {
+        "key": _key(slice),
+        "starts_at": slice.get("starts_at"),
+        "ends_at": slice.get("ends_at"),
+        "description": str(slice["description"] or ""),
+        "comment": slice.get("comment", ""),
+        "elapsed": slice.elapsed_hours,
+        "hours": obj.hours if (obj := slice.get("logged_hours")) else None,
+        "timestamp_id": slice.get("timestamp_id"),
+        "logged_hours_id": obj.id if (obj := slice.get("logged_hours")) else None,
+        "logged_break_id": obj.id if (obj := slice.get("logged_break")) else None,
+    }
+
+
+def cached_slices(user, *, day=None):
+    """
+    Return ``(version, slices)`` for the user and day
+
+    Slices are dictionaries with a ``key`` identifying the slice, the
+    ``version`` which last changed the slice and serializable values of the
+    slice. Slices unchanged since the last build keep their version.
+    """
+    day = day or dt.date.today()
+    key = f"timer-slices:{user.id}:{day}"
+    # Fetch the version first; writes committed while building the slices
+    # bump the version again and lead to another build.
+    version = slices_version(user.id)
+    cached = cache.get(key)
+    if cached and cached["version"] == version:
+        return version, cached["slices"]
+
+    previous = {slice["key"]: slice for slice in cached["slices"]} if cached else {}
+    slices = []
+    for slice in Timestamp.objects.slices(user, day=day):
+        data = _serialize(slice)
+        old = previous.get(data["key"])
+        if old and {**old, "version": None} == {**data, "version": None}:
+            data["version"] = old["version"]
+        else:
+            data["version"] = version
+        slices.append(data)
+
+    cache.set(
+        key,
+        {"version": version, "slices": slices},
+        settings.TIMER_SLICES_CACHE_TIMEOUT,
+    )
+    return version, slices
@@ -317,6 +317,69 @@ class TimestampsTest(TestCase):
         self.assertEqual(len(data["timestamps"]), 1)
         self.assertEqual(data["timestamps"][0]["elapsed"], "0.1")
 
+    def test_timestamp_slices(self):
+        """The slices endpoint only returns slices changed since the cursor"""
+        user = factories.UserFactory.create()
+
+        response = self.client.get("/timestamp-slices/")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(f"/timestamp-slices/?token={user.token}&cursor=x")
+        self.assertEqual(response.status_code, 400)
+
+        user.timestamp_set.create(
+            type=Timestamp.START, created_at=timezone.now() - dt.timedelta(seconds=10)
+        )
+        stop = user.timestamp_set.create(type=Timestamp.STOP)
+
+        data = self.client.get(f"/timestamp-slices/?token={user.token}").json()
+        self.assertEqual(data["keys"], [f"timestamp-{stop.id}"])
+        self.assertEqual(len(data["slices"]), 1)
+        self.assertEqual(data["slices"][0]["elapsed"], "0.1")
+        cursor = data["cursor"]
+
+        url = f"/timestamp-slices/?token={user.token}&cursor={cursor}"
+        # The user and the slices version in the savepoint of the request
+        # transaction
+        with self.assertNumQueries(4):
+            data = self.client.get(url).json()
+        self.assertEqual(data["cursor"], cursor)
+        self.assertEqual(data["slices"], [])
+
+        hours = factories.LoggedHoursFactory.create(
+            rendered_by=user, description="Work"
+        )
+        data = self.client.get(url).json()
+        self.assertEqual(data["hours"], "1.0")
+        self.assertEqual(data["keys"], [f"timestamp-{stop.id}", f"hours-{hours.id}"])
+        self.assertEqual(
+            [slice["key"] for slice in data["slices"]], [f"hours-{hours.id}"]
+        )
+        cursor = data["cursor"]
+
+        hours.service.title = "Renamed"
+        hours.service.save()
+        url = f"/timestamp-slices/?token={user.token}&cursor={cursor}"
+        data = self.client.get(url).json()
+        self.assertEqual(
+            [slice["description"] for slice in data["slices"]], ["Renamed: Work"]
+        )
+
+        stop.delete()
+        url = f"/timestamp-slices/?token={user.token}&cursor={data['cursor']}"
+        data = self.client.get(url).json()
+        self.assertEqual(data["keys"], [f"hours-{hours.id}"])
+        # The slice does not start at the removed timestamp anymore
+        self.assertEqual(
+            [slice["key"] for slice in data["slices"]], [f"hours-{hours.id}"]
+        )
+
+        # Other days are cached separately
+        yesterday = dt.date.today() - dt.timedelta(days=1)
+        data = self.client.get(
+            f"/timestamp-slices/?token={user.token}&day={yesterday.isoformat()}"
+        ).json()
+        self.assertEqual(data["keys"], [])
+
     def test_post_split(self):
         """Backwards compatibility: Type "split" still works"""
         self.client.force_login(factories.UserFactory.create())
@@ -9,6 +9,12 @@ urlpatterns = [
     path("timestamps/", views.timestamps, name="timestamps"),
     path("create-timestamp/", views.create_timestamp, name="create_timestamp"),
     path("list-timestamps/", views.list_timestamps, name="list_timestamps"),
+    path(
+        "create-logbook-entries/",
+        views.create_logbook_entries,
+        name="create_logbook_entries",
+    ),
+    path("timestamp-slices/", views.timestamp_slices, name="timestamp_slices"),
     re_path(
         r"^delete-timestamp/([0-9]+)/$", views.delete_timestamp, name="delete_timestamp"
     ),
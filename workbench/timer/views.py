@@ -1,4 +1,5 @@
 import datetime as dt
+import json
 
 from corsheaders.middleware import CorsMiddleware
 from django import forms
@@ -13,7 +14,9 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET, require_POST
 
 from workbench.accounts.models import User
+from workbench.logbook.batch import LogbookBatch
 from workbench.timer.models import Timestamp
+from workbench.timer.slices import cached_slices
 from workbench.tools.formats import Z1, hours, local_date_format
 from workbench.tools.forms import Form, ModelForm
 from workbench.tools.validation import filter_form
@@ -90,6 +93,45 @@ class TokenUserForm(TokenUserMixin, Form):
     pass
 
 
+@csrf_exempt
+@decorator_from_middleware(CorsMiddleware)
+@require_POST
+def create_logbook_entries(request):
+    form = TokenUserForm(request.GET, request=request)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors.as_json()}, status=400)
+
+    try:
+        data = json.loads(request.body)
+        entries = data["entries"]
+        if not isinstance(entries, list) or not all(
+            isinstance(entry, dict) and isinstance(entry.get("type", ""), str)
+            for entry in entries
+        ):
+            raise TypeError
+        ignore_warnings = data.get("ignore_warnings") or []
+        if not isinstance(ignore_warnings, list) or not all(
+            isinstance(code, str) for code in ignore_warnings
+        ):
+            raise TypeError
+    except (KeyError, TypeError, ValueError):
+        return JsonResponse(
+            {
+                "errors": "Expected a JSON object with a list of entries and"
+                " optionally a list of warning codes to ignore."
+            },
+            status=400,
+        )
+
+    batch = LogbookBatch(
+        entries, user=form.cleaned_data["user"], ignore_warnings=ignore_warnings
+    )
+    if not batch.is_valid():
+        return JsonResponse({"entries": batch.results}, status=400)
+    batch.save()
+    return JsonResponse({"success": True, "entries": batch.results}, status=201)
+
+
 @decorator_from_middleware(CorsMiddleware)
 @require_GET
 def list_timestamps(request):
@@ -98,33 +140,56 @@ def list_timestamps(request):
         return JsonResponse({"errors": form.errors.as_json()}, status=400)
 
     user = form.cleaned_data["user"]
-    slices = Timestamp.objects.slices(user)
-    daily_hours = sum(
-        (slice["logged_hours"].hours for slice in slices if slice.get("logged_hours")),
-        Z1,
-    )
+    _version, slices = cached_slices(user)
     return JsonResponse({
         "success": True,
         "user": str(user),
-        "hours": daily_hours,
+        "hours": sum((slice["hours"] for slice in slices if slice["hours"]), Z1),
         "timestamps": [
             {
                 "timestamp": "{:>5} - {:>5} {:^7} {}".format(
-                    local_date_format(slice.get("starts_at"), fmt="H:i") or "?  ",
-                    local_date_format(slice.get("ends_at"), fmt="H:i") or "?  ",
-                    f"({hours(slice.elapsed_hours, plus_sign=True)})"
-                    if slice.elapsed_hours is not None
+                    local_date_format(slice["starts_at"], fmt="H:i") or "?  ",
+                    local_date_format(slice["ends_at"], fmt="H:i") or "?  ",
+                    f"({hours(slice['elapsed'], plus_sign=True)})"
+                    if slice["elapsed"] is not None
                     else "?",
                     slice["description"] or "-",
                 ),
-                "elapsed": slice.elapsed_hours,
-                "comment": slice.get("comment", ""),
+                "elapsed": slice["elapsed"],
+                "comment": slice["comment"],
             }
             for slice in slices
         ],
     })
 
 
+class SlicesForm(TokenUserMixin, Form):
+    cursor = forms.IntegerField(required=False, min_value=0)
+    day = forms.DateField(required=False)
+
+
+@decorator_from_middleware(CorsMiddleware)
+@require_GET
+def timestamp_slices(request):
+    form = SlicesForm(request.GET, request=request)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors.as_json()}, status=400)
+
+    user = form.cleaned_data["user"]
+    cursor = form.cleaned_data["cursor"]
+    version, slices = cached_slices(user, day=form.cleaned_data["day"])
+    return JsonResponse({
+        "success": True,
+        "user": str(user),
+        "cursor": version,
+        "hours": sum((slice["hours"] for slice in slices if slice["hours"]), Z1),
+        "keys": [slice["key"] for slice in slices],
+        "slices": [
+            slice for slice in slices if cursor is None or slice["version"] > cursor
+        ],
+    })
+
+
 @require_POST
 def delete_timestamp(request, pk):
     timestamp = get_object_or_404(Timestamp.objects.filter(user=request.user), pk=pk)
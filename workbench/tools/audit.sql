@@ -38,7 +38,8 @@ CREATE TABLE IF NOT EXISTS audit_logged_actions (
     created_at TIMESTAMP WITH TIME ZONE NOT NULL,
     action TEXT NOT NULL CHECK (action IN ('I','D','U', 'T')),
     row_data hstore,
-    changed_fields hstore
+    changed_fields hstore,
+    row_id bigint
 );
 
 CREATE INDEX IF NOT EXISTS logged_actions_relid_idx ON audit_logged_actions(table_name);
@@ -64,7 +65,8 @@ BEGIN
         current_setting('application_name'),
         current_timestamp,                            -- action_tstamp_tx
         substring(TG_OP,1,1),                         -- action
-        NULL, NULL                                    -- row_data, changed_fields
+        NULL, NULL,                                   -- row_data, changed_fields
+        NULL                                          -- row_id
         );
 
     IF TG_ARGV[0] IS NOT NULL THEN
@@ -87,6 +89,7 @@ BEGIN
         RAISE EXCEPTION '[audit_if_modified_func] - Trigger func added as trigger for unhandled case: %, %',TG_OP, TG_LEVEL;
         RETURN NULL;
     END IF;
+    audit_row.row_id = (audit_row.row_data -> 'id')::bigint;
     INSERT INTO audit_logged_actions VALUES (audit_row.*);
     RETURN NULL;
 END;
@@ -169,8 +172,9 @@ DECLARE
   _q_txt text;
 BEGIN
   _q_txt = 'INSERT INTO audit_logged_actions ' ||
-    '(table_name, user_name, created_at, action, row_data, changed_fields) ' ||
-    'SELECT ''' || target_table || ''', '''', NOW(), ''I'', hstore(' || target_table || '.*), ''''::hstore ' ||
+    '(table_name, user_name, created_at, action, row_data, changed_fields, row_id) ' ||
+    'SELECT ''' || target_table || ''', '''', NOW(), ''I'', hstore(' || target_table || '.*), ''''::hstore, ' ||
+    '(hstore(' || target_table || '.*) -> ''id'')::bigint ' ||
     'FROM ' || target_table;
   EXECUTE _q_txt;
 
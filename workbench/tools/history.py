@@ -1,4 +1,4 @@
-from collections import namedtuple
+from collections import defaultdict, namedtuple
 from decimal import Decimal
 
 from django.db import models
@@ -114,27 +114,36 @@ class Prettifier:
             values[field.attname] = value
         return default_if_none(value, _("<no value>"))
 
-    def handle_related_model(self, values, field):
-        value = values.get(field.attname)
-        if value is None:
-            return _("<no value>")
-
-        model = field.related_model
-        key = (model, value)
-        if key in self._prettified_instances:
-            values[field.attname] = self._prettified_instances[key][0]
-            return self._prettified_instances[key][1]
-
-        queryset = model._default_manager.all()
+    def prefetch(self, values_list, fields):
+        """
+        Resolve all related instances referenced in ``values_list`` with one
+        query per related model instead of one query per instance
+        """
+        pks = defaultdict(dict)
+        for values in values_list:
+            for field in fields:
+                if field.choices or not field.related_model:
+                    continue
+                value = values.get(field.attname)
+                if value is not None and (field.related_model, value) not in (
+                    self._prettified_instances
+                ):
+                    pks[field.related_model][value] = (
+                        field.related_model._meta.pk.to_python(value)
+                    )
+
+        for model, values in pks.items():
+            instances = model._default_manager.in_bulk(set(values.values()))
+            for value, pk in values.items():
+                self._prettified_instances[(model, value)] = self._prettify_instance(
+                    model, value, instances.get(pk)
+                )
 
-        instance = None
-        try:
-            instance = queryset.get(pk=value)
-            pretty = str(instance)
-        except model.DoesNotExist:
+    def _prettify_instance(self, model, value, instance):
+        if instance is None:
             pretty = _("Deleted %s instance") % model._meta.verbose_name
         else:
-            values[field.attname] = instance
+            pretty = str(instance)
 
         if model in HISTORY:
             pretty = format_html(
@@ -143,7 +152,23 @@ class Prettifier:
                 pretty,
             )
 
-        self._prettified_instances[key] = (instance, pretty)
+        return (instance, pretty)
+
+    def handle_related_model(self, values, field):
+        value = values.get(field.attname)
+        if value is None:
+            return _("<no value>")
+
+        model = field.related_model
+        key = (model, value)
+        if key not in self._prettified_instances:
+            self._prettified_instances[key] = self._prettify_instance(
+                model, value, model._default_manager.filter(pk=value).first()
+            )
+
+        instance, pretty = self._prettified_instances[key]
+        if instance is not None:
+            values[field.attname] = instance
         return pretty
 
     def format(self, values, field):
@@ -176,7 +201,11 @@ def changes(model, fields, actions):
     if not actions:
         return changes
 
-    users = {u.pk: u.get_full_name() for u in User.objects.all()}
+    actions = list(actions)
+    users = {
+        u.pk: u.get_full_name()
+        for u in User.objects.filter(pk__in={action.user_id for action in actions})
+    }
     users[0] = _("<anonymous>")
     fields = [
         f
@@ -185,6 +214,13 @@ def changes(model, fields, actions):
     ]
 
     prettifier = Prettifier()
+    prettifier.prefetch(
+        [
+            (action.changed_fields or {}) if action.action == "U" else action.row_data
+            for action in actions
+        ],
+        fields,
+    )
 
     for action in actions:
         if action.action == "I":
@@ -0,0 +1,97 @@
+"""
+Content addressed cache for invoice and offer PDFs
+
+The cache key is a hash of everything the PDF depends on: the fields of the
+document, its services and down payment invoices, the language and the
+template version, which covers the source of ``workbench.tools.pdf`` and
+the stationery settings. Saving a document or one of its services changes
+the key, so outdated PDFs are never served and simply expire.
+"""
+
+import hashlib
+import json
+from functools import cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.translation import activate, get_language
+from pdfdocument.utils import FILENAME_RE
+
+
+@cache
+def template_version():
+    from workbench.tools import pdf
+
+    stationery = {
+        key: value
+        for key, value in vars(settings.WORKBENCH).items()
+        if key.startswith("PDF_") or key in {"FONTS", "QRBILL"}
+    }
+    return hashlib.sha256(
+        Path(pdf.__file__).read_bytes()
+        + json.dumps(stationery, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def _fields(instance):
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+    }
+
+
+def document_key(document, **kwargs):
+    """
+    Return the cache key of an invoice or offer PDF
+
+    Additional keyword arguments (e.g. ``qr``) are part of the key.
+    """
+    parts = [
+        template_version(),
+        get_language(),
+        document._meta.label_lower,
+        kwargs,
+        _fields(document),
+        document.code,
+        document.owned_by.get_full_name(),
+        [_fields(service) for service in document.services.all()],
+    ]
+    if getattr(document, "down_payment_total", None):
+        parts.append([
+            (_fields(invoice), invoice.code)
+            for invoice in document.down_payment_invoices.all()
+        ])
+    data = json.dumps(parts, cls=DjangoJSONEncoder, sort_keys=True).encode()
+    return f"pdf:{document._meta.label_lower}:{hashlib.sha256(data).hexdigest()}"
+
+
+def get_many(keys):
+    return caches["pdf"].get_many(keys)
+
+
+def store(key, pdf):
+    caches["pdf"].set(key, pdf)
+
+
+def get_or_render(document, render, **kwargs):
+    """
+    Return the PDF of ``document`` from the cache or by calling ``render``
+    """
+    activate(settings.WORKBENCH.PDF_LANGUAGE)
+    key = document_key(document, **kwargs)
+    if (pdf := caches["pdf"].get(key)) is None:
+        pdf = render()
+        store(key, pdf)
+    return pdf
+
+
+def pdf_bytes_response(filename, pdf, *, as_attachment=True):
+    response = HttpResponse(pdf, content_type="application/pdf")
+    response["Content-Disposition"] = '{}; filename="{}.pdf"'.format(
+        "attachment" if as_attachment else "inline",
+        FILENAME_RE.sub("-", filename),
+    )
+    return response
@@ -68,6 +68,79 @@ CREATE TRIGGER {table}_fts_trigger BEFORE INSERT OR UPDATE
 """.format(table=table, fields=", ".join(f"new.{field}" for field in fields))
 
 
+def _index_values(table, fields, archived, row):
+    title = "unaccent(concat_ws(' ', {}))".format(
+        ", ".join(f"{row}.{field}" for field in fields)
+    )
+    document = (
+        f"setweight(to_tsvector('pg_catalog.german',"
+        f" regexp_replace({title}, '[^0-9A-Za-z]+', ' ')), 'A')"
+        f" || setweight(coalesce({row}.fts_document, ''::tsvector), 'B')"
+    )
+    return ",\n    ".join([
+        f"'{table}'",
+        f"{row}.id",
+        title,
+        f"NOT {row}.{archived}" if archived else "true",
+        document,
+    ])
+
+
+_INDEX_UPSERT = """\
+  ON CONFLICT (table_name, object_id) DO UPDATE SET
+    title=excluded.title, is_active=excluded.is_active, document=excluded.document"""
+
+
+def index(table, fields, *, archived=None):
+    """
+    Keep the row in the unified ``search_searchentry`` table
+
+    ``fields`` are weighted higher than the rest of the ``fts_document``
+    which is maintained by the ``{table}_fts`` trigger above.
+    """
+    return f"""\
+CREATE OR REPLACE FUNCTION {table}_search_index() RETURNS trigger AS $$
+begin
+  IF TG_OP = 'DELETE' THEN
+    DELETE FROM search_searchentry WHERE table_name='{table}' AND object_id=old.id;
+    RETURN NULL;
+  END IF;
+  INSERT INTO search_searchentry (table_name, object_id, title, is_active, document)
+  VALUES (
+    {_index_values(table, fields, archived, "new")}
+  )
+{_INDEX_UPSERT};
+  RETURN NULL;
+end
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS {table}_search_index_trigger ON {table};
+CREATE TRIGGER {table}_search_index_trigger AFTER INSERT OR UPDATE OR DELETE
+  ON {table} FOR EACH ROW EXECUTE PROCEDURE {table}_search_index();
+"""
+
+
+def reindex(table, fields, *, archived=None):
+    """
+    Fill the unified search table with all rows of ``table``
+    """
+    return f"""\
+INSERT INTO search_searchentry (table_name, object_id, title, is_active, document)
+SELECT
+    {_index_values(table, fields, archived, table)}
+FROM {table}
+{_INDEX_UPSERT};
+"""
+
+
+def drop_index(table):
+    return f"""\
+DROP TRIGGER IF EXISTS {table}_search_index_trigger ON {table};
+DROP FUNCTION IF EXISTS {table}_search_index();
+DELETE FROM search_searchentry WHERE table_name='{table}';
+"""
+
+
 def process_query(s):
     """
     Converts the user's search string into something suitable for passing to
@@ -1,4 +1,6 @@
 from django.contrib.messages import get_messages
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
 
 
 def messages(response):
@@ -11,3 +13,23 @@ def check_code(test, base_url):
         test.assertEqual(response.status_code, status_code)
 
     return code
+
+
+def check_query_budget(test, url, budget, **kwargs):
+    """
+    Request the URL and fail if the response needs more than ``budget``
+    queries, listing the executed queries
+    """
+    with CaptureQueriesContext(connections["default"]) as context:
+        response = test.client.get(url, **kwargs)
+    test.assertLessEqual(
+        len(context),
+        budget,
+        "{} executed {} queries, the budget is {}:\n{}".format(
+            url,
+            len(context),
+            budget,
+            "\n".join(query["sql"] for query in context.captured_queries),
+        ),
+    )
+    return response
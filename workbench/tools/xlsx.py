@@ -1,37 +1,108 @@
+import io
 from collections import defaultdict
 from itertools import chain
 
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncMonth
 from django.utils.text import capfirst, slugify
 from django.utils.translation import gettext as _
 from xlsxdocument import XLSXDocument
 
+from workbench.accounts.models import User
 from workbench.contacts.models import PostalAddress
+from workbench.invoices.models import Service as InvoiceService
+from workbench.projects.models import Service
 from workbench.templatetags.workbench import label
 from workbench.tools.formats import Z1
 
 
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
 class WorkbenchXLSXDocument(XLSXDocument):
+    def to_artifact(self, filename):
+        """
+        Return the ``(filename, content_type, data)`` tuple of background jobs
+        """
+        with io.BytesIO() as buf:
+            self.workbook.save(buf)
+            return filename, XLSX_CONTENT_TYPE, buf.getvalue()
+
     def logged_hours(self, queryset):
-        queryset = queryset.select_related(
-            "created_by",
-            "rendered_by",
-            "service__project__owned_by",
-            "invoice_service__invoice__owned_by",
-            "invoice_service__invoice__project",
-        )
+        """
+        Export logged hours with pivot tables by service, user and month
 
-        self.table_from_queryset(
-            queryset,
-            additional=[
-                (capfirst(_("hourly rate")), lambda hours: hours.service.effort_rate),
-                (capfirst(_("project")), lambda hours: hours.service.project),
-                (
-                    capfirst(_("invoice")),
-                    lambda hours: hours.invoice_service.invoice
-                    if hours.invoice_service
-                    else None,
-                ),
+        Rows are streamed from the database as tuples and the pivot tables are
+        aggregated by the database, so the memory needed only depends on the
+        number of services and users, not on the number of logged hours.
+        """
+        unordered = queryset.order_by()
+
+        services = {
+            service.id: service
+            for service in Service.objects.filter(
+                id__in=unordered.values("service")
+            ).select_related("project__owned_by")
+        }
+        users = {
+            user.id: user
+            for user in User.objects.filter(
+                Q(id__in=unordered.values("created_by"))
+                | Q(id__in=unordered.values("rendered_by"))
+            )
+        }
+        invoice_services = {
+            service.id: service
+            for service in InvoiceService.objects.filter(
+                id__in=unordered.filter(invoice_service__isnull=False).values(
+                    "invoice_service"
+                )
+            ).select_related("invoice__owned_by", "invoice__project")
+        }
+
+        opts = queryset.model._meta
+        fields = [field.attname for field in opts.fields]
+        user_labels = {pk: str(user) for pk, user in users.items()}
+        labels = {
+            "service_id": {pk: str(service) for pk, service in services.items()},
+            "created_by_id": user_labels,
+            "rendered_by_id": user_labels,
+            "invoice_service_id": {
+                pk: str(service) for pk, service in invoice_services.items()
+            },
+        }
+        projects = {pk: str(service.project) for pk, service in services.items()}
+        invoices = {
+            pk: str(service.invoice) for pk, service in invoice_services.items()
+        }
+
+        def rows():
+            for values in queryset.values_list(*fields).iterator(chunk_size=2000):
+                row = dict(zip(fields, values, strict=True))
+                service = services[row["service_id"]]
+                yield (
+                    [f"{service.title}: {row['description']}"]
+                    + [
+                        labels[field].get(value) if field in labels else value
+                        for field, value in row.items()
+                    ]
+                    + [
+                        service.effort_rate,
+                        projects[service.id],
+                        invoices.get(row["invoice_service_id"]),
+                    ]
+                )
+
+        self.add_sheet(slugify(str(opts.verbose_name_plural)))
+        self.table(
+            ["__str__"]
+            + [str(capfirst(field.verbose_name)) for field in opts.fields]
+            + [
+                capfirst(_("hourly rate")),
+                capfirst(_("project")),
+                capfirst(_("invoice")),
             ],
+            rows(),
         )
 
         by_service_and_user = defaultdict(lambda: defaultdict(lambda: Z1))
@@ -40,14 +111,28 @@ class WorkbenchXLSXDocument(XLSXDocument):
         by_user_and_month = defaultdict(lambda: defaultdict(lambda: Z1))
         by_month = defaultdict(lambda: Z1)
 
-        for h in queryset:
-            by_service_and_user[h.service][h.rendered_by] += h.hours
-            by_user[h.rendered_by] += h.hours
+        def grouped(*fields, **expressions):
+            return (
+                unordered.values(*fields, **expressions)
+                .annotate(Sum("hours"))
+                .order_by()
+                .iterator()
+            )
 
-            month = h.rendered_on.replace(day=1)
-            by_service_and_month[h.service][month] += h.hours
-            by_user_and_month[h.rendered_by][month] += h.hours
-            by_month[month] += h.hours
+        month = TruncMonth("rendered_on")
+        for row in grouped("service", "rendered_by"):
+            user = users[row["rendered_by"]]
+            by_service_and_user[services[row["service"]]][user] = row["hours__sum"]
+            by_user[user] += row["hours__sum"]
+        for row in grouped("service", month=month):
+            by_service_and_month[services[row["service"]]][row["month"]] = row[
+                "hours__sum"
+            ]
+            by_month[row["month"]] += row["hours__sum"]
+        for row in grouped("rendered_by", month=month):
+            by_user_and_month[users[row["rendered_by"]]][row["month"]] = row[
+                "hours__sum"
+            ]
 
         self.add_sheet(slugify(_("By service and user")))
         users = sorted(
@@ -87,7 +172,7 @@ class WorkbenchXLSXDocument(XLSXDocument):
                 + [by_users.get(user) for user in users]
                 for service, by_users in sorted(
                     by_service_and_user.items(),
-                    key=lambda row: (row[0].project_id, row[0].position),
+                    key=lambda row: (row[0].project_id, row[0].position, row[0].id),
                 )
             ],
         )
@@ -129,7 +214,7 @@ class WorkbenchXLSXDocument(XLSXDocument):
                 + [by_months.get(month) for month in months]
                 for service, by_months in sorted(
                     by_service_and_month.items(),
-                    key=lambda row: (row[0].project_id, row[0].position),
+                    key=lambda row: (row[0].project_id, row[0].position, row[0].id),
                 )
             ],
         )
@@ -267,3 +352,105 @@ class WorkbenchXLSXDocument(XLSXDocument):
                 for project in statistics["statistics"]
             ],
         )
+
+    def labor_costs(self, stats):
+        self.add_sheet(_("Labor costs"))
+        self.table(
+            [
+                capfirst(_("cost center")),
+                capfirst(_("project")),
+                capfirst(_("hours")),
+                _("Undefined rate"),
+                _("Net cost"),
+                _("Productivity costs"),
+                capfirst(_("third party costs")),
+                capfirst(_("cost")),
+                _("Revenue"),
+            ],
+            chain.from_iterable(
+                [
+                    [
+                        cc_row["cost_center"] or _("No cost center defined"),
+                        "",
+                        cc_row["hours"],
+                        cc_row["hours_with_rate_undefined"],
+                        cc_row["costs"],
+                        cc_row["costs_with_green_hours_target"],
+                        cc_row["third_party_costs"],
+                        cc_row["costs_with_green_hours_target"]
+                        + cc_row["third_party_costs"],
+                        cc_row["revenue"],
+                    ],
+                    *(
+                        [
+                            "",
+                            row["project"],
+                            row["hours"],
+                            row["hours_with_rate_undefined"],
+                            row["costs"],
+                            row["costs_with_green_hours_target"],
+                            row["third_party_costs"],
+                            row["costs_with_green_hours_target"]
+                            + row["third_party_costs"],
+                            row["revenue"],
+                        ]
+                        for row in cc_row["projects"]
+                    ),
+                ]
+                for cc_row in stats["cost_centers"]
+            ),
+        )
+
+    def green_hours(self, stats):
+        self.add_sheet(_("Green hours"))
+        self.table(
+            [
+                capfirst(_("user")),
+                capfirst(_("profitable")),
+                capfirst(_("overdrawn")),
+                capfirst(_("maintenance")),
+                capfirst(_("internal")),
+                capfirst(_("total")),
+                capfirst(_("green")),
+            ],
+            [
+                [
+                    user or capfirst(_("total")),
+                    row["profitable"],
+                    row["overdrawn"],
+                    row["maintenance"],
+                    row["internal"],
+                    row["total"],
+                    row["percentage"],
+                ]
+                for user, row in stats
+            ],
+        )
+
+    def gross_margin_by_month(self, rows):
+        self.add_sheet(_("Gross margin"))
+        self.table(
+            [
+                capfirst(_("month")),
+                _("Gross profit"),
+                capfirst(_("third party costs")),
+                capfirst(_("accruals")),
+                _("Gross margin"),
+                _("FTE"),
+                _("Margin / FTE"),
+                capfirst(_("projected gross margin")),
+            ],
+            [
+                [
+                    row["date"],
+                    row["gross_profit"],
+                    row["third_party_costs"],
+                    row["accruals"]["delta"],
+                    row["gross_margin"],
+                    row["fte"],
+                    row["margin_per_fte"],
+                    row["projected_gross_margin"],
+                ]
+                for row in rows
+            ],
+        )
@@ -32,6 +32,7 @@ urlpatterns = [
     path("report/", include("workbench.reporting.urls")),
     path("", include("workbench.timer.urls")),
     path("notes/", include("workbench.notes.urls")),
+    path("jobs/", include("workbench.jobs.urls")),
     # Legacy URL redirects
     re_path(
         r"^projects/projects/([0-9]+)/$",